@@ -0,0 +1,90 @@
+"""Async variants of read-heavy API endpoints, for ASGI deployments.
+
+async_read_view() builds a view for one route: GET requests are answered by
+an ``async def handler(view, request)`` on the event loop, other methods go
+to the regular DRF viewset. The handler gets a DRF-initialized viewset
+instance (authentication, permissions and throttles already ran, the
+principal is loaded) so it can reuse get_queryset() and the serializers;
+queries go through the async ORM, serializers that touch relations run via
+sync_to_async.
+
+The routes are only mounted with ASYNC_READ_VIEWS (default on for
+SERVER_MODE=asgi); under WSGI every async view would need its own event
+loop per request.
+"""
+import asyncio
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.views.decorators.csrf import csrf_exempt
+
+from .principal import request_principal
+
+
+def _action_initkwargs(viewset_class, action):
+    # Options given to @action(), e.g. permission_classes, as the router applies them
+    return dict(getattr(getattr(viewset_class, action), 'kwargs', {}))
+
+
+def _prepare(viewset_class, action, request, kwargs):
+    view = viewset_class(
+        action=action, action_map={'get': action, 'head': action}, args=(), kwargs=kwargs, format_kwarg=None,
+        **_action_initkwargs(viewset_class, action),
+    )
+    view.headers = view.default_response_headers
+    view.request = drf_request = view.initialize_request(request, **kwargs)
+    try:
+        view.initial(drf_request)
+        # Loads the principal now, so handlers never query for it on the event loop
+        request_principal(drf_request)
+    except Exception as exc:
+        return view, view.handle_exception(exc)
+    return view, None
+
+
+def _run_with_own_connection(func, *args, **kwargs):
+    # Threads of the default executor hold their own connections; apply
+    # CONN_MAX_AGE and health checks around every call like a request would
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def in_parallel(*calls):
+    """Run sync callables concurrently, each on its own thread and connection.
+
+    ``calls`` are (func, *args) tuples; returns their results in order.
+    """
+    return await asyncio.gather(*(
+        sync_to_async(partial(_run_with_own_connection, func, *args), thread_sensitive=False)()
+        for func, *args in calls
+    ))
+
+
+def async_read_view(viewset_class, action, handler, other_actions=None):
+    """View for one route: GET through ``handler``, other methods through the viewset.
+
+    ``other_actions`` maps the remaining HTTP methods of the route to viewset
+    actions, as in ``ViewSet.as_view()``.
+    """
+    sync_view = viewset_class.as_view(
+        {'get': action, **(other_actions or {})}, **_action_initkwargs(viewset_class, action)
+    )
+
+    async def view(request, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(sync_view)(request, **kwargs)
+
+        drf_view, response = await sync_to_async(_prepare)(viewset_class, action, request, kwargs)
+        if response is None:
+            try:
+                response = await handler(drf_view, drf_view.request)
+            except Exception as exc:
+                response = drf_view.handle_exception(exc)
+        return drf_view.finalize_response(drf_view.request, response)
+
+    view.__name__ = f'{viewset_class.__name__}_{action}_async'
+    return csrf_exempt(view)
@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .models import UserProfile
+from .principal import principal_claims
 
 
 class UserIdTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -10,8 +14,19 @@ class UserIdTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     We still accept the SimpleJWT expected payload keys: {"username": "...", "password": "..."}.
     The provided "username" value is treated as a User ID first; if not found, it's treated as a username.
+
+    Tokens carry the principal claims (role, department, profile version) so
+    requests can be authenticated without loading the user.
     """
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        profile = UserProfile.objects.select_related('department').filter(user_id=user.pk).first()
+        if profile is not None:
+            token.payload.update(principal_claims(profile))
+        return token
+
     def validate(self, attrs):
         identifier = attrs.get('username')
         password = attrs.get('password')
@@ -26,5 +41,31 @@ class UserIdTokenObtainPairSerializer(TokenObtainPairSerializer):
         return super().validate({'username': attrs.get('username'), 'password': password})
 
 
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that re-stamps the principal claims from the current profile,
+    so a token rejected as stale after a role change is recovered by one refresh"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'], verify=False)
+        user_id = access[api_settings.USER_ID_CLAIM]
+        profile = (
+            UserProfile.objects.select_related('department')
+            .filter(user_id=user_id, user__is_active=True)
+            .first()
+        )
+        if profile is None:
+            if not User.objects.filter(pk=user_id, is_active=True).exists():
+                raise AuthenticationFailed('No active account found for this token', code='user_inactive')
+            return data
+        access.payload.update(principal_claims(profile))
+        data['access'] = str(access)
+        return data
+
+
 class UserIdTokenObtainPairView(TokenObtainPairView):
     serializer_class = UserIdTokenObtainPairSerializer
+
+
+class PrincipalTokenRefreshView(TokenRefreshView):
+    serializer_class = PrincipalTokenRefreshSerializer
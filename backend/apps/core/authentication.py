@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .principal import PROFILE_VERSION_CLAIM, Principal, profile_version
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """JWT authentication that loads user, profile and department in one query
+    and attaches the request principal (see principal.py) to the user"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            # Revocation checks read the primary: a lagging replica could still
+            # show an old password or an active account (see dbrouter.py)
+            user = self.user_model.objects.using(DEFAULT_DB_ALIAS).select_related('profile__department').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        user._principal = Principal.from_profile(getattr(user, 'profile', None), user_id=user.pk)
+        return user
+
+
+class ClaimsUser(SimpleLazyObject):
+    """User stand-in for claim-authenticated requests.
+
+    id/pk, authentication flags and the principal are answered from the token;
+    any other attribute (username, saving a foreign key to the user, ...) loads
+    the real User on first use.
+    """
+
+    def __init__(self, user_id, principal):
+        def load():
+            user = User.objects.using(DEFAULT_DB_ALIAS).select_related('profile__department').get(pk=user_id)
+            user._principal = principal
+            return user
+
+        super().__init__(load)
+        self.__dict__.update(
+            id=user_id, pk=user_id, _principal=principal,
+            is_active=True, is_authenticated=True, is_anonymous=False,
+        )
+
+    def __bool__(self):
+        return True
+
+
+class ClaimsPrincipalJWTAuthentication(PrincipalJWTAuthentication):
+    """Builds the principal from access token claims without querying the user.
+
+    The claimed profile version is compared with the current one (cached per
+    process, see principal.profile_version); a mismatch after a role change,
+    deactivation or password reset rejects the token so the client refreshes
+    it. Tokens issued without principal claims fall back to the database path.
+    """
+
+    def get_user(self, validated_token):
+        if PROFILE_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = profile_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(_("User not found or inactive"), code="user_inactive")
+        if version != validated_token[PROFILE_VERSION_CLAIM]:
+            raise AuthenticationFailed(_("User role or department has changed"), code="token_stale")
+
+        return ClaimsUser(user_id, Principal.from_claims(validated_token, user_id))
@@ -0,0 +1,100 @@
+"""HTTP conditional GET for API responses.
+
+Validators are derived from version stamps, not from the response body, so
+a request whose If-None-Match (or If-Modified-Since) still matches is
+answered with 304 before any serializer runs. The ETag covers:
+
+- the collection counters the response depends on (apps.core.versions);
+- optional per-object stamps such as ``updated_at``;
+- the full request path with its query string;
+- the caller's scope (user, role, department) and language, since
+  visibility and some fields depend on them.
+
+Responses carry ``Cache-Control: private, no-cache``: clients may keep
+them but must revalidate every time.
+"""
+import hashlib
+from datetime import datetime
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+from rest_framework.response import Response
+
+from .principal import request_principal
+from .versions import get_versions
+
+
+def response_validators(request, version_keys=(), *stamps):
+    """(etag, last_modified datetime or None) for a response"""
+    versions = get_versions(*version_keys) if version_keys else {}
+    principal = request_principal(request)
+    parts = [
+        request.get_full_path(),
+        f'{principal.user_id}:{principal.role}:{principal.department_id}:{get_language()}',
+        *(f'{key}={versions[key][0]}' for key in version_keys),
+        *(stamp.isoformat() if isinstance(stamp, datetime) else str(stamp) for stamp in stamps),
+    ]
+    etag = quote_etag(hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest())
+    changed = [changed_at for _, changed_at in versions.values() if changed_at]
+    changed += [stamp for stamp in stamps if isinstance(stamp, datetime)]
+    return etag, max(changed) if changed else None
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) response for a request whose preconditions answer it, else None"""
+    return get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(_timestamp(last_modified))
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Authorization', 'Accept-Language'))
+    return response
+
+
+def conditional_response(request, etag, last_modified, build):
+    """304 if the client's copy is current, else ``build()``; validators set on both"""
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = build()
+    return set_validators(response, etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """ETag/Last-Modified validators for a viewset's list and retrieve.
+
+    ``version_keys``: collections the responses are built from.
+    ``object_stamp_field``: per-object stamp for retrieve (e.g. ``updated_at``),
+    combined with ``detail_version_keys``; without it retrieve uses the
+    collection counters like list does.
+    """
+    version_keys = ()
+    object_stamp_field = None
+    detail_version_keys = ()
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = response_validators(request, self.version_keys)
+        return conditional_response(
+            request, etag, last_modified, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.object_stamp_field is None:
+            etag, last_modified = response_validators(request, self.version_keys)
+            return conditional_response(
+                request, etag, last_modified,
+                lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            )
+        instance = self.get_object()
+        etag, last_modified = response_validators(
+            request, self.detail_version_keys, getattr(instance, self.object_stamp_field)
+        )
+        return conditional_response(request, etag, last_modified, lambda: Response(self.get_serializer(instance).data))
@@ -0,0 +1,173 @@
+"""Read replica routing (settings.DATABASE_REPLICAS, configured by DB_REPLICA_*).
+
+Only reads made while serving a GET, HEAD or OPTIONS request go to a
+replica. These always use the primary:
+- writes;
+- reads in other requests;
+- management commands and background threads;
+- authentication: the token's user, profile and profile version
+  (authentication.py, principal.py), so a revoked token or a changed role is
+  not accepted from a lagging replica.
+
+Read-your-writes:
+- Within a request, reads return to the primary after its first write and
+  inside transactions on the primary.
+- After a request that wrote, the response sets a short-lived cookie
+  (DB_REPLICA_STICKY_SECONDS), so the client's next requests also read from
+  the primary while the replicas catch up.
+
+Lag fallback: each process checks a replica's replay lag at most every
+DB_REPLICA_CHECK_INTERVAL seconds. Replicas that are unreachable or more
+than DB_REPLICA_MAX_LAG seconds behind are skipped until the next check.
+With no usable replica, reads go to the primary.
+"""
+import contextvars
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'eeu_db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Per-request routing state: {'primary': reads must use the primary,
+# 'replica': alias picked for this request, 'wrote': the request wrote}
+_request_state = contextvars.ContextVar('replica_routing', default=None)
+
+# alias -> (monotonic time of the last check, lag in seconds or None if unreachable)
+_checks = {}
+
+_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _replica_lag(alias):
+    """Replay lag of a replica in seconds, or None if it cannot be queried"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError as exc:
+        logger.warning('Read replica %s unavailable: %s', alias, exc)
+        connection.close()
+        return None
+
+
+def _usable(alias):
+    now = time.monotonic()
+    checked = _checks.get(alias)
+    if checked is None or now - checked[0] >= settings.DB_REPLICA_CHECK_INTERVAL:
+        # Claim this check; concurrent requests keep the previous result
+        # (or the primary, before the first check) until it is done
+        _checks[alias] = (now, checked[1] if checked else None)
+        lag = _replica_lag(alias)
+        if lag is not None and lag > settings.DB_REPLICA_MAX_LAG:
+            logger.warning('Read replica %s is %.1fs behind; using the primary', alias, lag)
+        _checks[alias] = checked = (now, lag)
+    lag = checked[1]
+    return lag is not None and lag <= settings.DB_REPLICA_MAX_LAG
+
+
+def pick_replica():
+    """A usable replica, picked at random to spread load, or the primary"""
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if _usable(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+def replica_status():
+    """{alias: {'lag_seconds', 'usable', 'checked_seconds_ago'}} as last seen by this process"""
+    now = time.monotonic()
+    status = {}
+    for alias in settings.DATABASE_REPLICAS:
+        checked_at, lag = _checks.get(alias, (None, None))
+        status[alias] = {
+            'lag_seconds': lag,
+            'usable': lag is not None and lag <= settings.DB_REPLICA_MAX_LAG,
+            'checked_seconds_ago': round(now - checked_at, 1) if checked_at is not None else None,
+        }
+    return status
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state['primary'] or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state['replica'] is None:
+            # One replica per request, so its reads see one consistent snapshot
+            state['replica'] = pick_replica()
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['primary'] = state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive the schema through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Lets safe requests read from a replica unless the client is pinned to the primary"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        primary = request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+        return {'primary': primary, 'replica': None, 'wrote': False}
+
+    def finish(self, request, response, state):
+        if state['wrote']:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,61 @@
+"""orjson-backed JSON renderer and parser for DRF (settings.FAST_JSON).
+
+Output matches rest_framework's JSONRenderer:
+- compact and UTF-8;
+- UTC datetimes end in ``Z``;
+- non-string dict keys are stringified;
+- U+2028/U+2029 are escaped.
+Anything orjson has no native support for (Decimal, lazy translation
+strings, querysets, ...) goes through DRF's own JSONEncoder.default().
+
+Without orjson installed, and for the cases orjson cannot take (an
+``indent`` media type parameter, integers beyond 64 bits, non-UTF-8
+request bodies), both classes fall back to the stock implementation.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class OrjsonRenderer(JSONRenderer):
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.default, option=_DUMPS_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict JavaScript subset, as JSONRenderer does
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class OrjsonParser(JSONParser):
+    renderer_class = OrjsonRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,152 @@
+"""Non-blocking logging (wired up in settings.LOGGING).
+
+Loggers write to a QueueListenerHandler, which only puts the record on a
+queue; a background listener thread formats it and does the (slow) console
+and file I/O. Files are written as one JSON object per line and rotated by
+size and by time, whichever comes first.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import time
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including ``extra`` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotates at the ``when`` interval or once the file exceeds ``max_bytes``.
+
+    Rotated files are named by the time of rotation. Several server
+    processes may share one file: a process reopens it once another one
+    has rotated it away.
+    """
+
+    def __init__(self, filename, when='midnight', max_bytes=0, backup_count=0, encoding='utf-8', **kwargs):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding=encoding, delay=True, **kwargs)
+        self.max_bytes = max_bytes
+        self.suffix = '%Y-%m-%d_%H-%M-%S'
+        self.extMatch = re.compile(r'^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(\.\d+)?$', re.ASCII)
+        self._inode = None
+
+    def _open(self):
+        stream = super()._open()
+        self._inode = os.fstat(stream.fileno()).st_ino
+        return stream
+
+    def _reopen_if_rotated(self):
+        try:
+            inode = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            inode = None
+        if self.stream is not None and inode != self._inode:
+            self.stream.close()
+            self.stream = None
+
+    def shouldRollover(self, record):
+        self._reopen_if_rotated()
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        name = self.rotation_filename(f'{self.baseFilename}.{time.strftime(self.suffix, time.localtime(now))}')
+        counter = 0
+        target = name
+        while os.path.exists(target):
+            counter += 1
+            target = f'{name}.{counter}'
+        try:
+            self.rotate(self.baseFilename, target)
+        except OSError:
+            # Already rotated by another process (or locked on Windows)
+            pass
+        if self.backupCount > 0:
+            for old in self.getFilesToDelete():
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        rollover_at = self.computeRollover(now)
+        while rollover_at <= now:
+            rollover_at += self.interval
+        self.rolloverAt = rollover_at
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """QueueHandler feeding a QueueListener that runs another logger's handlers.
+
+    ``targets`` names a non-propagating logger in LOGGING whose handlers do
+    the actual output; nothing logs to it, it only keeps them alive (dictConfig
+    drops handlers no logger uses). They are looked up with the first
+    record, after configuration, so handler names need no particular order.
+    The listener thread starts with that record too, so each forked server
+    process runs its own.
+    """
+
+    def __init__(self, targets, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.targets = targets
+        self.listener = None
+
+    def _start(self):
+        handlers = logging.getLogger(self.targets).handlers
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def enqueue(self, record):
+        # Called under the handler lock
+        if self.listener is None:
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on logging; drop the record instead
+            pass
+
+    def prepare(self, record):
+        # Keep exc_info for the JSON formatter; the base class flattens it
+        # into the message and drops it
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def close(self):
+        # logging.shutdown() at exit: drains the queue into the targets
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
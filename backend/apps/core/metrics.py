@@ -0,0 +1,86 @@
+"""Runtime metrics for /api/core/metrics/.
+
+Process counters cover the server process that answers the request (one
+of several under gunicorn); the ``server`` figures come from Postgres and
+cover every process connected as DB_APPLICATION_NAME.
+"""
+import os
+import threading
+import weakref
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_opened_total = 0
+_requests_total = 0
+_lock = threading.Lock()
+# Database wrappers are per thread; weak references let finished threads go
+_wrappers = weakref.WeakSet()
+
+
+@receiver(connection_created)
+def _count_connection(sender, connection, **kwargs):
+    global _opened_total
+    with _lock:
+        _opened_total += 1
+        _wrappers.add(connection)
+
+
+@receiver(request_finished)
+def _count_request(sender, **kwargs):
+    global _requests_total
+    with _lock:
+        _requests_total += 1
+
+
+def _server_connections(alias):
+    """This app's connections in pg_stat_activity, by state"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(state, %s), COUNT(*) FROM pg_stat_activity '
+            'WHERE datname = current_database() AND application_name = %s GROUP BY 1',
+            ['unknown', settings.DATABASES[alias].get('OPTIONS', {}).get('application_name', '')],
+        )
+        states = dict(cursor.fetchall())
+    states['total'] = sum(states.values())
+    return states
+
+
+def database_metrics(alias='default'):
+    config = settings.DATABASES[alias]
+    with _lock:
+        open_now = sum(1 for wrapper in list(_wrappers) if wrapper.alias == alias and wrapper.connection is not None)
+    return {
+        'vendor': connections[alias].vendor,
+        'conn_max_age': config.get('CONN_MAX_AGE', 0),
+        'health_checks': config.get('CONN_HEALTH_CHECKS', False),
+        'process': {
+            'connections_open': open_now,
+            'connections_opened': _opened_total,
+            'requests': _requests_total,
+        },
+        'server': _server_connections(alias),
+    }
+
+
+def collect_metrics():
+    metrics = {
+        'pid': os.getpid(),
+        'threads': threading.active_count(),
+        'database': database_metrics(),
+    }
+    if settings.DATABASE_REPLICAS:
+        from .dbrouter import replica_status
+        metrics['replicas'] = replica_status()
+        for alias, replica in metrics['replicas'].items():
+            try:
+                replica.update(database_metrics(alias))
+            except DatabaseError as exc:
+                replica['error'] = str(exc)
+    return metrics
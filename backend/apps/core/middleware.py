@@ -0,0 +1,90 @@
+import contextvars
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+access_logger = logging.getLogger('eeu_tracker.access')
+
+# Mutable per-request query counter, shared with the threads the request's
+# ORM calls run in (sync_to_async copies the context, not the counter)
+_query_counter = contextvars.ContextVar('request_query_counter', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    # Outermost, so execute_wrapper() contexts still pop their own wrapper
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+def _request_principal(request):
+    """The principal authentication attached to request.user, without loading a session user"""
+    user = request.__dict__.get('user')
+    return getattr(user, '__dict__', {}).get('_principal')
+
+
+class AccessLogMiddleware:
+    """One access log line per request: method, path, status, latency, role, query count.
+
+    Latency is measured until the response is returned; streamed bodies
+    (attachment downloads, exports) are still being sent at that point.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = [0]
+        token = _query_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_counter.reset(token)
+        self.log(request, response, started, counter[0])
+        return response
+
+    async def __acall__(self, request):
+        counter = [0]
+        token = _query_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_counter.reset(token)
+        self.log(request, response, started, counter[0])
+        return response
+
+    def log(self, request, response, started, queries):
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        principal = _request_principal(request)
+        role = principal.role if principal is not None else None
+        access_logger.info(
+            '%s %s %s %sms q=%s %s', request.method, request.path, response.status_code,
+            duration_ms, queries, role or '-',
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': duration_ms,
+                'queries': queries,
+                'role': role,
+                'user_id': principal.user_id if principal is not None else None,
+            },
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_userprofile_add_user_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
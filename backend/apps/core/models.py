@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 
 # User role choices
@@ -40,6 +41,9 @@ class UserProfile(models.Model):
         related_name='users',
         help_text='Required for CxO and CxO Secretary roles'
     )
+    # Bumped when role, department, password or active flag change; access
+    # tokens carrying an older version are rejected
+    version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -90,35 +94,29 @@ class UserProfile(models.Model):
         """Super Admin, CEO Secretary, and CEO can view all documents"""
         return self.role in ['SUPER_ADMIN', 'CEO_SECRETARY', 'CEO']
 
+    @property
+    def principal(self):
+        from .principal import Principal
+        return Principal.from_profile(self)
+
     def can_view_document(self, document):
         """Check if user can view a specific document"""
-        if self.can_view_all_documents:
-            return True
-        # CxO and CxO Secretary can only view documents related to their department
-        if self.department:
-            dept_ids = [self.department.id]
-            return (
-                document.department_id in dept_ids or
-                document.co_offices.filter(id__in=dept_ids).exists() or
-                document.cc_offices.filter(id__in=dept_ids).exists() or
-                document.directed_offices.filter(id__in=dept_ids).exists()
-            )
-        return False
+        return self.principal.can_view_document(document)
 
     def can_edit_document(self, document):
         """Check if user can edit a specific document"""
-        if self.can_edit_all_documents:
-            return True
-        # CxO Secretary can edit documents related to their department
-        if self.role == 'CXO_SECRETARY' and self.department:
-            dept_ids = [self.department.id]
-            return (
-                document.department_id in dept_ids or
-                document.co_offices.filter(id__in=dept_ids).exists() or
-                document.cc_offices.filter(id__in=dept_ids).exists() or
-                document.directed_offices.filter(id__in=dept_ids).exists()
-            )
-        return False
+        return self.principal.can_edit_document(document)
+
+
+class CollectionVersion(models.Model):
+    """Change counter of a collection (documents, payments, ...), bumped after
+    every committed write to it; see apps.core.versions"""
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
 
 
 @receiver(post_save, sender=User)
@@ -135,3 +133,47 @@ def save_user_profile(sender, instance, **kwargs):
     """Ensure profile is saved when User is saved"""
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+@receiver(pre_save, sender=User)
+def bump_version_on_credentials_change(sender, instance, **kwargs):
+    """Invalidate access tokens when a user is deactivated or their password changes"""
+    if instance.pk is None:
+        return
+    old = User.objects.filter(pk=instance.pk).values('is_active', 'password').first()
+    if old is None or (old['is_active'] == instance.is_active and old['password'] == instance.password):
+        return
+    if hasattr(instance, 'profile'):
+        # Saved by save_user_profile right after the user
+        instance.profile.version += 1
+
+
+@receiver(pre_save, sender=UserProfile)
+def bump_version_on_role_change(sender, instance, **kwargs):
+    """Invalidate access tokens when the role or department changes"""
+    if instance.pk is None:
+        return
+    old = UserProfile.objects.filter(pk=instance.pk).values('role', 'department_id', 'version').first()
+    if old is None:
+        return
+    # Never go back to a version an older in-memory copy still holds
+    instance.version = max(instance.version, old['version'])
+    if old['role'] != instance.role or old['department_id'] != instance.department_id:
+        instance.version += 1
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_cached_profile_version(sender, instance, **kwargs):
+    from .principal import forget_profile_version
+    forget_profile_version(instance.user_id)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def bump_departments_version(sender, instance, **kwargs):
+    """Department names appear in most responses; invalidate their validators and cached copies"""
+    from .refcache import departments
+    from .versions import DEPARTMENTS, bump_versions
+    bump_versions(DEPARTMENTS)
+    transaction.on_commit(departments.invalidate)
@@ -1,4 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+from datetime import datetime
+
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -6,3 +14,94 @@ class CustomPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() through the async ORM (count and page in two queries)"""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached property; fill it without a sync query
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        bottom = (number - 1) * page_size
+        rows = [obj async for obj in queryset[bottom:bottom + page_size]]
+        self.page = Page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return rows
+
+
+class KeysetPagination(BasePagination):
+    """Newest-first keyset pagination on (ordering_field, id).
+
+    Each page seeks past the last row of the previous one with
+    ``(field, id) < (last_field, last_id)``, so page N costs the same as page 1
+    and rows inserted meanwhile never shift or repeat entries. Responses are
+    ``{"next": url or null, "results": [...]}``.
+    """
+    ordering_field = 'timestamp'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def encode_cursor(self, obj):
+        raw = f"{getattr(obj, self.ordering_field).isoformat()}|{obj.pk}"
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, token):
+        try:
+            raw = base64.urlsafe_b64decode(token.encode('ascii')).decode('ascii')
+            value, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        field = self.ordering_field
+
+        queryset = queryset.order_by(f'-{field}', '-pk')
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            value, pk = self.decode_cursor(token)
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,268 @@
+"""Request-scoped principal: who the caller is and what they may do.
+
+A Principal snapshots the caller's role and department once per request
+(user + profile + department come from a single select_related query in
+PrincipalJWTAuthentication) and precomputes a capability bitset, so
+permission classes and querysets test bits instead of re-reading the
+profile, instantiating other permission classes or lazily loading the
+department.
+
+Access tokens carry the same snapshot as claims (see auth_jwt.py), so
+ClaimsPrincipalJWTAuthentication can rebuild the principal without touching
+the users table. The only per-request check is the profile version, read
+through a short-lived in-process cache (profile_version below).
+"""
+import threading
+import time
+from enum import IntFlag
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Capability(IntFlag):
+    NONE = 0
+    # Roles
+    SUPER_ADMIN = 1 << 0
+    CEO_SECRETARY = 1 << 1
+    CXO_SECRETARY = 1 << 2
+    CEO = 1 << 3
+    CXO = 1 << 4
+    # Department
+    FINANCE = 1 << 5
+    # Derived permissions
+    MANAGE_USERS = 1 << 8
+    CREATE_DOCUMENTS = 1 << 9
+    EDIT_ALL_DOCUMENTS = 1 << 10
+    VIEW_ALL_DOCUMENTS = 1 << 11
+    MANAGE_REGULATORY_BODIES = 1 << 12
+    PAYMENT_FINANCE = 1 << 13       # CxO of the Finance department
+    VIEW_ALL_PAYMENTS = 1 << 14     # CEO Secretary and CxO Finance
+
+
+ROLE_CAPABILITIES = {
+    'SUPER_ADMIN': Capability.SUPER_ADMIN | Capability.MANAGE_USERS | Capability.CREATE_DOCUMENTS
+                   | Capability.EDIT_ALL_DOCUMENTS | Capability.VIEW_ALL_DOCUMENTS,
+    'CEO_SECRETARY': Capability.CEO_SECRETARY | Capability.CREATE_DOCUMENTS | Capability.EDIT_ALL_DOCUMENTS
+                     | Capability.VIEW_ALL_DOCUMENTS | Capability.MANAGE_REGULATORY_BODIES
+                     | Capability.VIEW_ALL_PAYMENTS,
+    'CXO_SECRETARY': Capability.CXO_SECRETARY | Capability.CREATE_DOCUMENTS,
+    'CEO': Capability.CEO | Capability.VIEW_ALL_DOCUMENTS,
+    'CXO': Capability.CXO,
+}
+
+FINANCE_DEPARTMENT_CODE = 'Finance'
+
+# Access token claims carrying the principal
+ROLE_CLAIM = 'role'
+DEPARTMENT_ID_CLAIM = 'dept_id'
+DEPARTMENT_CODE_CLAIM = 'dept_code'
+PROFILE_VERSION_CLAIM = 'pver'
+
+
+def compute_capabilities(role, department_code):
+    capabilities = ROLE_CAPABILITIES.get(role, Capability.NONE)
+    if department_code == FINANCE_DEPARTMENT_CODE:
+        capabilities |= Capability.FINANCE
+        if role == 'CXO':
+            capabilities |= Capability.PAYMENT_FINANCE | Capability.VIEW_ALL_PAYMENTS
+    return capabilities
+
+
+class Principal:
+    """Role, department and capabilities of the authenticated caller"""
+
+    __slots__ = ('user_id', 'role', 'department_id', 'department_code', 'capabilities', '_department')
+
+    def __init__(self, user_id=None, role=None, department_id=None, department_code=None, department=None):
+        self.user_id = user_id
+        self.role = role
+        self.department_id = department_id
+        self.department_code = department_code
+        self.capabilities = compute_capabilities(role, department_code)
+        self._department = department
+
+    @classmethod
+    def from_claims(cls, token, user_id):
+        """Build from the principal claims of a validated access token"""
+        return cls(
+            user_id=user_id,
+            role=token.get(ROLE_CLAIM),
+            department_id=token.get(DEPARTMENT_ID_CLAIM),
+            department_code=token.get(DEPARTMENT_CODE_CLAIM),
+        )
+
+    @classmethod
+    def from_profile(cls, profile, user_id=None):
+        """Build from a UserProfile (None for users without one: no capabilities)"""
+        if profile is None:
+            return cls(user_id=user_id)
+        department = profile.department if profile.department_id else None
+        return cls(
+            user_id=profile.user_id,
+            role=profile.role,
+            department_id=profile.department_id,
+            department_code=department.code if department else None,
+            department=department,
+        )
+
+    def __repr__(self):
+        return f'<Principal user={self.user_id} role={self.role} department={self.department_code}>'
+
+    @property
+    def department(self):
+        """Department object; taken from the reference cache if the principal was built without it"""
+        if self._department is None and self.department_id:
+            from .refcache import departments
+            self._department = departments.get(self.department_id)
+        return self._department
+
+    def has(self, capability):
+        """True if the caller holds every bit of capability"""
+        return self.capabilities & capability == capability
+
+    def has_any(self, capability):
+        """True if the caller holds at least one bit of capability"""
+        return bool(self.capabilities & capability)
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_super_admin(self):
+        return self.has(Capability.SUPER_ADMIN)
+
+    @property
+    def is_ceo_secretary(self):
+        return self.has(Capability.CEO_SECRETARY)
+
+    @property
+    def is_cxo_secretary(self):
+        return self.has(Capability.CXO_SECRETARY)
+
+    @property
+    def is_ceo(self):
+        return self.has(Capability.CEO)
+
+    @property
+    def is_cxo(self):
+        return self.has(Capability.CXO)
+
+    @property
+    def can_manage_users(self):
+        return self.has(Capability.MANAGE_USERS)
+
+    @property
+    def can_create_documents(self):
+        return self.has(Capability.CREATE_DOCUMENTS)
+
+    @property
+    def can_edit_all_documents(self):
+        return self.has(Capability.EDIT_ALL_DOCUMENTS)
+
+    @property
+    def can_view_all_documents(self):
+        return self.has(Capability.VIEW_ALL_DOCUMENTS)
+
+    def _document_in_department(self, document):
+        dept_ids = [self.department_id]
+        return (
+            document.department_id in dept_ids or
+            document.co_offices.filter(id__in=dept_ids).exists() or
+            document.cc_offices.filter(id__in=dept_ids).exists() or
+            document.directed_offices.filter(id__in=dept_ids).exists()
+        )
+
+    def can_view_document(self, document):
+        """Check if the caller can view a specific document"""
+        if self.can_view_all_documents:
+            return True
+        # CxO and CxO Secretary can only view documents related to their department
+        if self.department_id:
+            return self._document_in_department(document)
+        return False
+
+    def can_edit_document(self, document):
+        """Check if the caller can edit a specific document"""
+        if self.can_edit_all_documents:
+            return True
+        # CxO Secretary can edit documents related to their department
+        if self.is_cxo_secretary and self.department_id:
+            return self._document_in_department(document)
+        return False
+
+
+ANONYMOUS = Principal()
+
+
+def get_principal(user):
+    """Principal of a user, built once and cached on the user object for the request.
+
+    PrincipalJWTAuthentication attaches it at authentication time; other paths
+    (admin sessions, tests using force_authenticate) load the profile and
+    department here with one query.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    principal = getattr(user, '_principal', None)
+    if principal is None:
+        from .models import UserProfile
+        if type(user).profile.is_cached(user):
+            profile = getattr(user, 'profile', None)
+        else:
+            profile = UserProfile.objects.using(DEFAULT_DB_ALIAS).select_related('department').filter(user_id=user.pk).first()
+        principal = Principal.from_profile(profile, user_id=user.pk)
+        user._principal = principal
+    return principal
+
+
+def request_principal(request):
+    return get_principal(getattr(request, 'user', None))
+
+
+def principal_claims(profile):
+    """Access token claims for a UserProfile"""
+    department = profile.department if profile.department_id else None
+    return {
+        ROLE_CLAIM: profile.role,
+        DEPARTMENT_ID_CLAIM: profile.department_id,
+        DEPARTMENT_CODE_CLAIM: department.code if department else None,
+        PROFILE_VERSION_CLAIM: profile.version,
+    }
+
+
+# user_id -> (profile version or None, monotonic expiry)
+_profile_versions = {}
+_profile_versions_lock = threading.Lock()
+
+
+def profile_version(user_id):
+    """Current profile version of an active user, None if inactive or missing.
+
+    Cached per process for PRINCIPAL_VERSION_CACHE_SECONDS, which bounds how
+    long a role change, deactivation or password reset made in another
+    process takes to invalidate outstanding access tokens.
+    """
+    now = time.monotonic()
+    entry = _profile_versions.get(user_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    from .models import UserProfile
+    # Always the primary: a replica's stale version would be cached here and
+    # accept revoked tokens (or reject freshly issued ones) for its lag on top
+    version = (
+        UserProfile.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id, user__is_active=True)
+        .values_list('version', flat=True)
+        .first()
+    )
+    with _profile_versions_lock:
+        _profile_versions[user_id] = (version, now + settings.PRINCIPAL_VERSION_CACHE_SECONDS)
+    return version
+
+
+def forget_profile_version(user_id):
+    """Drop the cached version so the next request re-reads it"""
+    with _profile_versions_lock:
+        _profile_versions.pop(user_id, None)
@@ -0,0 +1,64 @@
+"""Process-local cache of small reference tables (departments, regulatory bodies).
+
+A ReferenceCache holds every row of its table, loaded with one query and
+tagged with the table's CollectionVersion (apps.core.versions). Saves and
+deletes bump the version and, once committed, drop this process's copy.
+Other processes re-read the version at most every
+REFERENCE_CACHE_CHECK_SECONDS, so they notice the change within that time.
+Between checks, a lookup costs no query at all.
+
+Cached rows are shared by every thread of the process: treat them as
+read-only, and save changes through a fresh instance from the database.
+"""
+import time
+
+from django.conf import settings
+
+from .versions import DEPARTMENTS, get_versions
+
+
+class ReferenceCache:
+    def __init__(self, version_key, load):
+        self.version_key = version_key
+        self._load = load
+        # (version, rows, {pk: row}, monotonic time of the next version check)
+        self._snapshot = None
+
+    def _current(self):
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now < snapshot[3]:
+            return snapshot
+        # Version first: rows loaded after it are at least that new
+        version = get_versions(self.version_key)[self.version_key][0]
+        if snapshot is None or snapshot[0] != version:
+            rows = tuple(self._load())
+            snapshot = (version, rows, {row.pk: row for row in rows}, 0)
+        snapshot = snapshot[:3] + (now + settings.REFERENCE_CACHE_CHECK_SECONDS,)
+        self._snapshot = snapshot
+        return snapshot
+
+    def all(self):
+        """Every row, in the loader's order"""
+        return self._current()[1]
+
+    def get(self, pk):
+        """Row by primary key, or None"""
+        return self._current()[2].get(pk)
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+def _load_departments():
+    from .models import Department
+    return Department.objects.order_by('code')
+
+
+departments = ReferenceCache(DEPARTMENTS, _load_departments)
+
+
+def department_by_code(code):
+    """Department with this code (case-insensitive), or None"""
+    code = code.upper()
+    return next((department for department in departments.all() if department.code.upper() == code), None)
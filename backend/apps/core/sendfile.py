@@ -0,0 +1,157 @@
+"""Protected file downloads.
+
+Views check permissions and then call serve_file(). With a front proxy
+configured (FILE_SENDFILE_BACKEND) the response is empty and only tells the
+proxy which file to send, so no application thread is held for the transfer:
+
+- 'nginx': X-Accel-Redirect to FILE_ACCEL_REDIRECT_PREFIX + storage name,
+  served by an ``internal`` location aliased to MEDIA_ROOT;
+- 'sendfile': X-Sendfile with the absolute path (Apache mod_xsendfile,
+  lighttpd).
+
+Without a proxy the file is streamed by Django with ETag/Last-Modified
+validation and single byte-range (206) support. Under ASGI the file is read
+chunk by chunk in worker threads: Django would otherwise read a synchronous
+file iterator completely into memory before sending it.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeReader:
+    """Read at most ``length`` bytes of an open file, from its current position"""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+class _AsyncFileIterator:
+    """Async iteration over a file (or _RangeReader) for ASGI responses"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await sync_to_async(self.f.read, thread_sensitive=False)(self.chunk_size)
+        if not data:
+            raise StopAsyncIteration
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def file_etag(size, mtime):
+    return f'"{size:x}-{int(mtime):x}"'
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _parse_range(request, size, etag):
+    """(start, end) of a satisfiable single range, None to send the whole file,
+    False if unsatisfiable"""
+    header = request.META.get('HTTP_RANGE', '').strip()
+    match = RANGE_RE.match(header)
+    if not match or not size:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range.strip() != etag:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def serve_file(request, field_file, filename=None, as_attachment=False):
+    """Response sending a FileField's file, via the front proxy when configured"""
+    path = field_file.path
+    filename = filename or os.path.basename(field_file.name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse('File not found', status=404, content_type='text/plain')
+
+    etag = file_etag(stat.st_size, stat.st_mtime)
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    backend = settings.FILE_SENDFILE_BACKEND
+    if backend in ('nginx', 'sendfile'):
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx':
+            response['X-Accel-Redirect'] = settings.FILE_ACCEL_REDIRECT_PREFIX + quote(field_file.name)
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    else:
+        byte_range = _parse_range(request, stat.st_size, etag)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        f = open(path, 'rb')
+        if byte_range:
+            start, end = byte_range
+            f.seek(start)
+            response = FileResponse(
+                _RangeReader(f, end - start + 1), status=206, filename=filename, as_attachment=as_attachment
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(f, filename=filename, as_attachment=as_attachment)
+        if isinstance(getattr(request, '_request', request), ASGIRequest):
+            # Headers are already set from the file; only the body iterator changes
+            response.streaming_content = _AsyncFileIterator(response.file_to_stream, response.block_size)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
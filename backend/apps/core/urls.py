@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DepartmentViewSet, UserViewSet, me, change_password
+from .views import DepartmentViewSet, UserViewSet, me, change_password, metrics
 
 router = DefaultRouter()
 router.register('departments', DepartmentViewSet, basename='department')
@@ -10,4 +10,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('me/', me),
     path('change-password/', change_password),
+    path('metrics/', metrics),
 ]
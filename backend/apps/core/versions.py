@@ -0,0 +1,51 @@
+"""Per-collection version counters.
+
+Every committed write to a collection bumps its CollectionVersion row (model
+signals, plus explicit calls after queryset.update()). Readers compare
+counters instead of data: apps.core.conditional turns them into ETags.
+"""
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CollectionVersion
+
+DOCUMENTS = 'documents'
+PAYMENTS = 'payments'
+DEPARTMENTS = 'departments'
+REGULATORY_BODIES = 'regulatory_bodies'
+
+
+def _bump(keys):
+    now = timezone.now()
+    for key in keys:
+        if CollectionVersion.objects.filter(key=key).update(version=F('version') + 1, changed_at=now):
+            continue
+        try:
+            with transaction.atomic():
+                CollectionVersion.objects.create(key=key, version=1, changed_at=now)
+        except IntegrityError:
+            # Created concurrently
+            CollectionVersion.objects.filter(key=key).update(version=F('version') + 1, changed_at=now)
+
+
+def bump_versions(*keys):
+    """Increment the counters once the current transaction commits.
+
+    After the commit, so the counter row is never locked for the length of
+    a write transaction and readers never see a new version with old data.
+    """
+    transaction.on_commit(partial(_bump, keys))
+
+
+def get_versions(*keys):
+    """{key: (version, changed_at)} in one query; (0, None) for untouched collections"""
+    rows = {
+        key: (version, changed_at)
+        for key, version, changed_at in CollectionVersion.objects.filter(key__in=keys).values_list(
+            'key', 'version', 'changed_at'
+        )
+    }
+    return {key: rows.get(key, (0, None)) for key in keys}
@@ -1,11 +1,15 @@
 from rest_framework import viewsets, permissions, decorators, response, status
 from rest_framework.exceptions import PermissionDenied
 from django.contrib.auth.models import User
+from .conditional import ConditionalGetMixin
 from .models import Department, UserProfile
+from .principal import request_principal
+from .refcache import departments
 from .serializers import (
     DepartmentSerializer, UserSerializer, UserCreateSerializer, 
     CurrentUserSerializer, UserProfileSerializer
 )
+from .versions import DEPARTMENTS
 
 
 class IsSuperAdmin(permissions.BasePermission):
@@ -13,13 +17,19 @@ class IsSuperAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        return hasattr(request.user, 'profile') and request.user.profile.is_super_admin
+        return request_principal(request).is_super_admin
 
 
-class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartmentViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Department.objects.all().order_by('code')
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_keys = (DEPARTMENTS,)
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return list(departments.all())
+        return super().get_queryset()
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -125,3 +135,11 @@ def me(request):
             'can_view_all_documents': profile.can_view_all_documents,
         }
     })
+
+
+@decorators.api_view(['GET'])
+@decorators.permission_classes([IsSuperAdmin])
+def metrics(request):
+    """Database connection and process statistics of the serving process"""
+    from .metrics import collect_metrics
+    return response.Response(collect_metrics())
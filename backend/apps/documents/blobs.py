@@ -0,0 +1,170 @@
+"""Content-addressed attachment storage.
+
+Every distinct file content is stored once, as a StoredFile named after its
+SHA-256 (``blobs/ab/cd/abcd...``), and attachments point at it. StoredFile
+keeps a reference count: attaching the same scan to the original letter and
+to every forwarded memo adds references, not copies, and the file is removed
+when the last attachment using it is deleted.
+
+Uploads are hashed while Django streams them to disk
+(HashingTemporaryFileUploadHandler), so a duplicate upload is recognised
+without reading the file again and finishes without writing the bytes.
+"""
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Attachment, StoredFile, touch_documents
+
+BLOB_PREFIX = 'blobs'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """TemporaryFileUploadHandler that also computes the SHA-256 of each file
+    as its chunks arrive; the digest is exposed as ``uploaded_file.sha256``"""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.hasher.hexdigest()
+        return uploaded
+
+
+def blob_name(digest):
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+def file_sha256(f):
+    """SHA-256 of a file object, read in chunks from the start"""
+    hasher = hashlib.sha256()
+    f.seek(0)
+    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+        hasher.update(chunk)
+    f.seek(0)
+    return hasher.hexdigest()
+
+
+def _add_reference(digest):
+    if StoredFile.objects.filter(sha256=digest).update(ref_count=F('ref_count') + 1):
+        return StoredFile.objects.get(sha256=digest)
+    return None
+
+
+def store_file(f, digest=None):
+    """Return the StoredFile for f's content with one more reference.
+
+    Content already stored is not written again; otherwise f is saved under
+    its content-addressed name (a temporary upload is moved, not copied).
+    """
+    digest = digest or getattr(f, 'sha256', None) or file_sha256(f)
+    blob = _add_reference(digest)
+    if blob is not None:
+        return blob
+
+    name = blob_name(digest)
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, f)
+        if saved != name:
+            # A concurrent upload of the same content wrote it first
+            default_storage.delete(saved)
+    try:
+        with transaction.atomic():
+            return StoredFile.objects.create(sha256=digest, file=name, size=default_storage.size(name), ref_count=1)
+    except IntegrityError:
+        return _add_reference(digest)
+
+
+def release_blob(blob_id):
+    """Drop one reference; delete the row and its file when none remain"""
+    StoredFile.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+    orphan = StoredFile.objects.filter(pk=blob_id, ref_count__lte=0).values_list('sha256', 'file', 'thumbnail').first()
+    if orphan is None:
+        return
+    digest, name, thumbnail = orphan
+    StoredFile.objects.filter(pk=blob_id, ref_count__lte=0).delete()
+
+    def delete_file():
+        # Content may have been uploaded again since
+        if not StoredFile.objects.filter(sha256=digest).exists():
+            default_storage.delete(name)
+            if thumbnail:
+                default_storage.delete(thumbnail)
+
+    transaction.on_commit(delete_file)
+
+
+def create_attachment(document, f, user=None):
+    """Attach an uploaded file to a document through the blob store"""
+    blob = store_file(f)
+    return Attachment.objects.create(
+        document=document,
+        file=blob.file.name,
+        blob=blob,
+        original_name=getattr(f, 'name', ''),
+        size=blob.size,
+        uploaded_by=user,
+    )
+
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def dedup_attachments(batch_size=500, dry_run=False):
+    """Move attachments stored before content addressing into the blob store.
+
+    Processes attachments without a blob in pk batches, one transaction per
+    batch; replaced copies are deleted after the batch commits. Returns
+    (attachments processed, duplicate bytes reclaimed).
+    """
+    processed = reclaimed = 0
+    seen = set()
+    last_pk = 0
+    while True:
+        batch = list(
+            Attachment.objects.filter(blob__isnull=True, pk__gt=last_pk).order_by('pk')[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        migrated = []
+        stale_names = []
+        with transaction.atomic():
+            for attachment in batch:
+                old_name = attachment.file.name
+                if not old_name or not default_storage.exists(old_name):
+                    continue
+                with default_storage.open(old_name, 'rb') as f:
+                    digest = file_sha256(f)
+                    duplicate = digest in seen or StoredFile.objects.filter(sha256=digest).exists()
+                    seen.add(digest)
+                    if not dry_run:
+                        blob = store_file(f, digest)
+                processed += 1
+                if duplicate:
+                    reclaimed += attachment.size
+                if dry_run:
+                    continue
+                if old_name != blob.file.name:
+                    stale_names.append(old_name)
+                attachment.blob = blob
+                attachment.file = blob.file.name
+                attachment.size = blob.size
+                migrated.append(attachment)
+            Attachment.objects.bulk_update(migrated, ['blob', 'file', 'size'])
+            if migrated:
+                touch_documents({attachment.document_id for attachment in migrated})
+            transaction.on_commit(lambda names=stale_names: _delete_files(names))
+    return processed, reclaimed
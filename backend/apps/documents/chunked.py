@@ -0,0 +1,185 @@
+"""Chunked, resumable attachment uploads.
+
+Protocol (``/api/documents/uploads/``):
+
+1. ``POST`` with filename, size and optionally the file's SHA-256: creates an
+   upload and a preallocated temp file under CHUNKED_UPLOAD_ROOT, and returns
+   the chunk size to use.
+2. ``PUT uploads/<id>/chunk/?offset=N`` with the raw bytes of one chunk.
+   Offsets are multiples of the chunk size and every chunk except the last is
+   exactly chunk_size long, so chunks can be sent in any order and in
+   parallel: each request writes its own region of the temp file. An
+   ``X-Chunk-SHA256`` header is verified before the chunk is written, so a
+   corrupt retry never overwrites a chunk that was already received; a
+   chunk that failed or was lost is simply sent again.
+3. ``GET uploads/<id>/`` lists missing offsets, for resuming after a dropped
+   connection.
+4. ``POST uploads/<id>/complete/`` with a document id: once every chunk is
+   recorded, the file is hashed, checked against the declared SHA-256 and
+   moved into the content-addressed store (blobs.py) as a new attachment.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .blobs import blob_name, create_attachment, file_sha256
+from .models import Activity, ChunkedUpload, ChunkedUploadPart, StoredFile
+
+READ_SIZE = 64 * 1024
+# Chunks are staged before they are written into place; larger ones spill to disk
+SPOOL_SIZE = 1024 * 1024
+
+
+class UploadError(ValueError):
+    pass
+
+
+class _AssembledFile(File):
+    """Completed temp file, moved (not copied) into storage like a temporary upload"""
+
+    def __init__(self, path, name, sha256):
+        super().__init__(None, name)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def upload_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_ROOT, f'{upload.pk}.part')
+
+
+def start_upload(user, filename, size, sha256=''):
+    """Create an upload and preallocate its temp file"""
+    if size <= 0 or size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise UploadError(f'File size must be between 1 byte and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes')
+    upload = ChunkedUpload.objects.create(
+        filename=filename,
+        size=size,
+        chunk_size=settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        sha256=sha256.lower(),
+        created_by=user,
+    )
+    os.makedirs(settings.CHUNKED_UPLOAD_ROOT, exist_ok=True)
+    with open(upload_path(upload), 'wb') as f:
+        f.truncate(size)
+    return upload
+
+
+def expected_chunk_size(upload, offset):
+    if offset < 0 or offset >= upload.size or offset % upload.chunk_size:
+        raise UploadError(f'Offset must be a multiple of {upload.chunk_size} below {upload.size}')
+    return min(upload.chunk_size, upload.size - offset)
+
+
+def write_chunk(upload, offset, stream, length, sha256=None):
+    """Write one chunk read from stream at offset and record it.
+
+    The chunk is staged and hashed first and only written into the temp
+    file once it is complete and, with sha256 given, matches it; otherwise
+    UploadError is raised and the file is left untouched.
+    """
+    expected = expected_chunk_size(upload, offset)
+    if length != expected:
+        raise UploadError(f'Chunk at offset {offset} must be {expected} bytes, got {length}')
+
+    hasher = hashlib.sha256()
+    remaining = length
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, dir=settings.CHUNKED_UPLOAD_ROOT) as staged:
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                raise UploadError(f'Chunk at offset {offset} ended after {length - remaining} bytes')
+            staged.write(data)
+            hasher.update(data)
+            remaining -= len(data)
+
+        digest = hasher.hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise UploadError(f'Checksum mismatch for chunk at offset {offset}')
+
+        staged.seek(0)
+        with open(upload_path(upload), 'r+b') as f:
+            f.seek(offset)
+            shutil.copyfileobj(staged, f, READ_SIZE)
+
+    try:
+        with transaction.atomic():
+            ChunkedUploadPart.objects.update_or_create(
+                upload=upload, offset=offset, defaults={'size': length, 'sha256': digest}
+            )
+    except IntegrityError:
+        # The same chunk was recorded by a concurrent retry
+        pass
+    return digest
+
+
+def missing_offsets(upload):
+    received = set(upload.parts.values_list('offset', flat=True))
+    return [i * upload.chunk_size for i in range(upload.chunk_count) if i * upload.chunk_size not in received]
+
+
+def _remove_temp_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def complete_upload(upload_id, document, user=None):
+    """Turn a fully received upload into an attachment of document"""
+    path = new_blob = None
+    try:
+        with transaction.atomic():
+            upload = ChunkedUpload.objects.select_for_update().get(pk=upload_id)
+            missing = missing_offsets(upload)
+            if missing:
+                raise UploadError(f'{len(missing)} chunk(s) missing, first at offset {missing[0]}')
+
+            path = upload_path(upload)
+            with open(path, 'rb') as f:
+                digest = file_sha256(f)
+            if upload.sha256 and upload.sha256 != digest:
+                raise UploadError('Checksum mismatch for the assembled file')
+
+            if not default_storage.exists(blob_name(digest)):
+                new_blob = blob_name(digest)
+            attachment = create_attachment(document, _AssembledFile(path, upload.filename, digest), user)
+            Activity.objects.create(document=document, actor=user, action='attachment_added', notes='1 file(s) added')
+            upload.delete()
+            # Content that was already stored leaves the temp file behind
+            transaction.on_commit(lambda: _remove_temp_file(path))
+    except Exception:
+        # The rollback dropped the StoredFile row; remove the file written for it
+        if new_blob and not StoredFile.objects.filter(sha256=digest).exists():
+            default_storage.delete(new_blob)
+        if path and not os.path.exists(path):
+            # The temp file was moved into storage, so the upload cannot complete again
+            ChunkedUpload.objects.filter(pk=upload_id).delete()
+        raise
+    return attachment
+
+
+def abort_upload(upload):
+    path = upload_path(upload)
+    upload.delete()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def purge_stale_uploads(max_age_hours=None):
+    """Delete uploads older than max_age_hours (CHUNKED_UPLOAD_EXPIRY_HOURS) and their temp files"""
+    hours = settings.CHUNKED_UPLOAD_EXPIRY_HOURS if max_age_hours is None else max_age_hours
+    cutoff = timezone.now() - timedelta(hours=hours)
+    purged = 0
+    for upload in ChunkedUpload.objects.filter(created_at__lt=cutoff).iterator():
+        abort_upload(upload)
+        purged += 1
+    return purged
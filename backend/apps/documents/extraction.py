@@ -0,0 +1,229 @@
+"""Attachment text extraction for document search.
+
+extract_pending_texts() picks up stored files that have no AttachmentText
+yet, so every run only touches content added since the previous one. Files
+are read in a process pool (pdf parsing and OCR are CPU-bound) and the text
+is written back in batches, zlib-compressed, with a ``simple`` tsvector that
+the documents list search matches against.
+
+- text-based PDFs: pypdfium2 text layer;
+- plain text files: decoded as UTF-8 (falling back to Latin-1);
+- scanned PDFs and images: OCR through pytesseract when enabled
+  (ATTACHMENT_OCR_ENABLED) and a local tesseract binary is installed.
+
+The worker-side functions (extract_text and helpers) do not touch Django so
+they run in spawned processes on Windows too.
+"""
+import logging
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PDF_SIGNATURE = b'%PDF'
+IMAGE_SIGNATURES = (b'\x89PNG', b'\xff\xd8\xff', b'II*\x00', b'MM\x00*', b'BM', b'GIF8')
+SNIFF_SIZE = 8192
+
+
+def _is_plain_text(head):
+    if not head or b'\x00' in head:
+        return False
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is fine
+        if e.start < len(head) - 3:
+            return False
+    return True
+
+
+def _read_plain(path, max_chars):
+    with open(path, 'rb') as f:
+        data = f.read(max_chars * 4)
+    try:
+        return data.decode('utf-8', errors='strict')[:max_chars]
+    except UnicodeDecodeError as e:
+        # The read limit may cut a multi-byte character at the end: drop it
+        if e.start >= len(data) - 3:
+            try:
+                return data[:e.start].decode('utf-8', errors='strict')[:max_chars]
+            except UnicodeDecodeError:
+                pass
+        return data.decode('latin-1')[:max_chars]
+
+
+def _ocr_available():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def _ocr_image(image, languages):
+    import pytesseract
+    return pytesseract.image_to_string(image, lang=languages)
+
+
+def _read_pdf(path, max_chars, ocr, ocr_languages, ocr_max_pages):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        parts = []
+        length = 0
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            parts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+            length += len(parts[-1])
+            if length >= max_chars:
+                break
+        text = '\n'.join(parts).strip()
+        if text or not ocr:
+            return 'pdf', text[:max_chars]
+
+        # No text layer: a scan
+        parts = []
+        for index in range(min(len(pdf), ocr_max_pages)):
+            page = pdf[index]
+            parts.append(_ocr_image(page.render(scale=2).to_pil(), ocr_languages))
+            page.close()
+        return 'ocr', '\n'.join(parts).strip()[:max_chars]
+    finally:
+        pdf.close()
+
+
+def extract_text(path, max_chars, ocr=False, ocr_languages='eng', ocr_max_pages=20):
+    """(method, text) of one file; runs in a worker process"""
+    method, text = _extract_text(path, max_chars, ocr, ocr_languages, ocr_max_pages)
+    # PDF text layers and Latin-1 decoded files can hold NULs, which Postgres text rejects
+    return method, text.replace('\x00', '')
+
+
+def _extract_text(path, max_chars, ocr, ocr_languages, ocr_max_pages):
+    with open(path, 'rb') as f:
+        head = f.read(SNIFF_SIZE)
+    ocr = ocr and _ocr_available()
+    try:
+        if head.startswith(PDF_SIGNATURE):
+            return _read_pdf(path, max_chars, ocr, ocr_languages, ocr_max_pages)
+        if head.startswith(IMAGE_SIGNATURES):
+            if not ocr:
+                return 'none', ''
+            from PIL import Image
+            with Image.open(path) as image:
+                return 'ocr', _ocr_image(image, ocr_languages).strip()[:max_chars]
+        if _is_plain_text(head):
+            return 'plain', _read_plain(path, max_chars).strip()
+    except ImportError:
+        return 'none', ''
+    return 'none', ''
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def decompress_text(data):
+    return zlib.decompress(bytes(data)).decode('utf-8') if data else ''
+
+
+def _save_batch(results):
+    from django.contrib.postgres.search import SearchVector
+    from django.db import transaction
+    from django.db.models import TextField, Value
+    from django.conf import settings
+    from .models import AttachmentText
+
+    with transaction.atomic():
+        AttachmentText.objects.bulk_create(
+            [
+                AttachmentText(blob_id=blob_id, method=method, char_count=len(text), content=compress_text(text))
+                for blob_id, method, text in results
+            ],
+            ignore_conflicts=True,
+        )
+        for blob_id, method, text in results:
+            if text:
+                indexed = Value(text[:settings.ATTACHMENT_TEXT_INDEX_CHARS], output_field=TextField())
+                AttachmentText.objects.filter(blob_id=blob_id).update(
+                    search_vector=SearchVector(indexed, config='simple')
+                )
+
+
+def _save_results(results):
+    """Save a batch of (blob_id, method, text); return the saved methods.
+
+    If the batch fails, each file is saved on its own and the ones that
+    still fail are recorded as 'failed', so one file cannot block the rest.
+    """
+    from django.db import DatabaseError
+
+    try:
+        _save_batch(results)
+        return [method for _, method, _ in results]
+    except DatabaseError:
+        pass
+    methods = []
+    for blob_id, method, text in results:
+        try:
+            _save_batch([(blob_id, method, text)])
+        except DatabaseError:
+            logger.exception('Could not save extracted text of stored file %s', blob_id)
+            _save_batch([(blob_id, 'failed', '')])
+            method = 'failed'
+        methods.append(method)
+    return methods
+
+
+def extract_pending_texts(workers=None, batch_size=100, ocr=None):
+    """Extract text of every stored file without an AttachmentText row.
+
+    Returns {method: count}. Failures are recorded as method 'failed' so
+    they are not retried on every run (delete the row to retry).
+    """
+    from django.conf import settings
+    from django.core.files.storage import default_storage
+    from django.db import connections
+    from .models import StoredFile
+
+    workers = workers or settings.ATTACHMENT_TEXT_WORKERS
+    ocr = settings.ATTACHMENT_OCR_ENABLED if ocr is None else ocr
+    options = {
+        'max_chars': settings.ATTACHMENT_TEXT_MAX_CHARS,
+        'ocr': ocr,
+        'ocr_languages': settings.ATTACHMENT_OCR_LANGUAGES,
+        'ocr_max_pages': settings.ATTACHMENT_OCR_MAX_PAGES,
+    }
+    counts = {}
+    last_pk = 0
+    # Forked workers must not inherit open database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(
+                StoredFile.objects.filter(text__isnull=True, pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'file')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            futures = [
+                (pk, pool.submit(extract_text, default_storage.path(name), **options))
+                for pk, name in batch
+            ]
+            results = []
+            for pk, future in futures:
+                try:
+                    method, text = future.result()
+                except Exception:
+                    method, text = 'failed', ''
+                results.append((pk, method, text))
+            for method in _save_results(results):
+                counts[method] = counts.get(method, 0) + 1
+    return counts
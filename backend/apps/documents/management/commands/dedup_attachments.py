@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from apps.documents.blobs import dedup_attachments
+from apps.documents.models import Attachment, StoredFile
+
+
+class Command(BaseCommand):
+    help = 'Move existing attachment files into the content-addressed store, keeping one copy per content'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Attachments hashed and updated per transaction (default 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only hash files and report how much space deduplication would reclaim',
+        )
+
+    def handle(self, *args, **options):
+        pending = Attachment.objects.filter(blob__isnull=True).count()
+        self.stdout.write(f'Deduplicating {pending} attachments...')
+        processed, reclaimed = dedup_attachments(batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        verb = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} attachments; {verb} {reclaimed / (1024 * 1024):.1f} MB of duplicate copies; '
+            f'{StoredFile.objects.count()} distinct files stored'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.documents.extraction import extract_pending_texts
+
+
+class Command(BaseCommand):
+    help = 'Extract searchable text from attachments added since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Extraction processes (default ATTACHMENT_TEXT_WORKERS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Files extracted per database write (default 100)',
+        )
+        parser.add_argument(
+            '--ocr',
+            action='store_true',
+            default=None,
+            help='OCR scanned PDFs and images even if ATTACHMENT_OCR_ENABLED is off (needs tesseract)',
+        )
+
+    def handle(self, *args, **options):
+        counts = extract_pending_texts(
+            workers=options['workers'], batch_size=options['batch_size'], ocr=options['ocr']
+        )
+        summary = ', '.join(f'{count} {method}' for method, count in sorted(counts.items())) or 'nothing new'
+        self.stdout.write(self.style.SUCCESS(f'Extracted attachment text: {summary}'))
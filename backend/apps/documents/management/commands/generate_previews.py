@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.documents.previews import generate_pending_previews
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and page counts for stored attachment files that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Files rendered in parallel (default 2)',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry files whose previous rendering failed',
+        )
+
+    def handle(self, *args, **options):
+        counts = generate_pending_previews(workers=options['workers'], retry_failed=options['retry_failed'])
+        summary = ', '.join(f'{count} {status.lower()}' for status, count in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Previews: {summary}'))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.documents.chunked import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked uploads that were never completed, with their temp files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=settings.CHUNKED_UPLOAD_EXPIRY_HOURS,
+            help=f'Age after which an unfinished upload is deleted (default {settings.CHUNKED_UPLOAD_EXPIRY_HOURS})',
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {purged} stale uploads'))
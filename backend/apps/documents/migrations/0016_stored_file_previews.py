@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0015_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='storedfile',
+            name='preview_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('UNSUPPORTED', 'Unsupported'), ('FAILED', 'Failed')], db_index=True, default='PENDING', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='storedfile',
+            name='thumbnail',
+            field=models.FileField(blank=True, max_length=255, upload_to=''),
+        ),
+    ]
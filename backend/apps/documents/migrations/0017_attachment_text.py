@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-19 00:01
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0016_stored_file_previews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentText',
+            fields=[
+                ('blob', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text', serialize=False, to='documents.storedfile')),
+                ('method', models.CharField(max_length=10)),
+                ('content', models.BinaryField()),
+                ('char_count', models.PositiveIntegerField(default=0)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('extracted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='attachment_text_search_idx')],
+            },
+        ),
+    ]
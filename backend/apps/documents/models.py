@@ -1,5 +1,13 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from apps.core.models import Department
 
 # Module-level constants for choices
@@ -91,6 +99,8 @@ class Document(models.Model):
     cc_external_names = models.TextField(blank=True)
     requires_ceo_direction = models.BooleanField(default=False)
     created_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='created_documents')
+    # Also touched when attachments, activities, acknowledgments or receipts change
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-registered_at']
@@ -117,15 +127,89 @@ class RegulatoryBody(models.Model):
         return self.name_am if language == 'am' else self.name_en
 
 
+PREVIEW_STATUSES = [
+    ('PENDING', 'Pending'),
+    ('READY', 'Ready'),
+    ('UNSUPPORTED', 'Unsupported'),
+    ('FAILED', 'Failed'),
+]
+
+
+class StoredFile(models.Model):
+    """Attachment content stored once under its SHA-256 (see blobs.py)"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # First-page thumbnail and page count, filled in by previews.py
+    preview_status = models.CharField(max_length=12, choices=PREVIEW_STATUSES, default='PENDING', db_index=True)
+    thumbnail = models.FileField(max_length=255, blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
 class Attachment(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='attachments/%Y/%m/%d/')
+    # Same storage name as blob.file once stored content-addressed
+    file = models.FileField(upload_to='attachments/%Y/%m/%d/', max_length=255)
+    blob = models.ForeignKey(StoredFile, null=True, blank=True, on_delete=models.PROTECT, related_name='attachments')
     original_name = models.CharField(max_length=255)
     size = models.BigIntegerField()
     uploaded_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
 
+class AttachmentText(models.Model):
+    """Text extracted from stored attachment content (see extraction.py)"""
+    blob = models.OneToOneField(StoredFile, on_delete=models.CASCADE, primary_key=True, related_name='text')
+    # 'pdf', 'plain', 'ocr', 'none' (nothing extractable) or 'failed'
+    method = models.CharField(max_length=10)
+    # zlib-compressed UTF-8
+    content = models.BinaryField()
+    char_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True)
+    extracted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='attachment_text_search_idx'),
+        ]
+
+    @property
+    def text(self):
+        from .extraction import decompress_text
+        return decompress_text(self.content)
+
+
+class ChunkedUpload(models.Model):
+    """Resumable upload assembled from fixed-size chunks (see chunked.py)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # Optional SHA-256 of the whole file, verified on completion
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+
+class ChunkedUploadPart(models.Model):
+    upload = models.ForeignKey(ChunkedUpload, on_delete=models.CASCADE, related_name='parts')
+    offset = models.BigIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('upload', 'offset')
+
+
 class Activity(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='activities')
     actor = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
@@ -188,3 +272,67 @@ class DepartmentPerformanceSnapshot(models.Model):
     
     def __str__(self):
         return f"{self.department.code} - {self.month.strftime('%B %Y')} - {self.metric_type}"
+
+
+@receiver(post_delete, sender=Attachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    """Drop the attachment's reference to its stored content"""
+    if instance.blob_id:
+        from .blobs import release_blob
+        release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=StoredFile)
+def schedule_stored_file_preview(sender, instance, created, **kwargs):
+    """Queue thumbnail generation for new content once it is committed"""
+    if created:
+        from .previews import schedule_preview
+        transaction.on_commit(lambda: schedule_preview(instance.pk))
+
+
+def touch_documents(document_ids):
+    """Mark documents changed after edits to their related rows (conditional GET validators)"""
+    from apps.core.versions import DOCUMENTS, bump_versions
+    Document.objects.filter(pk__in=document_ids).update(updated_at=timezone.now())
+    bump_versions(DOCUMENTS)
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def bump_documents_version(sender, instance, **kwargs):
+    from apps.core.versions import DOCUMENTS, bump_versions
+    bump_versions(DOCUMENTS)
+
+
+@receiver(m2m_changed, sender=Document.co_offices.through)
+@receiver(m2m_changed, sender=Document.cc_offices.through)
+@receiver(m2m_changed, sender=Document.directed_offices.through)
+def touch_document_offices(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        touch_documents([instance.pk])
+    elif pk_set:
+        touch_documents(pk_set)
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+@receiver(post_save, sender=DocumentAcknowledgment)
+@receiver(post_delete, sender=DocumentAcknowledgment)
+@receiver(post_save, sender=DocumentReceipt)
+@receiver(post_delete, sender=DocumentReceipt)
+def touch_parent_document(sender, instance, **kwargs):
+    """Detail responses embed these rows"""
+    touch_documents([instance.document_id])
+
+
+@receiver(post_save, sender=RegulatoryBody)
+@receiver(post_delete, sender=RegulatoryBody)
+def bump_regulatory_bodies_version(sender, instance, **kwargs):
+    from apps.core.versions import REGULATORY_BODIES, bump_versions
+    from .refcache import regulatory_bodies
+    bump_versions(REGULATORY_BODIES)
+    transaction.on_commit(regulatory_bodies.invalidate)
@@ -0,0 +1,165 @@
+"""Attachment thumbnails and page counts.
+
+Previews are made per StoredFile, so content attached to several documents
+is rendered once. New blobs are queued on commit to a small in-process
+thread pool (ATTACHMENT_PREVIEW_WORKERS, 0 disables it); the
+generate_previews command renders anything still pending, e.g. after
+dedup_attachments or on servers running without the pool.
+
+The JPEG thumbnail is stored next to the original as ``<blob name>.thumb.jpg``.
+Images need Pillow and PDFs additionally pypdfium2; without them blobs stay
+PENDING for a later generate_previews run. Other file types are marked
+UNSUPPORTED and the UI shows a plain link.
+"""
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from .models import Attachment, StoredFile, touch_documents
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SUFFIX = '.thumb.jpg'
+# Leading bytes identifying the formats we can render
+IMAGE_SIGNATURES = (b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'II*\x00', b'MM\x00*', b'BM')
+PDF_SIGNATURE = b'%PDF'
+
+_executor = None
+_executor_lock = threading.Lock()
+# PDFium is not thread-safe
+_pdfium_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ATTACHMENT_PREVIEW_WORKERS, thread_name_prefix='attachment-preview'
+            )
+        return _executor
+
+
+def schedule_preview(blob_id):
+    """Render a blob's preview in the background pool (no-op when disabled)"""
+    if settings.ATTACHMENT_PREVIEW_WORKERS > 0:
+        _get_executor().submit(_run_in_thread, blob_id)
+
+
+def _run_in_thread(blob_id):
+    try:
+        generate_preview(blob_id)
+    except Exception:
+        logger.exception('Preview generation failed for stored file %s', blob_id)
+    finally:
+        # Worker threads hold their own database connections
+        connection.close()
+
+
+def _thumbnail_jpeg(image):
+    from PIL import Image
+
+    image.thumbnail((settings.ATTACHMENT_THUMBNAIL_SIZE, settings.ATTACHMENT_THUMBNAIL_SIZE))
+    if image.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=80, optimize=True)
+    return out.getvalue()
+
+
+def _render_image(path):
+    from PIL import Image
+
+    with Image.open(path) as image:
+        page_count = getattr(image, 'n_frames', 1)
+        image.seek(0)
+        return _thumbnail_jpeg(image.copy()), page_count
+
+
+def _render_pdf(path):
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(path)
+        try:
+            page_count = len(pdf)
+            page = pdf[0]
+            # Render close to the thumbnail size instead of at full resolution
+            scale = settings.ATTACHMENT_THUMBNAIL_SIZE / max(page.get_size())
+            image = page.render(scale=max(scale, 0.1)).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+    return _thumbnail_jpeg(image), page_count
+
+
+def _renderer(head):
+    if head.startswith(PDF_SIGNATURE):
+        return _render_pdf
+    if head.startswith(IMAGE_SIGNATURES) or (head[:4] == b'RIFF' and head[8:12] == b'WEBP'):
+        return _render_image
+    return None
+
+
+def generate_preview(blob_id):
+    """Render and store the thumbnail and page count of one StoredFile"""
+    blob = StoredFile.objects.filter(pk=blob_id).first()
+    if blob is None:
+        return None
+    path = blob.file.path
+    with open(path, 'rb') as f:
+        head = f.read(16)
+
+    renderer = _renderer(head)
+    status = 'UNSUPPORTED'
+    thumbnail_name = ''
+    page_count = None
+    if renderer is not None:
+        try:
+            jpeg, page_count = renderer(path)
+        except ImportError:
+            logger.warning('Preview libraries missing (Pillow/pypdfium2); skipping stored file %s', blob_id)
+            return 'PENDING'
+        except Exception:
+            logger.exception('Could not render preview for stored file %s', blob_id)
+            status = 'FAILED'
+        else:
+            thumbnail_name = blob.file.name + THUMBNAIL_SUFFIX
+            if default_storage.exists(thumbnail_name):
+                default_storage.delete(thumbnail_name)
+            thumbnail_name = default_storage.save(thumbnail_name, ContentFile(jpeg))
+            status = 'READY'
+
+    StoredFile.objects.filter(pk=blob_id).update(
+        preview_status=status, thumbnail=thumbnail_name, page_count=page_count
+    )
+    # Attachment entries in document details show the preview
+    touch_documents(Attachment.objects.filter(blob_id=blob_id).values('document_id'))
+    return status
+
+
+def generate_pending_previews(workers=2, retry_failed=False):
+    """Render every pending (and optionally failed) blob; returns {status: count}"""
+    statuses = ['PENDING', 'FAILED'] if retry_failed else ['PENDING']
+    blob_ids = list(StoredFile.objects.filter(preview_status__in=statuses).values_list('pk', flat=True))
+    counts = {}
+
+    def work(blob_id):
+        try:
+            return generate_preview(blob_id)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for status in pool.map(work, blob_ids):
+            if status:
+                counts[status] = counts.get(status, 0) + 1
+    return counts
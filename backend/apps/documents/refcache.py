@@ -0,0 +1,17 @@
+"""Regulatory bodies from the process-local reference cache (see apps.core.refcache)"""
+from apps.core.refcache import ReferenceCache
+from apps.core.versions import REGULATORY_BODIES
+
+
+def _load_regulatory_bodies():
+    from .models import RegulatoryBody
+    return RegulatoryBody.objects.order_by('name_en')
+
+
+regulatory_bodies = ReferenceCache(REGULATORY_BODIES, _load_regulatory_bodies)
+
+
+def regulatory_body_name(pk, language='en'):
+    """Localized name of a regulatory body, or None"""
+    body = regulatory_bodies.get(pk) if pk else None
+    return body.get_localized_name(language) if body else None
@@ -1,14 +1,44 @@
 from rest_framework import serializers
 from django.conf import settings
 from django.db import transaction
-from .models import Document, Attachment, Activity, DocumentAcknowledgment, DocumentReceipt, RegulatoryBody
+from .blobs import create_attachment
+from .models import ChunkedUpload, Document, Attachment, Activity, DocumentAcknowledgment, DocumentReceipt, RegulatoryBody
+from .refcache import regulatory_body_name
 from apps.core.models import Department
+from apps.core.principal import request_principal
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+    preview_status = serializers.CharField(source='blob.preview_status', read_only=True, default=None)
+    page_count = serializers.IntegerField(source='blob.page_count', read_only=True, default=None)
+
     class Meta:
         model = Attachment
-        fields = ['id', 'file', 'original_name', 'size', 'uploaded_by', 'uploaded_at']
+        fields = ['id', 'file', 'download_url', 'preview_url', 'preview_status', 'page_count', 'original_name', 'size', 'uploaded_by', 'uploaded_at']
+
+    def get_download_url(self, obj):
+        return f'/api/documents/attachments/{obj.id}/download/'
+
+    def get_preview_url(self, obj):
+        if obj.blob_id and obj.blob.preview_status == 'READY':
+            return f'/api/documents/attachments/{obj.id}/preview/'
+        return None
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+    missing_offsets = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'filename', 'size', 'sha256', 'chunk_size', 'chunk_count', 'missing_offsets', 'created_at']
+        read_only_fields = ['id', 'chunk_size', 'chunk_count', 'missing_offsets', 'created_at']
+
+    def get_missing_offsets(self, obj):
+        from .chunked import missing_offsets
+        return missing_offsets(obj)
 
 
 class ActivitySerializer(serializers.ModelSerializer):
@@ -150,10 +180,9 @@ class DocumentListSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return obj.doc_type
 
-        user = request.user
-        profile = getattr(user, 'profile', None)
-        role = getattr(profile, 'role', None)
-        dept_id = getattr(profile, 'department_id', None)
+        principal = request_principal(request)
+        role = principal.role
+        dept_id = principal.department_id
 
         scenario = self._get_scenario(obj)
 
@@ -211,11 +240,11 @@ class DocumentListSerializer(serializers.ModelSerializer):
 
     def get_regulatory_body_name(self, obj):
         """Return localized regulatory body name"""
-        if obj.regulatory_body:
+        if obj.regulatory_body_id:
             # Get language from request context if available
             request = self.context.get('request')
             language = 'am' if request and request.META.get('HTTP_ACCEPT_LANGUAGE', '').startswith('am') else 'en'
-            return obj.regulatory_body.get_localized_name(language)
+            return regulatory_body_name(obj.regulatory_body_id, language)
         return None
 
 
@@ -377,12 +406,12 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
         scenario = self._get_scenario(obj)
         if not self._needs_acknowledgment(scenario):
             return False
-        user = request.user
-        if not hasattr(user, 'profile') or not user.profile.department:
+        principal = request_principal(request)
+        if not principal.department_id:
             return False
-        if user.profile.role != 'CXO_SECRETARY':
+        if principal.role != 'CXO_SECRETARY':
             return False
-        user_dept_id = user.profile.department_id
+        user_dept_id = principal.department_id
         acknowledgment_offices = self._get_acknowledgment_offices(obj, scenario)
         is_cc_office = acknowledgment_offices.filter(id=user_dept_id).exists()
         already_acknowledged = obj.acknowledgments.filter(department_id=user_dept_id).exists()
@@ -398,45 +427,42 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
         # be RECEIVED after another office receives).
         if obj.status not in ['DISPATCHED', 'REGISTERED', 'RECEIVED']:
             return False
-        user = request.user
-        if not hasattr(user, 'profile'):
-            return False
-        profile = user.profile
+        principal = request_principal(request)
         scenario = self._get_scenario(obj)
         if not self._needs_receipt(scenario):
             return False
         # Scenario 15: CEO office and directed CxO offices can receive
         if scenario == 15:
-            if profile.role in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+            if principal.role in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                 already_received = obj.receipts.filter(received_by__profile__role='CEO_SECRETARY').exists()
                 return not already_received
-            if profile.role != 'CXO_SECRETARY' or not profile.department:
+            if principal.role != 'CXO_SECRETARY' or not principal.department_id:
                 return False
-            user_dept_id = profile.department_id
+            user_dept_id = principal.department_id
             is_directed = obj.directed_offices.filter(id=user_dept_id).exists()
             already_received = obj.receipts.filter(department_id=user_dept_id).exists()
             return is_directed and not already_received
         # Scenarios where CEO Secretary receives
         if self._receipt_by_ceo_secretary(scenario, obj):
-            if profile.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+            if principal.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                 return False
             # Check not already received by CEO secretary
             already_received = obj.receipts.filter(received_by__profile__role='CEO_SECRETARY').exists()
             return not already_received
         # Scenario 7: self-receive by destination CxO secretary
         if scenario == 7:
-            if profile.role != 'CXO_SECRETARY':
+            if principal.role != 'CXO_SECRETARY':
                 return False
-            if not profile.department or profile.department_id != obj.department_id:
+            if not principal.department_id or principal.department_id != obj.department_id:
                 return False
-            already_received = obj.receipts.filter(department_id=profile.department_id).exists()
+            already_received = obj.receipts.filter(department_id=principal.department_id).exists()
             return not already_received
         # Scenarios where CxO Secretary receives (directed offices)
-        if profile.role != 'CXO_SECRETARY':
+        if principal.role != 'CXO_SECRETARY':
             return False
-        if not profile.department:
+        if not principal.department_id:
             return False
-        user_dept_id = profile.department_id
+        user_dept_id = principal.department_id
         is_directed = obj.directed_offices.filter(id=user_dept_id).exists()
         already_received = obj.receipts.filter(department_id=user_dept_id).exists()
         return is_directed and not already_received
@@ -472,11 +498,11 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
 
     def get_regulatory_body_name(self, obj):
         """Return localized regulatory body name"""
-        if obj.regulatory_body:
+        if obj.regulatory_body_id:
             # Get language from request context if available
             request = self.context.get('request')
             language = 'am' if request and request.META.get('HTTP_ACCEPT_LANGUAGE', '').startswith('am') else 'en'
-            return obj.regulatory_body.get_localized_name(language)
+            return regulatory_body_name(obj.regulatory_body_id, language)
         return None
 
 
@@ -545,13 +571,7 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
                 document.directed_offices.set(directed_offices)
 
         for f in files:
-            Attachment.objects.create(
-                document=document,
-                file=f,
-                original_name=getattr(f, 'name', ''),
-                size=getattr(f, 'size', 0),
-                uploaded_by=request.user if request.user.is_authenticated else None
-            )
+            create_attachment(document, f, request.user if request.user.is_authenticated else None)
         Activity.objects.create(document=document, actor=request.user if request.user.is_authenticated else None, action='created', notes='Document registered')
         return document
 
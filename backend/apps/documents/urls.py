@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentViewSet
+from .views import AttachmentViewSet, ChunkedUploadViewSet, DocumentViewSet
 from .views_regulatory import RegulatoryBodyViewSet
 
 router = DefaultRouter()
 router.register('documents', DocumentViewSet, basename='document')
 router.register('regulatory-bodies', RegulatoryBodyViewSet, basename='regulatory-body')
+router.register('attachments', AttachmentViewSet, basename='attachment')
+router.register('uploads', ChunkedUploadViewSet, basename='upload')
 
-urlpatterns = [
+urlpatterns = []
+if settings.ASYNC_READ_VIEWS:
+    from .views_async import urlpatterns as async_urlpatterns
+    urlpatterns += async_urlpatterns
+urlpatterns += [
     path('', include(router.urls)),
 ]
@@ -1,14 +1,24 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
-from django.db.models import Q
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Prefetch, Q, prefetch_related_objects
 from django.http import HttpResponse
+from django.utils import timezone
 import csv
-from .models import Document, Attachment, Activity, DocumentAcknowledgment, DocumentReceipt
-from .serializers import DocumentListSerializer, DocumentDetailSerializer, DocumentCreateSerializer, DocumentUpdateSerializer, AttachmentSerializer
+from .blobs import create_attachment
+from .chunked import UploadError, abort_upload, complete_upload, start_upload, write_chunk
+from .models import ChunkedUpload, Document, Attachment, Activity, DocumentAcknowledgment, DocumentReceipt
+from .refcache import regulatory_body_name
+from .serializers import DocumentListSerializer, DocumentDetailSerializer, DocumentCreateSerializer, DocumentUpdateSerializer, AttachmentSerializer, ChunkedUploadSerializer
 from .views_performance import PerformanceTrackingMixin
-from apps.core.models import UserProfile, Department
+from apps.core.refcache import department_by_code, departments
+from apps.core.conditional import ConditionalGetMixin, conditional_response, response_validators
+from apps.core.principal import request_principal
+from apps.core.sendfile import serve_file
+from apps.core.versions import DEPARTMENTS, DOCUMENTS, REGULATORY_BODIES
+from apps.core.xlsx import XlsxColumn, build_xlsx_response
 
 
 class CanCreateDocument(permissions.BasePermission):
@@ -18,36 +28,31 @@ class CanCreateDocument(permissions.BasePermission):
             return True
         if not request.user.is_authenticated:
             return False
-        if not hasattr(request.user, 'profile'):
-            UserProfile.objects.create(user=request.user)
         # Only apply create restriction to the 'create' action
         if view.action == 'create':
-            return request.user.profile.can_create_documents
+            return request_principal(request).can_create_documents
         # Allow other actions (update_status, attachments, etc.) - they have their own checks
         return True
 
 
-class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
+class DocumentViewSet(ConditionalGetMixin, PerformanceTrackingMixin, viewsets.ModelViewSet):
     queryset = Document.objects.all().select_related('department', 'assigned_to', 'created_by')
     permission_classes = [permissions.IsAuthenticated, CanCreateDocument]
+    # Responses also show department and regulatory body names
+    version_keys = (DOCUMENTS, DEPARTMENTS, REGULATORY_BODIES)
+    detail_version_keys = (DEPARTMENTS, REGULATORY_BODIES)
 
     def get_queryset(self):
         qs = super().get_queryset()
-        user = self.request.user
-        
-        # Ensure profile exists
-        if not hasattr(user, 'profile'):
-            UserProfile.objects.create(user=user)
-        
-        profile = user.profile
+        principal = request_principal(self.request)
         
         # Filter based on role
-        if profile.can_view_all_documents:
+        if principal.can_view_all_documents:
             # Super Admin, CEO Secretary, CEO can see all
             pass
-        elif profile.department:
+        elif principal.department_id:
             # CxO and CxO Secretary can only see documents related to their department
-            dept_id = profile.department_id
+            dept_id = principal.department_id
             qs = qs.filter(
                 Q(department_id=dept_id) |
                 Q(co_offices__id=dept_id) |
@@ -64,12 +69,17 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         co_offices_list = self.request.query_params.getlist('co_offices')
         directed_offices_list = self.request.query_params.getlist('directed_offices')
         if q:
+            # Attachment text is matched through its full-text index (extraction.py)
+            attachment_matches = Attachment.objects.filter(
+                blob__text__search_vector=SearchQuery(q, config='simple')
+            ).values('document_id')
             qs = qs.filter(
                 Q(ref_no__icontains=q) |
                 Q(subject__icontains=q) |
                 Q(sender_name__icontains=q) |
                 Q(receiver_name__icontains=q) |
-                Q(company_office_name__icontains=q)
+                Q(company_office_name__icontains=q) |
+                Q(id__in=attachment_matches)
             )
         source_param = self.request.query_params.get('source')
         letter_category = self.request.query_params.get('letter_category')
@@ -123,18 +133,25 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         """Check view permission before retrieving"""
         instance = self.get_object()
-        profile = request.user.profile
-        if not profile.can_view_document(instance):
+        principal = request_principal(request)
+        if not principal.can_view_document(instance):
             raise PermissionDenied("You don't have permission to view this document")
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        etag, last_modified = response_validators(request, self.detail_version_keys, instance.updated_at)
+        return conditional_response(request, etag, last_modified, lambda: self.serialize_detail(instance))
+
+    def serialize_detail(self, instance):
+        # Prefetched here rather than in get_queryset() so a 304 skips it
+        prefetch_related_objects(
+            [instance], Prefetch('attachments', queryset=Attachment.objects.select_related('blob'))
+        )
+        return Response(self.get_serializer(instance).data)
 
     @action(detail=True, methods=['get'])
     def audit_export(self, request, pk=None):
         """Export an immutable audit log for this document as CSV."""
         document = self.get_object()
-        profile = request.user.profile
-        if not profile.can_view_document(document):
+        principal = request_principal(request)
+        if not principal.can_view_document(document):
             raise PermissionDenied("You don't have permission to view this document")
 
         activities = list(
@@ -214,26 +231,85 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
             ])
         return response
 
+    @action(detail=False, methods=['get'])
+    def export_xlsx(self, request):
+        """Export the filtered document register as an XLSX workbook."""
+        queryset = self.filter_queryset(self.get_queryset()).select_related('regulatory_body')
+        language = 'am' if request.META.get('HTTP_ACCEPT_LANGUAGE', '').startswith('am') else 'en'
+        labels = {
+            field: dict(Document._meta.get_field(field).choices)
+            for field in ['doc_type', 'source', 'status', 'priority', 'confidentiality', 'letter_category', 'letter_type']
+        }
+
+        columns = [
+            XlsxColumn('Ref No', width=20),
+            XlsxColumn('Type', width=12),
+            XlsxColumn('Source', width=12),
+            XlsxColumn('Subject', width=50),
+            XlsxColumn('Status', width=14),
+            XlsxColumn('Priority', width=10),
+            XlsxColumn('Confidentiality', width=14),
+            XlsxColumn('Department', width=30),
+            XlsxColumn('Company/Agency', width=30),
+            XlsxColumn('Sender', width=24),
+            XlsxColumn('Receiver', width=24),
+            XlsxColumn('Letter Category', width=14),
+            XlsxColumn('Letter Type', width=16),
+            XlsxColumn('Regulatory Body', width=30),
+            XlsxColumn('Registered At', 'datetime', width=18),
+            XlsxColumn('Received Date', 'date', width=14),
+            XlsxColumn('Written Date', 'date', width=14),
+            XlsxColumn('Memo Date', 'date', width=14),
+            XlsxColumn('Due Date', 'date', width=14),
+        ]
+
+        def rows():
+            for d in queryset.iterator(chunk_size=2000):
+                yield [
+                    d.ref_no,
+                    labels['doc_type'].get(d.doc_type, d.doc_type),
+                    labels['source'].get(d.source, d.source),
+                    d.subject,
+                    labels['status'].get(d.status, d.status),
+                    labels['priority'].get(d.priority, d.priority),
+                    labels['confidentiality'].get(d.confidentiality, d.confidentiality),
+                    d.department.name if d.department else 'CEO Office',
+                    d.company_office_name,
+                    d.sender_name,
+                    d.receiver_name,
+                    labels['letter_category'].get(d.letter_category, d.letter_category),
+                    labels['letter_type'].get(d.letter_type, d.letter_type),
+                    regulatory_body_name(d.regulatory_body_id, language),
+                    d.registered_at,
+                    d.received_date,
+                    d.written_date,
+                    d.memo_date,
+                    d.due_date,
+                ]
+
+        filename = f"documents_{timezone.localdate().isoformat()}.xlsx"
+        return build_xlsx_response(filename, [('Documents', columns, rows())])
+
     def update(self, request, *args, **kwargs):
         """Check edit permission before updating"""
         instance = self.get_object()
-        profile = request.user.profile
-        if not profile.can_edit_document(instance):
+        principal = request_principal(request)
+        if not principal.can_edit_document(instance):
             raise PermissionDenied("You don't have permission to edit this document")
         return super().update(request, *args, **kwargs)
 
     def partial_update(self, request, *args, **kwargs):
         """Check edit permission before partial updating"""
         instance = self.get_object()
-        profile = request.user.profile
-        if not profile.can_edit_document(instance):
+        principal = request_principal(request)
+        if not principal.can_edit_document(instance):
             raise PermissionDenied("You don't have permission to edit this document")
         return super().partial_update(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
         """Only Super Admin and CEO Secretary can delete documents"""
-        profile = request.user.profile
-        if not profile.can_edit_all_documents:
+        principal = request_principal(request)
+        if not principal.can_edit_all_documents:
             raise PermissionDenied("You don't have permission to delete documents")
         return super().destroy(request, *args, **kwargs)
 
@@ -243,13 +319,7 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         files = request.FILES.getlist('files')
         created = []
         for f in files:
-            att = Attachment.objects.create(
-                document=document,
-                file=f,
-                original_name=getattr(f, 'name', ''),
-                size=getattr(f, 'size', 0),
-                uploaded_by=request.user if request.user.is_authenticated else None
-            )
+            att = create_attachment(document, f, request.user if request.user.is_authenticated else None)
             created.append(AttachmentSerializer(att, context={'request': request}).data)
         Activity.objects.create(document=document, actor=request.user if request.user.is_authenticated else None, action='attachment_added', notes=f'{len(created)} file(s) added')
         return Response(created, status=status.HTTP_201_CREATED)
@@ -257,10 +327,10 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         document = self.get_object()
-        profile = request.user.profile
+        principal = request_principal(request)
         
         # Check if user can edit this document
-        if not profile.can_edit_document(document):
+        if not principal.can_edit_document(document):
             raise PermissionDenied("You don't have permission to update this document's status")
         
         new_status = request.data.get('status')
@@ -303,22 +373,22 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
             if scenario in [1, 2, 14, 15]:
                 if document.status != 'DIRECTED':
                     return Response({'error': 'Document must be directed before dispatching'}, status=status.HTTP_400_BAD_REQUEST)
-                if profile.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+                if principal.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                     raise PermissionDenied("Only CEO Secretary can dispatch this document")
             # S4, S6: CEO Secretary dispatches directly from REGISTERED
             elif scenario in [4, 6]:
                 if document.status != 'REGISTERED':
                     return Response({'error': 'Document must be in REGISTERED status to dispatch'}, status=status.HTTP_400_BAD_REQUEST)
-                if profile.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+                if principal.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                     raise PermissionDenied("Only CEO Secretary can dispatch this document")
             # S8, S11, S12: CxO Secretary dispatches from REGISTERED
             elif scenario in [8, 11, 12]:
                 if document.status != 'REGISTERED':
                     return Response({'error': 'Document must be in REGISTERED status to dispatch'}, status=status.HTTP_400_BAD_REQUEST)
-                if profile.role != 'CXO_SECRETARY':
+                if principal.role != 'CXO_SECRETARY':
                     raise PermissionDenied("Only CxO Secretary can dispatch this document")
                 # Ensure the dispatching CxO secretary belongs to the originating department
-                if profile.department_id != document.department_id:
+                if principal.department_id != document.department_id:
                     raise PermissionDenied("Only the originating CxO office can dispatch this document")
             # S5: CEO Secretary dispatches forwarded memo to directed offices
             elif scenario == 5:
@@ -326,7 +396,7 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
                     return Response({'error': 'No directed offices set - cannot dispatch'}, status=status.HTTP_400_BAD_REQUEST)
                 if document.status != 'REGISTERED':
                     return Response({'error': 'Document must be in REGISTERED status to dispatch'}, status=status.HTTP_400_BAD_REQUEST)
-                if profile.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+                if principal.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                     raise PermissionDenied("Only CEO Secretary can dispatch this document")
             # S3, S9: no dispatch needed (outgoing external)
             elif scenario in [3, 9]:
@@ -339,7 +409,7 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         if new_status == 'DIRECTED':
             if scenario not in [1, 2, 14, 15]:
                 return Response({'error': 'Only Scenario 1, 2, 14, and Scenario 13 memos with CEO direction require CEO direction'}, status=status.HTTP_400_BAD_REQUEST)
-            if profile.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+            if principal.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                 raise PermissionDenied("Only CEO Secretary can direct documents")
         
         old_status = document.status
@@ -365,21 +435,17 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         document = self.get_object()
         user = request.user
         
-        # Ensure profile exists
-        if not hasattr(user, 'profile'):
-            UserProfile.objects.create(user=user)
-        
-        profile = user.profile
+        principal = request_principal(request)
         
         # Validate: user must be CxO Secretary
-        if profile.role != 'CXO_SECRETARY':
+        if principal.role != 'CXO_SECRETARY':
             raise PermissionDenied("Only CxO Secretaries can acknowledge documents")
         
         # Validate: user must have a department
-        if not profile.department:
+        if not principal.department:
             return Response({'error': 'Your account is not associated with a department'}, status=status.HTTP_400_BAD_REQUEST)
         
-        user_dept = profile.department
+        user_dept = principal.department
         scenario = self._get_scenario(document)
         acknowledgment_offices = document.cc_offices.all()
         if scenario in [1, 3, 4, 6, 12, 14] and not document.cc_offices.exists() and document.co_offices.exists():
@@ -447,11 +513,7 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         document = self.get_object()
         user = request.user
         
-        # Ensure profile exists
-        if not hasattr(user, 'profile'):
-            UserProfile.objects.create(user=user)
-        
-        profile = user.profile
+        principal = request_principal(request)
         scenario = self._get_scenario(document)
         
         # Scenarios that don't need receipt
@@ -472,21 +534,21 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         ceo_receives = scenario in [5, 10, 13] and not s5_has_directed
         
         if ceo_receives:
-            if profile.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
+            if principal.role not in ['CEO_SECRETARY', 'SUPER_ADMIN']:
                 raise PermissionDenied("Only CEO Secretary can receive this document")
             # Check not already received
             if document.receipts.filter(received_by__profile__role='CEO_SECRETARY').exists():
                 return Response({'error': 'CEO Office has already received this document'}, status=status.HTTP_400_BAD_REQUEST)
             # Determine department for receipt: use document's dept, user's dept, or first available dept
-            receipt_dept = document.department or profile.department
+            receipt_dept = document.department or principal.department
             if not receipt_dept:
                 # For CEO-level docs where CEO Secretary has no dept, record receipt under the CEO department
-                ceo_dept = Department.objects.filter(code__iexact='CEO').first()
+                ceo_dept = department_by_code('CEO')
                 if ceo_dept:
                     receipt_dept = ceo_dept
                 else:
                     # Last-resort fallback to keep receipt creation from failing
-                    receipt_dept = Department.objects.first()
+                    receipt_dept = next(iter(departments.all()), None)
             receipt = DocumentReceipt.objects.create(
                 document=document,
                 department=receipt_dept,
@@ -511,20 +573,20 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         
         # Scenario 7: self-receive by destination CxO secretary
         if scenario == 7:
-            if profile.role != 'CXO_SECRETARY':
+            if principal.role != 'CXO_SECRETARY':
                 raise PermissionDenied("Only CxO Secretary can receive this document")
-            if not profile.department or profile.department_id != document.department_id:
+            if not principal.department or principal.department_id != document.department_id:
                 raise PermissionDenied("Only the destination CxO office can receive this document")
-            if document.receipts.filter(department_id=profile.department_id).exists():
+            if document.receipts.filter(department_id=principal.department_id).exists():
                 return Response({'error': 'Your department has already received this document'}, status=status.HTTP_400_BAD_REQUEST)
             receipt = DocumentReceipt.objects.create(
                 document=document,
-                department=profile.department,
+                department=principal.department,
                 received_by=user
             )
             Activity.objects.create(
                 document=document, actor=user, action='received',
-                notes=f'{profile.department.code} marked as received'
+                notes=f'{principal.department.code} marked as received'
             )
             document.status = 'RECEIVED'
             document.save()
@@ -534,19 +596,19 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
             )
             return Response({
                 'message': 'Document marked as received',
-                'department': profile.department.name,
+                'department': principal.department.name,
                 'received_at': receipt.received_at,
                 'all_received': True
             }, status=status.HTTP_201_CREATED)
         
         # All other scenarios: CxO Secretary receives via directed_offices
-        if profile.role != 'CXO_SECRETARY':
+        if principal.role != 'CXO_SECRETARY':
             raise PermissionDenied("Only CxO Secretaries can mark documents as received")
         
-        if not profile.department:
+        if not principal.department:
             return Response({'error': 'Your account is not associated with a department'}, status=status.HTTP_400_BAD_REQUEST)
         
-        user_dept = profile.department
+        user_dept = principal.department
         
         if not document.directed_offices.filter(id=user_dept.id).exists():
             raise PermissionDenied("Your department is not a recipient of this document")
@@ -591,11 +653,7 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
         document = self.get_object()
         user = request.user
         
-        # Ensure profile exists
-        if not hasattr(user, 'profile'):
-            UserProfile.objects.create(user=user)
-        
-        profile = user.profile
+        principal = request_principal(request)
         scenario = self._get_scenario(document)
         
         # Scenarios that need CC acknowledgment
@@ -604,14 +662,14 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
             return Response({'error': 'This document type does not require CC acknowledgment'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if user is a CxO Secretary
-        if profile.role != 'CXO_SECRETARY':
+        if principal.role != 'CXO_SECRETARY':
             raise PermissionDenied("Only CxO Secretary can acknowledge documents")
         
         # Check if user has a department
-        if not profile.department:
+        if not principal.department:
             return Response({'error': 'Your account is not associated with a department'}, status=status.HTTP_400_BAD_REQUEST)
         
-        user_dept = profile.department
+        user_dept = principal.department
         acknowledgment_offices = document.cc_offices.all()
         if scenario in [1, 3, 4, 6, 12, 14] and not document.cc_offices.exists() and document.co_offices.exists():
             # Legacy S1/S3/S4/S6/S12/S14 fallback: CC offices were previously stored in co_offices
@@ -643,3 +701,89 @@ class DocumentViewSet(PerformanceTrackingMixin, viewsets.ModelViewSet):
             'department': user_dept.name,
             'acknowledged_at': acknowledgment.acknowledged_at
         }, status=status.HTTP_201_CREATED)
+
+
+class AttachmentViewSet(viewsets.GenericViewSet):
+    """Permission-checked attachment downloads"""
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Attachment.objects.select_related('document', 'blob')
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Send the file if the caller can view its document (?download=1 forces save-as)"""
+        attachment = self.get_object()
+        if not request_principal(request).can_view_document(attachment.document):
+            raise PermissionDenied("You don't have permission to view this document")
+        return serve_file(
+            request,
+            attachment.file,
+            filename=attachment.original_name or None,
+            as_attachment=request.query_params.get('download') in ('1', 'true'),
+        )
+
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        """First-page JPEG thumbnail, once generated (see previews.py)"""
+        attachment = self.get_object()
+        if not request_principal(request).can_view_document(attachment.document):
+            raise PermissionDenied("You don't have permission to view this document")
+        if not attachment.blob_id or not attachment.blob.thumbnail:
+            return Response({'error': 'Preview not available'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, attachment.blob.thumbnail, filename=f'{attachment.pk}-preview.jpg')
+
+
+class ChunkedUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Resumable uploads: create, PUT chunks, complete into an attachment (see chunked.py)"""
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(created_by_id=self.request.user.pk)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = start_upload(
+                request.user,
+                serializer.validated_data['filename'],
+                serializer.validated_data['size'],
+                serializer.validated_data.get('sha256', ''),
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        abort_upload(instance)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Raw chunk body at ?offset=N; optional X-Chunk-SHA256 header is verified"""
+        upload = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'offset query parameter and Content-Length are required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            digest = write_chunk(upload, offset, request.stream, length, request.headers.get('X-Chunk-SHA256'))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'offset': offset, 'size': length, 'sha256': digest})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Attach the assembled file to the document given as {"document": id}"""
+        upload = self.get_object()
+        document_id = str(request.data.get('document') or '')
+        document = Document.objects.filter(pk=document_id).first() if document_id.isdigit() else None
+        if document is None:
+            return Response({'error': 'A valid document id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request_principal(request).can_view_document(document):
+            raise PermissionDenied("You don't have permission to view this document")
+        try:
+            attachment = complete_upload(upload.pk, document, request.user)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AttachmentSerializer(attachment, context={'request': request}).data, status=status.HTTP_201_CREATED)
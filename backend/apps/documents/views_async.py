@@ -0,0 +1,59 @@
+"""Async GET handlers for the document list, detail and performance routes (see apps.core.asyncviews)"""
+from asgiref.sync import sync_to_async
+from django.urls import path
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.response import Response
+
+from apps.core.asyncviews import async_read_view, in_parallel
+from apps.core.conditional import conditional_response, not_modified, response_validators, set_validators
+from apps.core.principal import request_principal
+from .views import DocumentViewSet
+
+
+async def document_list(view, request):
+    etag, last_modified = await sync_to_async(response_validators)(request, view.version_keys)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+        # The list serializer reads related offices per row
+        data = await sync_to_async(lambda: view.get_serializer(page, many=True).data)()
+        response = view.get_paginated_response(data)
+    return set_validators(response, etag, last_modified)
+
+
+async def document_detail(view, request):
+    queryset = view.filter_queryset(view.get_queryset())
+    try:
+        instance = await queryset.aget(pk=view.kwargs['pk'])
+    except (queryset.model.DoesNotExist, ValueError):
+        raise NotFound()
+
+    def respond():
+        if not request_principal(request).can_view_document(instance):
+            raise PermissionDenied("You don't have permission to view this document")
+        etag, last_modified = response_validators(request, view.detail_version_keys, instance.updated_at)
+        return conditional_response(request, etag, last_modified, lambda: view.serialize_detail(instance))
+
+    return await sync_to_async(respond)()
+
+
+async def document_performance(view, request):
+    now, month_start = view._current_month()
+    # Both rankings are independent; compute them concurrently
+    receipt_performance, cc_performance = await in_parallel(
+        (view._calculate_receipt_performance, month_start),
+        (view._calculate_cc_performance, month_start),
+    )
+    return Response(view._performance_report(now, month_start, receipt_performance, cc_performance))
+
+
+# Mounted ahead of the router (urls.py), so they take over these routes
+urlpatterns = [
+    path('documents/', async_read_view(DocumentViewSet, 'list', document_list, {'post': 'create'})),
+    path('documents/performance/', async_read_view(DocumentViewSet, 'performance', document_performance)),
+    path('documents/<int:pk>/', async_read_view(
+        DocumentViewSet, 'retrieve', document_detail,
+        {'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+    )),
+]
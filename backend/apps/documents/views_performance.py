@@ -4,7 +4,7 @@ from django.db.models import Avg, F, ExpressionWrapper, DurationField
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Document, DocumentReceipt, DocumentAcknowledgment, DepartmentPerformanceSnapshot
-from apps.core.models import Department
+from apps.core.refcache import departments
 from decimal import Decimal
 
 
@@ -17,9 +17,7 @@ class PerformanceTrackingMixin:
         Calculate department performance metrics for document processing
         Returns top 5 departments for fastest receipt and CC acknowledgment times
         """
-        # Get current month
-        now = timezone.now()
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        now, current_month_start = self._current_month()
         
         # Calculate receipt performance (DISPATCHED -> RECEIVED)
         receipt_performance = self._calculate_receipt_performance(current_month_start)
@@ -27,15 +25,23 @@ class PerformanceTrackingMixin:
         # Calculate CC acknowledgment performance (DISPATCHED -> ACKNOWLEDGED)
         cc_performance = self._calculate_cc_performance(current_month_start)
         
-        return Response({
+        return Response(self._performance_report(now, current_month_start, receipt_performance, cc_performance))
+
+    def _current_month(self):
+        """(now, start of the current month)"""
+        now = timezone.now()
+        return now, now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    def _performance_report(self, now, month_start, receipt_performance, cc_performance):
+        return {
             'period': {
                 'month': now.strftime('%B %Y'),
-                'start_date': current_month_start.strftime('%Y-%m-%d'),
+                'start_date': month_start.strftime('%Y-%m-%d'),
                 'end_date': now.strftime('%Y-%m-%d')
             },
             'receipt_performance': receipt_performance,
             'cc_performance': cc_performance
-        })
+        }
     
     def _calculate_receipt_performance(self, start_date, end_date=None):
         """Calculate average time from DISPATCHED to RECEIVED by department"""
@@ -80,7 +86,7 @@ class PerformanceTrackingMixin:
                 department_times[dept_id]['times'].append(hours)
         
         # Get all CxO departments (exclude CEO office)
-        all_departments = Department.objects.exclude(code='CEO').order_by('code')
+        all_departments = [dept for dept in departments.all() if dept.code != 'CEO']
         
         # Calculate averages for all departments
         performance_data = []
@@ -160,7 +166,7 @@ class PerformanceTrackingMixin:
                     department_times[dept_id]['times'].append(hours)
         
         # Get all CxO departments (exclude CEO office)
-        all_departments = Department.objects.exclude(code='CEO').order_by('code')
+        all_departments = [dept for dept in departments.all() if dept.code != 'CEO']
         
         # Calculate averages for all departments
         performance_data = []
@@ -2,8 +2,11 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import RegulatoryBody
+from .refcache import regulatory_bodies
 from .serializers_regulatory import RegulatoryBodySerializer, RegulatoryBodyListSerializer
-from apps.core.models import UserProfile
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.principal import Capability, request_principal
+from apps.core.versions import REGULATORY_BODIES
 
 
 class CanManageRegulatoryBodies(permissions.BasePermission):
@@ -11,23 +14,24 @@ class CanManageRegulatoryBodies(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-        if not hasattr(request.user, 'profile'):
-            UserProfile.objects.create(user=request.user)
         
         # Allow read-only access for all authenticated users
         if request.method in permissions.SAFE_METHODS:
             return True
         
         # Only CEO Secretary can create/update/delete
-        return request.user.profile.role == 'CEO_SECRETARY'
+        return request_principal(request).has(Capability.MANAGE_REGULATORY_BODIES)
 
 
-class RegulatoryBodyViewSet(viewsets.ModelViewSet):
+class RegulatoryBodyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing regulatory bodies"""
     serializer_class = RegulatoryBodySerializer
     permission_classes = [permissions.IsAuthenticated, CanManageRegulatoryBodies]
+    version_keys = (REGULATORY_BODIES,)
     
     def get_queryset(self):
+        if self.action == 'list':
+            return list(regulatory_bodies.all())
         return RegulatoryBody.objects.all().order_by('name_en')
     
     def get_serializer_class(self):
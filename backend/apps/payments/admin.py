@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment, PaymentHistory
+from .models import Payment, PaymentHistory, ExchangeRate
 
 
 @admin.register(Payment)
@@ -10,14 +10,14 @@ class PaymentAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'payment_type', 'priority', 'currency', 'created_at']
     search_fields = ['ref_no', 'tt_number', 'vendor_name', 'invoice_number']
-    readonly_fields = ['registration_date', 'created_at', 'updated_at']
+    readonly_fields = ['registration_date', 'amount_etb', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Registration Details', {
             'fields': ('temp_ref_no', 'ref_no', 'tt_number', 'arrival_date', 'registered_by', 'registration_date')
         }),
         ('Payment Information', {
-            'fields': ('amount', 'currency', 'payment_type', 'vendor_name', 'invoice_number', 
+            'fields': ('amount', 'currency', 'amount_etb', 'payment_type', 'vendor_name', 'invoice_number', 
                       'description', 'payment_date', 'due_date')
         }),
         ('Workflow', {
@@ -36,3 +36,11 @@ class PaymentHistoryAdmin(admin.ModelAdmin):
     list_filter = ['action', 'timestamp']
     search_fields = ['payment__ref_no', 'action', 'performed_by__username']
     readonly_fields = ['payment', 'action', 'old_status', 'new_status', 'notes', 'performed_by', 'timestamp']
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ['date', 'currency', 'rate', 'created_by', 'updated_at']
+    list_filter = ['currency']
+    date_hierarchy = 'date'
+    readonly_fields = ['created_by', 'created_at', 'updated_at']
@@ -0,0 +1,108 @@
+"""Duplicate payment detection.
+
+Every payment with an invoice number and an amount carries a fingerprint: a
+SHA-256 over its normalized vendor name, invoice number, amount and currency.
+Spelling noise ("ABC Trading PLC" vs "abc trading", "INV-001" vs "inv 001")
+normalizes away, so registering the same invoice twice yields the same
+fingerprint. Letters and digits of every script are kept, so Amharic vendor
+names and invoice numbers are told apart like Latin ones. Checking a payment
+is then one lookup on the fingerprint index, and finding existing clusters
+is a single GROUP BY over that column.
+"""
+import hashlib
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count
+
+from .models import Payment
+
+# Legal-form words (casefolded) dropped from the end of vendor names before hashing
+VENDOR_SUFFIXES = {'plc', 'sc', 'share', 'company', 'co', 'ltd', 'limited', 'inc', 'pllc', 'llc', 'enterprise'}
+
+MAX_DUPLICATES_SHOWN = 10
+
+
+def _normalize_vendor(vendor_name):
+    words = re.findall(r'[^\W_]+', (vendor_name or '').casefold())
+    while words and words[-1] in VENDOR_SUFFIXES:
+        words.pop()
+    return ''.join(words)
+
+
+def _normalize_invoice(invoice_number):
+    return re.sub(r'[\W_]', '', (invoice_number or '').casefold())
+
+
+def payment_fingerprint(vendor_name, invoice_number, amount, currency):
+    """Return the fingerprint of a payment, or '' when it has no invoice number or amount"""
+    invoice = _normalize_invoice(invoice_number)
+    if not invoice or amount in (None, ''):
+        return ''
+    try:
+        amount = Decimal(str(amount)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return ''
+    key = '|'.join([_normalize_vendor(vendor_name), invoice, str(amount), currency or ''])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def find_possible_duplicates(payment):
+    """Other payments sharing this payment's fingerprint, oldest first"""
+    if not payment.fingerprint:
+        return []
+    return list(
+        Payment.objects.filter(fingerprint=payment.fingerprint)
+        .exclude(pk=payment.pk)
+        .order_by('registration_date', 'id')
+        .values('id', 'ref_no', 'temp_ref_no', 'vendor_name', 'invoice_number',
+                'amount', 'currency', 'status', 'registration_date')[:MAX_DUPLICATES_SHOWN]
+    )
+
+
+def refresh_fingerprints(queryset=None, batch_size=2000):
+    """Recompute stored fingerprints in batches; return the number of rows changed"""
+    if queryset is None:
+        queryset = Payment.objects.all()
+    rows = queryset.order_by().values_list(
+        'id', 'vendor_name', 'invoice_number', 'amount', 'currency', 'fingerprint'
+    ).iterator(chunk_size=batch_size)
+
+    changed = []
+    total = 0
+    for pk, vendor_name, invoice_number, amount, currency, stored in rows:
+        fingerprint = payment_fingerprint(vendor_name, invoice_number, amount, currency)
+        if fingerprint != stored:
+            changed.append(Payment(id=pk, fingerprint=fingerprint))
+        if len(changed) >= batch_size:
+            Payment.objects.bulk_update(changed, ['fingerprint'])
+            total += len(changed)
+            changed = []
+    if changed:
+        Payment.objects.bulk_update(changed, ['fingerprint'])
+        total += len(changed)
+    return total
+
+
+def duplicate_clusters(batch_size=500):
+    """Yield lists of payments (as dicts) that share a fingerprint, largest clusters first"""
+    fingerprints = list(
+        Payment.objects.exclude(fingerprint='')
+        .values('fingerprint')
+        .annotate(size=Count('id'))
+        .filter(size__gt=1)
+        .order_by('-size', 'fingerprint')
+        .values_list('fingerprint', flat=True)
+    )
+    for start in range(0, len(fingerprints), batch_size):
+        batch = fingerprints[start:start + batch_size]
+        members = {}
+        for row in (
+            Payment.objects.filter(fingerprint__in=batch)
+            .order_by('registration_date', 'id')
+            .values('id', 'fingerprint', 'ref_no', 'temp_ref_no', 'vendor_name', 'invoice_number',
+                    'amount', 'currency', 'status', 'registration_date')
+        ):
+            members.setdefault(row['fingerprint'], []).append(row)
+        for fingerprint in batch:
+            yield members[fingerprint]
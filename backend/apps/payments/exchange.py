@@ -0,0 +1,120 @@
+"""ETB conversion of payment amounts.
+
+``Payment.amount_etb`` is materialized so cross-currency totals are a plain
+SUM in reports.py instead of a per-row conversion at report time. A payment is
+converted at the ExchangeRate in effect on its rate date (payment date, else
+arrival date, else registration date): the latest rate for its currency dated
+on or before that day.
+
+Single payments are converted in a pre_save signal. When a rate is added,
+changed or removed, every affected payment is re-converted with set-based
+UPDATEs in primary-key batches, and the PAYMENTS version is bumped (which
+also retires the cached monthly summaries).
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Case, DateField, DateTimeField, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, When,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import ExchangeRate, Payment
+
+BASE_CURRENCY = 'ETB'
+REFRESH_BATCH_SIZE = 5000
+CENTS = Decimal('0.01')
+
+
+def payment_rate_date(payment):
+    """Day whose exchange rate applies to a payment"""
+    if payment.payment_date:
+        return payment.payment_date
+    if payment.arrival_date:
+        return payment.arrival_date
+    if payment.registration_date:
+        return timezone.localtime(payment.registration_date).date()
+    return timezone.localdate()
+
+
+def rate_on(currency, day):
+    """ETB per unit of currency in effect on day, or None if no rate is recorded yet"""
+    if currency == BASE_CURRENCY:
+        return 1
+    return (
+        ExchangeRate.objects.filter(currency=currency, date__lte=day)
+        .order_by('-date')
+        .values_list('rate', flat=True)
+        .first()
+    )
+
+
+def convert_to_etb(amount, currency, day):
+    if amount is None:
+        return None
+    if currency == BASE_CURRENCY:
+        return amount
+    rate = rate_on(currency, day)
+    if rate is None:
+        return None
+    return (amount * rate).quantize(CENTS)
+
+
+def _rate_date_expr(outer=False):
+    def ref(name, field):
+        # OuterRef has no output_field of its own, which TruncDate needs
+        return ExpressionWrapper(OuterRef(name), output_field=field) if outer else F(name)
+
+    return Coalesce(
+        ref('payment_date', DateField()), ref('arrival_date', DateField()),
+        TruncDate(ref('registration_date', DateTimeField())),
+        output_field=DateField(),
+    )
+
+
+def _amount_etb_expr():
+    rate = ExchangeRate.objects.filter(
+        currency=OuterRef('currency'), date__lte=_rate_date_expr(outer=True)
+    ).order_by('-date').values('rate')[:1]
+    return Case(
+        When(currency=BASE_CURRENCY, then=F('amount')),
+        default=F('amount') * Subquery(rate),
+        output_field=DecimalField(max_digits=18, decimal_places=2),
+    )
+
+
+def refresh_amount_etb(queryset=None, batch_size=REFRESH_BATCH_SIZE):
+    """Recompute amount_etb for a payment queryset in primary-key batches; return rows updated"""
+    from apps.core.versions import PAYMENTS, bump_versions
+
+    if queryset is None:
+        queryset = Payment.objects.all()
+    queryset = queryset.order_by()
+    ids = queryset.values_list('id', flat=True).order_by('id')
+
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(ids.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        updated += Payment.objects.filter(id__in=batch).update(
+            amount_etb=_amount_etb_expr(), updated_at=timezone.now()
+        )
+    if updated:
+        bump_versions(PAYMENTS)
+    return updated
+
+
+def refresh_amount_etb_for_rate(rate):
+    """Re-convert payments whose effective rate may have changed with this ExchangeRate"""
+    covered = Q(currency=rate.currency, rate_date__gte=rate.date)
+    stored = getattr(rate, '_stored', None)
+    if stored:
+        # Payments the rate covered before this edit (another date or currency)
+        stored_date, stored_currency = stored
+        covered |= Q(currency=stored_currency, rate_date__gte=stored_date)
+
+    affected = Payment.objects.annotate(rate_date=_rate_date_expr()).filter(covered)
+    refresh_amount_etb(affected)
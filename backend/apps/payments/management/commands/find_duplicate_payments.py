@@ -0,0 +1,55 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.payments.duplicates import duplicate_clusters, refresh_fingerprints
+
+REPORT_FIELDS = ['cluster', 'id', 'ref_no', 'temp_ref_no', 'vendor_name', 'invoice_number',
+                 'amount', 'currency', 'status', 'registration_date']
+
+
+class Command(BaseCommand):
+    help = 'List clusters of payments that share a duplicate-detection fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Recompute stored fingerprints first (needed once for payments created before fingerprints existed)',
+        )
+        parser.add_argument('--report', type=str, help='Write all cluster members to this CSV file')
+
+    def handle(self, *args, **options):
+        if options['refresh']:
+            self.stdout.write('Refreshing payment fingerprints...')
+            self.stdout.write(f'Updated {refresh_fingerprints()} fingerprints')
+
+        report_file = None
+        writer = None
+        if options['report']:
+            try:
+                report_file = open(options['report'], 'w', newline='', encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f'Could not open report file: {e}')
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+
+        cluster_count = 0
+        payment_count = 0
+        try:
+            for cluster_count, members in enumerate(duplicate_clusters(), start=1):
+                payment_count += len(members)
+                first = members[0]
+                self.stdout.write(
+                    f'{first["vendor_name"] or "-"} / {first["invoice_number"]} / {first["amount"]} {first["currency"]}: '
+                    + ', '.join(m['ref_no'] or m['temp_ref_no'] or f'#{m["id"]}' for m in members)
+                )
+                if writer:
+                    for member in members:
+                        writer.writerow({'cluster': cluster_count, **member})
+        finally:
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Found {cluster_count} duplicate clusters covering {payment_count} payments'
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.payments.reports import generate_latency_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Generate monthly payment pipeline latency snapshot (per-stage mean/p50/p90 hours)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            type=str,
+            help='Month to generate snapshot for (YYYY-MM format). Defaults to previous month.',
+        )
+
+    def handle(self, *args, **options):
+        # Determine target month
+        if options['month']:
+            try:
+                year, month = map(int, options['month'].split('-'))
+                if not 1 <= month <= 12:
+                    raise ValueError
+            except (ValueError, AttributeError):
+                self.stdout.write(self.style.ERROR('Invalid month format. Use YYYY-MM'))
+                return
+        else:
+            # Default to previous month
+            today = timezone.localdate()
+            if today.month == 1:
+                year, month = today.year - 1, 12
+            else:
+                year, month = today.year, today.month - 1
+
+        self.stdout.write(f'Generating payment latency snapshot for {year}-{month:02d}...')
+
+        try:
+            result = generate_latency_snapshot(year, month)
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully generated snapshot for {result["month"]}: '
+                f'{result["row_count"]} stage/breakdown rows'
+            ))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error generating snapshot: {str(e)}'))
+            raise
@@ -0,0 +1,63 @@
+import csv
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from apps.payments.reconciliation import StatementReconciler
+
+REPORT_FIELDS = ['line', 'tt_number', 'amount', 'currency', 'date', 'vendor', 'payment_id', 'match', 'completed']
+
+
+class Command(BaseCommand):
+    help = 'Match a bank statement CSV against payments transferred to bank and write a match report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', type=str, help='Path to the bank statement CSV')
+        parser.add_argument('--report', type=str, help='Write the per-line match report to this CSV file')
+        parser.add_argument('--date-window', type=int, default=3, help='Days either side of the transfer date to match amounts (default 3)')
+        parser.add_argument('--date-format', type=str, help='strptime format of the statement date column (default: auto-detect)')
+        parser.add_argument('--currency', type=str, default='ETB', help='Currency for lines without a currency column (default ETB)')
+        parser.add_argument('--apply', action='store_true', help='Mark matched payments as PAYMENT_COMPLETE')
+        parser.add_argument('--user', type=str, help='Username recorded as completed_by when using --apply')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+        elif options['apply']:
+            raise CommandError('--apply requires --user')
+
+        reconciler = StatementReconciler(
+            date_window=options['date_window'],
+            apply=options['apply'],
+            user=user,
+            default_currency=options['currency'].upper(),
+            date_format=options['date_format'],
+        )
+
+        self.stdout.write(f'Reconciling {options["statement"]}...')
+        report_file = open(options['report'], 'w', newline='', encoding='utf-8') if options['report'] else None
+        try:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS, extrasaction='ignore') if report_file else None
+            if writer:
+                writer.writeheader()
+            with open(options['statement'], newline='', encoding='utf-8-sig', errors='replace') as statement:
+                for result in reconciler.run(statement):
+                    if writer:
+                        writer.writerow(result)
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(f'Could not reconcile statement: {e}')
+        finally:
+            if report_file:
+                report_file.close()
+
+        summary = reconciler.summary
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["lines"]} lines: {summary["matched"]} matched, {summary["unmatched"]} unmatched, '
+            f'{summary["ambiguous"]} ambiguous, {summary["tt_number_amount_mismatch"]} TT number with a different '
+            f'amount/currency, {summary["tt_number_already_matched"]} TT number already matched, '
+            f'{summary["invalid"]} invalid'
+            + (f'; {summary["completed"]} payments marked complete' if options['apply'] else '')
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from apps.payments.exchange import refresh_amount_etb
+from apps.payments.models import Payment, CURRENCIES
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized ETB amount of payments from the exchange rate table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--currency',
+            type=str,
+            choices=[code for code, _ in CURRENCIES],
+            help='Only refresh payments in this currency',
+        )
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only refresh payments that have an amount but no ETB amount yet',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Payments updated per UPDATE statement (default 5000)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Payment.objects.all()
+        if options['currency']:
+            queryset = queryset.filter(currency=options['currency'])
+        if options['missing']:
+            queryset = queryset.filter(amount__isnull=False, amount_etb__isnull=True)
+
+        self.stdout.write('Refreshing payment ETB amounts...')
+        updated = refresh_amount_etb(queryset, batch_size=options['batch_size'])
+
+        unconverted = Payment.objects.filter(amount__isnull=False, amount_etb__isnull=True).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} payments; {unconverted} payments still have no exchange rate'
+        ))
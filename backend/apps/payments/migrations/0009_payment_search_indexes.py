@@ -0,0 +1,51 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:31
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_payment_registry_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['amount'], name='payment_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['invoice_number'], name='payment_invoice_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('ref_no'), name='gin_trgm_ops'), name='payment_ref_no_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('temp_ref_no'), name='gin_trgm_ops'), name='payment_temp_ref_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('tt_number'), name='gin_trgm_ops'), name='payment_tt_number_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('invoice_number'), name='gin_trgm_ops'), name='payment_invoice_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('vendor_name'), name='gin_trgm_ops'), name='payment_vendor_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description'), name='gin_trgm_ops'), name='payment_description_trgm'),
+        ),
+    ]
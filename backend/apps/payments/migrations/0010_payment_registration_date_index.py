@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_payment_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['registration_date'], name='payment_registration_idx'),
+        ),
+    ]
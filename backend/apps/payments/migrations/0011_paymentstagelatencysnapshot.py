@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0010_payment_registration_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentStageLatencySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('stage', models.CharField(choices=[('ARRIVAL_TO_PENDING', 'Arrival to Pending Payment'), ('PENDING_TO_TRANSFERRED', 'Pending Payment to Transferred'), ('TRANSFERRED_TO_COMPLETE', 'Transferred to Payment Complete'), ('ARRIVAL_TO_COMPLETE', 'Arrival to Payment Complete')], max_length=30)),
+                ('dimension', models.CharField(choices=[('ALL', 'All Payments'), ('PAYMENT_TYPE', 'Payment Type'), ('CURRENCY', 'Currency'), ('PRIORITY', 'Priority')], default='ALL', max_length=20)),
+                ('dimension_value', models.CharField(blank=True, help_text='Payment type, currency or priority code; blank for ALL', max_length=20)),
+                ('payment_count', models.IntegerField()),
+                ('mean_hours', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('p50_hours', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('p90_hours', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-month', 'stage', 'dimension', 'dimension_value'],
+                'unique_together': {('month', 'stage', 'dimension', 'dimension_value')},
+            },
+        ),
+    ]
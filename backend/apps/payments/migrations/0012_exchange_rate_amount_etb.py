@@ -0,0 +1,59 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_etb_amounts(apps, schema_editor):
+    """ETB payments need no rate; foreign-currency rows are filled once rates are entered"""
+    Payment = apps.get_model('payments', 'Payment')
+    Payment.objects.filter(currency='ETB').update(amount_etb=models.F('amount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_paymentstagelatencysnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('currency', models.CharField(choices=[('ETB', 'Ethiopian Birr'), ('USD', 'US Dollar'), ('EUR', 'Euro')], max_length=3)),
+                ('rate', models.DecimalField(decimal_places=6, help_text='ETB per 1 unit of currency', max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date', 'currency'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_registration_idx',
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='amount_etb',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount converted to ETB at the exchange rate of the payment date; null until a rate is known', max_digits=18, null=True),
+        ),
+        migrations.RunPython(backfill_etb_amounts, reverse_code=migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['registration_date'], include=('amount_etb', 'currency', 'status', 'payment_type'), name='payment_registration_cov_idx'),
+        ),
+        migrations.AddField(
+            model_name='exchangerate',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exchange_rates', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='exchangerate',
+            unique_together={('currency', 'date')},
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:43
+
+import hashlib
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of apps.payments.duplicates.payment_fingerprint as of this
+# migration, so later changes there do not alter what it writes
+VENDOR_SUFFIXES = {'plc', 'sc', 'share', 'company', 'co', 'ltd', 'limited', 'inc', 'pllc', 'llc', 'enterprise'}
+
+
+def payment_fingerprint(vendor_name, invoice_number, amount, currency):
+    invoice = re.sub(r'[\W_]', '', (invoice_number or '').casefold())
+    if not invoice or amount in (None, ''):
+        return ''
+    try:
+        amount = Decimal(str(amount)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return ''
+    words = re.findall(r'[^\W_]+', (vendor_name or '').casefold())
+    while words and words[-1] in VENDOR_SUFFIXES:
+        words.pop()
+    key = '|'.join([''.join(words), invoice, str(amount), currency or ''])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """Fingerprint existing payments so duplicate checks cover them"""
+    Payment = apps.get_model('payments', 'Payment')
+    batch = []
+    for payment in Payment.objects.only('id', 'vendor_name', 'invoice_number', 'amount', 'currency').iterator(chunk_size=2000):
+        payment.fingerprint = payment_fingerprint(
+            payment.vendor_name, payment.invoice_number, payment.amount, payment.currency
+        )
+        if payment.fingerprint:
+            batch.append(payment)
+        if len(batch) >= 2000:
+            Payment.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        Payment.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0012_exchange_rate_amount_etb'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Hash of normalized vendor, invoice number, amount and currency (see duplicates.py)', max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints, reverse_code=migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['fingerprint'], name='payment_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0013_payment_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymenthistory',
+            index=models.Index(fields=['payment', '-timestamp', '-id'], name='payhist_payment_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenthistory',
+            index=models.Index(fields=['-timestamp', '-id'], name='payhist_ts_idx'),
+        ),
+    ]
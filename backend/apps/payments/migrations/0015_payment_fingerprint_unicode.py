@@ -0,0 +1,57 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:12
+
+import hashlib
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations
+
+# Frozen copy of apps.payments.duplicates.payment_fingerprint as of this
+# migration: normalization keeps letters and digits of every script
+VENDOR_SUFFIXES = {'plc', 'sc', 'share', 'company', 'co', 'ltd', 'limited', 'inc', 'pllc', 'llc', 'enterprise'}
+
+
+def payment_fingerprint(vendor_name, invoice_number, amount, currency):
+    invoice = re.sub(r'[\W_]', '', (invoice_number or '').casefold())
+    if not invoice or amount in (None, ''):
+        return ''
+    try:
+        amount = Decimal(str(amount)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return ''
+    words = re.findall(r'[^\W_]+', (vendor_name or '').casefold())
+    while words and words[-1] in VENDOR_SUFFIXES:
+        words.pop()
+    key = '|'.join([''.join(words), invoice, str(amount), currency or ''])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def recompute_fingerprints(apps, schema_editor):
+    """Rehash payments fingerprinted with the ASCII-only normalization"""
+    Payment = apps.get_model('payments', 'Payment')
+    batch = []
+    for payment in Payment.objects.only(
+        'id', 'vendor_name', 'invoice_number', 'amount', 'currency', 'fingerprint'
+    ).iterator(chunk_size=2000):
+        fingerprint = payment_fingerprint(
+            payment.vendor_name, payment.invoice_number, payment.amount, payment.currency
+        )
+        if fingerprint != payment.fingerprint:
+            payment.fingerprint = fingerprint
+            batch.append(payment)
+        if len(batch) >= 2000:
+            Payment.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        Payment.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0014_payment_history_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_fingerprints, reverse_code=migrations.RunPython.noop),
+    ]
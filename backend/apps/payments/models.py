@@ -1,5 +1,9 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
 from apps.core.models import Department
 
 User = get_user_model()
@@ -36,6 +40,22 @@ PAYMENT_PRIORITY = [
     ('URGENT', 'Urgent'),
 ]
 
+# Workflow stages measured by the pipeline latency report
+PAYMENT_STAGES = [
+    ('ARRIVAL_TO_PENDING', 'Arrival to Pending Payment'),            # arrival_date -> pending_payment_date
+    ('PENDING_TO_TRANSFERRED', 'Pending Payment to Transferred'),    # pending_payment_date -> transferred_date
+    ('TRANSFERRED_TO_COMPLETE', 'Transferred to Payment Complete'),  # transferred_date -> completed_date
+    ('ARRIVAL_TO_COMPLETE', 'Arrival to Payment Complete'),          # arrival_date -> completed_date
+]
+
+# Breakdown dimensions of the pipeline latency report
+LATENCY_DIMENSIONS = [
+    ('ALL', 'All Payments'),
+    ('PAYMENT_TYPE', 'Payment Type'),
+    ('CURRENCY', 'Currency'),
+    ('PRIORITY', 'Priority'),
+]
+
 
 class Payment(models.Model):
     """Financial payment tracking model"""
@@ -52,10 +72,18 @@ class Payment(models.Model):
     # Payment details
     amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     currency = models.CharField(max_length=3, choices=CURRENCIES, default='ETB')
+    amount_etb = models.DecimalField(
+        max_digits=18, decimal_places=2, null=True, blank=True,
+        help_text="Amount converted to ETB at the exchange rate of the payment date; null until a rate is known"
+    )
     payment_type = models.CharField(max_length=20, choices=PAYMENT_TYPES)
     vendor_name = models.CharField(max_length=200, null=True, blank=True)
     invoice_number = models.CharField(max_length=100, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
+    fingerprint = models.CharField(
+        max_length=64, blank=True, default='', editable=False,
+        help_text="Hash of normalized vendor, invoice number, amount and currency (see duplicates.py)"
+    )
     payment_date = models.DateField(null=True, blank=True, help_text="Date of payment transaction")
     due_date = models.DateField(null=True, blank=True)
     
@@ -81,6 +109,27 @@ class Payment(models.Model):
             ('can_register_payment', 'Can register payment'),
             ('can_view_payment', 'Can view payment'),
         ]
+        indexes = [
+            # Typed search (see search.py): amount ranges, reference prefixes, free text.
+            # Trigram indexes are on UPPER(...) to match Django's icontains/istartswith SQL.
+            models.Index(fields=['amount'], name='payment_amount_idx'),
+            models.Index(fields=['invoice_number'], name='payment_invoice_idx'),
+            # Duplicate detection (see duplicates.py)
+            models.Index(fields=['fingerprint'], name='payment_fingerprint_idx'),
+            # Range filters in reports.py (monthly summary / year matrix). The summary
+            # still visits the table: it sums amount, which is not included
+            models.Index(
+                fields=['registration_date'],
+                include=['amount_etb', 'currency', 'status', 'payment_type'],
+                name='payment_registration_cov_idx',
+            ),
+            GinIndex(OpClass(Upper('ref_no'), name='gin_trgm_ops'), name='payment_ref_no_trgm'),
+            GinIndex(OpClass(Upper('temp_ref_no'), name='gin_trgm_ops'), name='payment_temp_ref_trgm'),
+            GinIndex(OpClass(Upper('tt_number'), name='gin_trgm_ops'), name='payment_tt_number_trgm'),
+            GinIndex(OpClass(Upper('invoice_number'), name='gin_trgm_ops'), name='payment_invoice_trgm'),
+            GinIndex(OpClass(Upper('vendor_name'), name='gin_trgm_ops'), name='payment_vendor_trgm'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='payment_description_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.ref_no or 'Unregistered'} - {self.vendor_name} - {self.amount} {self.currency}"
@@ -125,6 +174,89 @@ class PaymentHistory(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination on (timestamp, id), per payment and overall
+            models.Index(fields=['payment', '-timestamp', '-id'], name='payhist_payment_ts_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='payhist_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.payment.ref_no} - {self.action} by {self.performed_by}"
+
+
+class PaymentStageLatencySnapshot(models.Model):
+    """Monthly per-stage payment latency (hours), overall and per breakdown value"""
+    
+    month = models.DateField(help_text="First day of the month")
+    stage = models.CharField(max_length=30, choices=PAYMENT_STAGES)
+    dimension = models.CharField(max_length=20, choices=LATENCY_DIMENSIONS, default='ALL')
+    dimension_value = models.CharField(max_length=20, blank=True, help_text="Payment type, currency or priority code; blank for ALL")
+    payment_count = models.IntegerField()
+    mean_hours = models.DecimalField(max_digits=10, decimal_places=2)
+    p50_hours = models.DecimalField(max_digits=10, decimal_places=2)
+    p90_hours = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('month', 'stage', 'dimension', 'dimension_value')
+        ordering = ['-month', 'stage', 'dimension', 'dimension_value']
+    
+    def __str__(self):
+        return f"{self.month.strftime('%B %Y')} - {self.stage} - {self.dimension} {self.dimension_value}".strip()
+
+
+class ExchangeRate(models.Model):
+    """ETB value of one unit of a foreign currency, effective from a date until the next rate"""
+    
+    date = models.DateField()
+    currency = models.CharField(max_length=3, choices=CURRENCIES)
+    rate = models.DecimalField(max_digits=12, decimal_places=6, help_text="ETB per 1 unit of currency")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='exchange_rates')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('currency', 'date')
+        ordering = ['-date', 'currency']
+    
+    def __str__(self):
+        return f"{self.date} - 1 {self.currency} = {self.rate} ETB"
+
+
+@receiver(pre_save, sender=Payment)
+def set_payment_amount_etb(sender, instance, **kwargs):
+    """Materialize amount_etb from the rate in effect on the payment's rate date"""
+    from .exchange import convert_to_etb, payment_rate_date
+    instance.amount_etb = convert_to_etb(instance.amount, instance.currency, payment_rate_date(instance))
+
+
+@receiver(pre_save, sender=Payment)
+def set_payment_fingerprint(sender, instance, **kwargs):
+    """Keep the duplicate-detection fingerprint in step with the invoice fields"""
+    from .duplicates import payment_fingerprint
+    instance.fingerprint = payment_fingerprint(
+        instance.vendor_name, instance.invoice_number, instance.amount, instance.currency
+    )
+
+
+@receiver(pre_save, sender=ExchangeRate)
+def remember_rate_date(sender, instance, **kwargs):
+    """Keep the stored date and currency so moving a rate also re-converts the payments it stops covering"""
+    instance._stored = (
+        ExchangeRate.objects.filter(pk=instance.pk).values_list('date', 'currency').first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def refresh_payments_for_rate(sender, instance, **kwargs):
+    """Re-convert the payments whose effective rate may have changed"""
+    from .exchange import refresh_amount_etb_for_rate
+    refresh_amount_etb_for_rate(instance)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def bump_payments_version(sender, instance, **kwargs):
+    from apps.core.versions import PAYMENTS, bump_versions
+    bump_versions(PAYMENTS)
@@ -0,0 +1,238 @@
+"""Bank statement reconciliation for payments.
+
+Statement CSVs are read row by row and processed in chunks, so files of any
+size are handled in constant memory. Open payments (TRANSFERRED_TO_BANK) are
+loaded once into two in-memory hash indexes:
+
+- by normalized TT number, for exact reference matches (the line's amount
+  and currency, when present, must also agree with the payment);
+- by (amount, currency, transfer date), probed for every day of the date window.
+  A line with a TT number never matches a payment carrying a different one.
+
+Each payment is matched at most once. With ``apply`` the matched payments of
+every chunk are moved to PAYMENT_COMPLETE through workflow.bulk_transition.
+"""
+import csv
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+
+from .models import Payment
+from .workflow import MAX_BULK_TRANSITION, bulk_transition
+
+# Status of payments waiting for bank confirmation
+OPEN_STATUS = 'TRANSFERRED_TO_BANK'
+
+# Accepted header names (lower-case, spaces as underscores) per statement field
+COLUMN_ALIASES = {
+    'tt_number': ['tt_number', 'tt', 'tt_no', 'reference', 'ref', 'ref_no', 'transaction_reference', 'txn_ref'],
+    'amount': ['amount', 'debit', 'debit_amount', 'value'],
+    'currency': ['currency', 'ccy'],
+    'date': ['date', 'value_date', 'transaction_date', 'posting_date', 'txn_date'],
+    'vendor': ['vendor', 'vendor_name', 'beneficiary', 'payee', 'narrative', 'description'],
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d']
+
+
+def _normalize(value):
+    """Upper-case and strip punctuation/spaces so 'TT-123 456' matches 'tt123456'"""
+    return re.sub(r'[^0-9A-Z]', '', (value or '').upper())
+
+
+def _parse_amount(value):
+    try:
+        return abs(Decimal((value or '').replace(',', '').strip()))
+    except InvalidOperation:
+        return None
+
+
+def _parse_date(value, date_format=None):
+    value = (value or '').strip()
+    if not value:
+        return None
+    for fmt in ([date_format] if date_format else DATE_FORMATS):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _resolve_columns(header):
+    """Map statement fields to column positions using COLUMN_ALIASES"""
+    normalized = [h.strip().lower().replace(' ', '_') for h in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[field] = normalized.index(alias)
+                break
+    if 'amount' not in columns and 'tt_number' not in columns:
+        raise ValueError('Statement needs at least an amount or a TT/reference column')
+    return columns
+
+
+class StatementReconciler:
+    """Match statement lines to open payments; iterate run() for per-line results"""
+
+    def __init__(self, date_window=3, apply=False, user=None, chunk_size=MAX_BULK_TRANSITION, default_currency='ETB', date_format=None):
+        self.date_window = date_window
+        self.apply = apply
+        self.user = user
+        self.chunk_size = chunk_size
+        self.default_currency = default_currency
+        self.date_format = date_format
+        self.by_tt = {}
+        self.by_amount = {}
+        self.matched_ids = set()
+        self.summary = {
+            'lines': 0, 'matched': 0, 'unmatched': 0, 'ambiguous': 0, 'tt_number_amount_mismatch': 0,
+            'tt_number_already_matched': 0, 'invalid': 0, 'completed': 0,
+        }
+
+    def build_index(self):
+        """Load open payments into the TT and (amount, currency, date) hash indexes"""
+        open_payments = (
+            Payment.objects.filter(status=OPEN_STATUS)
+            .values_list('id', 'tt_number', 'amount', 'currency', 'transferred_date', 'payment_date', 'vendor_name')
+            .order_by()
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for pk, tt_number, amount, currency, transferred_date, payment_date, vendor_name in open_payments:
+            tt = _normalize(tt_number)
+            if tt:
+                self.by_tt[tt] = (pk, amount, currency)
+            if amount is None:
+                continue
+            if transferred_date:
+                day = timezone.localtime(transferred_date).date()
+            elif payment_date:
+                day = payment_date
+            else:
+                continue
+            self.by_amount.setdefault((amount, currency, day), []).append((pk, _normalize(vendor_name), tt))
+
+    def _amount_candidates(self, amount, currency, day, tt=''):
+        """Unmatched payments within the date window; with tt, skip payments that carry another TT number"""
+        candidates = []
+        for offset in range(-self.date_window, self.date_window + 1):
+            for pk, vendor, payment_tt in self.by_amount.get((amount, currency, day + timedelta(days=offset)), ()):
+                if pk in self.matched_ids or (tt and payment_tt and payment_tt != tt):
+                    continue
+                candidates.append((abs(offset), pk, vendor))
+        return candidates
+
+    def match_line(self, line_no, tt_number, amount, currency, day, vendor):
+        """Return the result dict of one statement line; currency is None when the line has none"""
+        line_currency = currency
+        currency = currency or self.default_currency
+        result = {
+            'line': line_no, 'tt_number': tt_number, 'amount': amount, 'currency': currency,
+            'date': day, 'vendor': vendor, 'payment_id': None, 'match': None,
+        }
+
+        tt = _normalize(tt_number)
+        hit = self.by_tt.get(tt) if tt else None
+        if hit is not None:
+            pk, payment_amount, payment_currency = hit
+            if pk in self.matched_ids:
+                # Probably a duplicated statement line; the payment is already accounted for
+                result['match'] = 'tt_number_already_matched'
+                return result
+            # A reference alone is not enough to complete a payment for a different sum
+            if (amount is not None and amount != payment_amount) or (
+                    line_currency and line_currency != payment_currency):
+                result['match'] = 'tt_number_amount_mismatch'
+            else:
+                result.update(payment_id=pk, match='tt_number')
+            return result
+
+        if amount is None or day is None:
+            result['match'] = 'unmatched'
+            return result
+
+        candidates = self._amount_candidates(amount, currency, day, tt)
+        if len(candidates) > 1:
+            # Break ties on vendor name, then on the closest transfer date
+            vendor_norm = _normalize(vendor)
+            if vendor_norm:
+                same_vendor = [c for c in candidates if c[2] and (c[2] in vendor_norm or vendor_norm in c[2])]
+                if same_vendor:
+                    candidates = same_vendor
+            closest = min(c[0] for c in candidates)
+            candidates = [c for c in candidates if c[0] == closest]
+
+        if len(candidates) == 1:
+            result.update(payment_id=candidates[0][1], match='amount_date')
+        elif candidates:
+            result['match'] = 'ambiguous'
+        else:
+            result['match'] = 'unmatched'
+        return result
+
+    def _complete(self, results):
+        matched = [r['payment_id'] for r in results if r['payment_id'] is not None]
+        if not matched:
+            return
+        outcome = {
+            r['id']: r for r in bulk_transition(
+                matched, 'PAYMENT_COMPLETE', self.user, notes='Reconciled with bank statement'
+            )
+        }
+        for r in results:
+            if r['payment_id'] is not None:
+                r['completed'] = outcome[r['payment_id']]['success']
+                self.summary['completed'] += int(r['completed'])
+
+    def run(self, stream):
+        """Yield one result dict per statement line of a CSV text stream"""
+        if not self.by_tt and not self.by_amount:
+            self.build_index()
+
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = _resolve_columns(header)
+
+        def cell(row, field):
+            index = columns.get(field)
+            return row[index].strip() if index is not None and index < len(row) else ''
+
+        chunk = []
+        for line_no, row in enumerate(reader, start=2):
+            if not any(c.strip() for c in row):
+                continue
+            self.summary['lines'] += 1
+            amount_raw = cell(row, 'amount')
+            amount = _parse_amount(amount_raw) if amount_raw else None
+            day = _parse_date(cell(row, 'date'), self.date_format)
+            result = self.match_line(
+                line_no,
+                cell(row, 'tt_number'),
+                amount,
+                cell(row, 'currency').upper() or None,
+                day,
+                cell(row, 'vendor'),
+            )
+            if amount_raw and amount is None and result['payment_id'] is None:
+                result['match'] = 'invalid'
+            if result['payment_id'] is not None:
+                self.matched_ids.add(result['payment_id'])
+                self.summary['matched'] += 1
+            else:
+                self.summary[result['match']] += 1
+            chunk.append(result)
+
+            if len(chunk) >= self.chunk_size:
+                if self.apply:
+                    self._complete(chunk)
+                yield from chunk
+                chunk = []
+
+        if self.apply:
+            self._complete(chunk)
+        yield from chunk
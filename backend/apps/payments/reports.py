@@ -0,0 +1,382 @@
+"""Payment summary reports.
+
+Every summary is produced by a single GROUPING SETS query: one pass over the
+payments in the period yields the per-currency totals, the per-status and
+per-type counts and the grand total together. Period filters are plain
+timestamp ranges so the registration_date index stays usable, and
+display labels come straight from the choice constants.
+
+Every summary also carries ETB-normalized totals: a SUM over the materialized
+``amount_etb`` column (see exchange.py), with a count of payments that have
+an amount but no exchange rate yet.
+
+Summaries of closed months (any month before the current one) are cached
+under the PAYMENTS collection version (apps.core.versions). Every committed
+payment write bumps it, so a new version makes every process, whatever the
+cache backend, compute the summaries again.
+
+The pipeline latency report works the same way: one query over a LATERAL
+expansion of each payment into its workflow stages computes mean/p50/p90
+durations per stage for every breakdown (payment type, currency, priority).
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.utils import timezone
+
+from apps.core.versions import PAYMENTS, get_versions
+
+from .models import (
+    Payment, PaymentStageLatencySnapshot, PAYMENT_STATUSES, PAYMENT_TYPES, CURRENCIES,
+    PAYMENT_PRIORITY, PAYMENT_STAGES,
+)
+
+# Include only the 4 valid statuses (exclude any legacy statuses like REGISTERED)
+VALID_STATUSES = [code for code, _ in PAYMENT_STATUSES]
+
+SUMMARY_CACHE_KEY = 'payments:summary:{version}:{year}:{month}'
+SUMMARY_CACHE_TIMEOUT = getattr(settings, 'PAYMENT_SUMMARY_CACHE_TIMEOUT', 60 * 60 * 24)
+
+_PERIOD_FILTER = 'registration_date >= %s AND registration_date < %s'
+
+_SUMMARY_SQL = """
+    SELECT {month_expr} AS report_month, currency, status, payment_type,
+           GROUPING(currency, status, payment_type) AS grouping_id,
+           COUNT(*) AS count, SUM(amount) AS total_amount, SUM(amount_etb) AS total_amount_etb,
+           COUNT(amount) - COUNT(amount_etb) AS unconverted_count
+    FROM {table}
+    WHERE status = ANY(%s) AND ({period})
+    GROUP BY GROUPING SETS ({sets})
+"""
+
+# GROUPING() bitmask -> which grouping set a row belongs to
+_BY_CURRENCY = 0b011
+_BY_STATUS = 0b101
+_BY_TYPE = 0b110
+_GRAND_TOTAL = 0b111
+
+
+def month_bounds(year, month):
+    """Return the [start, end) aware datetimes of a calendar month in local time"""
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def year_bounds(year):
+    return timezone.make_aware(datetime(year, 1, 1)), timezone.make_aware(datetime(year + 1, 1, 1))
+
+
+def is_closed_month(year, month):
+    """A month is closed once the current local month has moved past it"""
+    today = timezone.localdate()
+    return (year, month) < (today.year, today.month)
+
+
+def _empty_summary():
+    return {
+        'total_count': 0, 'total_amount_etb': None, 'unconverted_count': 0,
+        'totals': [], 'by_status': [], 'by_type': [],
+    }
+
+
+def _run_summary_query(start, end, by_month=False, using=None):
+    """Run the GROUPING SETS query and return {month or None: summary dict}.
+    Reads from a replica when routing allows it, unless ``using`` names a database."""
+    connection = connections[using or router.db_for_read(Payment)]
+    if by_month:
+        month_expr = "EXTRACT(MONTH FROM registration_date AT TIME ZONE %s)::int"
+        # Grouping sets refer to the SELECT alias so the expression is bound once
+        sets = '(report_month, currency), (report_month, status), (report_month, payment_type), (report_month)'
+        tz_params = [settings.TIME_ZONE]
+    else:
+        month_expr = 'NULL::int'
+        sets = '(currency), (status), (payment_type), ()'
+        tz_params = []
+
+    sql = _SUMMARY_SQL.format(
+        month_expr=month_expr,
+        table=connection.ops.quote_name(Payment._meta.db_table),
+        period=_PERIOD_FILTER,
+        sets=sets,
+    )
+    params = tz_params + [VALID_STATUSES, start, end]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    raw = {}
+    for (month, currency, status, payment_type, grouping_id, count,
+         total_amount, total_amount_etb, unconverted_count) in rows:
+        bucket = raw.setdefault(month, {
+            'currency': {}, 'status': {}, 'payment_type': {}, 'total': (0, None, 0),
+        })
+        if grouping_id == _BY_CURRENCY:
+            bucket['currency'][currency] = (total_amount, count, total_amount_etb)
+        elif grouping_id == _BY_STATUS:
+            bucket['status'][status] = (count, total_amount_etb)
+        elif grouping_id == _BY_TYPE:
+            bucket['payment_type'][payment_type] = (count, total_amount_etb)
+        elif grouping_id == _GRAND_TOTAL:
+            bucket['total'] = (count, total_amount_etb, unconverted_count)
+
+    return {month: _format_summary(bucket) for month, bucket in raw.items()}
+
+
+def _format_summary(bucket):
+    """Shape grouped rows like the monthly_summary payload, in choice-constant order"""
+    currencies = [code for code, _ in CURRENCIES]
+    currencies += sorted(c for c in bucket['currency'] if c not in currencies)
+    totals = [
+        {
+            'currency': code,
+            'total_amount': bucket['currency'][code][0],
+            'count': bucket['currency'][code][1],
+            'total_amount_etb': bucket['currency'][code][2],
+        }
+        for code in currencies if code in bucket['currency']
+    ]
+    by_status = [
+        {
+            'status': code, 'status_display': label,
+            'count': bucket['status'][code][0], 'total_amount_etb': bucket['status'][code][1],
+        }
+        for code, label in PAYMENT_STATUSES if code in bucket['status']
+    ]
+    type_labels = dict(PAYMENT_TYPES)
+    by_type = [
+        {
+            'payment_type': code, 'payment_type_display': type_labels.get(code, code),
+            'count': count, 'total_amount_etb': total_amount_etb,
+        }
+        for code, (count, total_amount_etb) in sorted(
+            bucket['payment_type'].items(),
+            key=lambda item: list(type_labels).index(item[0]) if item[0] in type_labels else len(type_labels),
+        )
+    ]
+    total_count, total_amount_etb, unconverted_count = bucket['total']
+    return {
+        'total_count': total_count,
+        'total_amount_etb': total_amount_etb,
+        'unconverted_count': unconverted_count,
+        'totals': totals,
+        'by_status': by_status,
+        'by_type': by_type,
+    }
+
+
+def _summary_cache_version():
+    # Read before the summary query, so data cached under it is at least this new
+    return get_versions(PAYMENTS)[PAYMENTS][0]
+
+
+def _cached_month_summary(year, month):
+    key = SUMMARY_CACHE_KEY.format(version=_summary_cache_version(), year=year, month=month)
+    summary = cache.get(key)
+    if summary is None:
+        start, end = month_bounds(year, month)
+        # Cached for a day: read the primary, a lagging replica could be missing writes
+        summary = _run_summary_query(start, end, using=DEFAULT_DB_ALIAS).get(None, _empty_summary())
+        cache.set(key, summary, SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def build_monthly_summary(year, month=None):
+    """Summary for one month, or for the whole year when month is None"""
+    if month and is_closed_month(year, month):
+        summary = _cached_month_summary(year, month)
+    else:
+        start, end = month_bounds(year, month) if month else year_bounds(year)
+        summary = _run_summary_query(start, end).get(None, _empty_summary())
+    return {'year': year, 'month': month, **summary}
+
+
+def build_year_matrix(year):
+    """All 12 months of a year; closed months are served from cache when possible"""
+    months = {}
+    version = _summary_cache_version()
+    keys = {
+        SUMMARY_CACHE_KEY.format(version=version, year=year, month=m): m
+        for m in range(1, 13) if is_closed_month(year, m)
+    }
+    for key, summary in cache.get_many(list(keys)).items():
+        months[keys[key]] = summary
+
+    missing = [m for m in range(1, 13) if m not in months]
+    if missing:
+        # One grouped query over the span of uncached months
+        start, _ = month_bounds(year, missing[0])
+        _, end = month_bounds(year, missing[-1])
+        # Closed months get cached: read those from the primary (see _cached_month_summary)
+        using = DEFAULT_DB_ALIAS if any(is_closed_month(year, m) for m in missing) else None
+        computed = _run_summary_query(start, end, by_month=True, using=using)
+        to_cache = {}
+        for m in missing:
+            months[m] = computed.get(m, _empty_summary())
+            if is_closed_month(year, m):
+                to_cache[SUMMARY_CACHE_KEY.format(version=version, year=year, month=m)] = months[m]
+        if to_cache:
+            cache.set_many(to_cache, SUMMARY_CACHE_TIMEOUT)
+
+    return {
+        'year': year,
+        'months': [
+            {'month': m, 'closed': is_closed_month(year, m), **months[m]}
+            for m in range(1, 13)
+        ],
+    }
+
+
+# A stage is attributed to the month in which it ended. arrival_date is a
+# DateField, so it is taken as local midnight of that day.
+_LATENCY_SQL = """
+    SELECT s.stage, p.payment_type, p.currency, p.priority,
+           GROUPING(p.payment_type, p.currency, p.priority) AS grouping_id,
+           COUNT(*) AS count,
+           AVG(h.hours) AS mean_hours,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY h.hours) AS p50_hours,
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY h.hours) AS p90_hours
+    FROM {table} p
+    CROSS JOIN LATERAL (VALUES
+        ('ARRIVAL_TO_PENDING', p.arrival_date::timestamp AT TIME ZONE %s, p.pending_payment_date),
+        ('PENDING_TO_TRANSFERRED', p.pending_payment_date, p.transferred_date),
+        ('TRANSFERRED_TO_COMPLETE', p.transferred_date, p.completed_date),
+        ('ARRIVAL_TO_COMPLETE', p.arrival_date::timestamp AT TIME ZONE %s, p.completed_date)
+    ) AS s(stage, started_at, ended_at)
+    CROSS JOIN LATERAL (
+        SELECT EXTRACT(EPOCH FROM (s.ended_at - s.started_at)) / 3600.0 AS hours
+    ) AS h
+    WHERE s.started_at IS NOT NULL
+      AND s.ended_at >= s.started_at
+      AND s.ended_at >= %s AND s.ended_at < %s
+    GROUP BY GROUPING SETS (
+        (s.stage), (s.stage, p.payment_type), (s.stage, p.currency), (s.stage, p.priority)
+    )
+"""
+
+# GROUPING(payment_type, currency, priority) bitmask -> breakdown dimension
+_LATENCY_DIMENSION = {
+    0b111: ('ALL', None),
+    0b011: ('PAYMENT_TYPE', 1),
+    0b101: ('CURRENCY', 2),
+    0b110: ('PRIORITY', 3),
+}
+
+_DIMENSION_KEYS = {
+    'PAYMENT_TYPE': ('by_payment_type', 'payment_type', dict(PAYMENT_TYPES)),
+    'CURRENCY': ('by_currency', 'currency', dict(CURRENCIES)),
+    'PRIORITY': ('by_priority', 'priority', dict(PAYMENT_PRIORITY)),
+}
+
+
+def _hours(value):
+    return Decimal(str(round(float(value), 2))) if value is not None else Decimal('0')
+
+
+def compute_stage_latency(start, end):
+    """Return flat latency rows (stage, dimension, value, count, mean, p50, p90) for [start, end)"""
+    connection = connections[router.db_for_read(Payment)]
+    sql = _LATENCY_SQL.format(table=connection.ops.quote_name(Payment._meta.db_table))
+    params = [settings.TIME_ZONE, settings.TIME_ZONE, start, end]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for stage, payment_type, currency, priority, grouping_id, count, mean, p50, p90 in rows:
+        dimension, value_index = _LATENCY_DIMENSION[grouping_id]
+        row = (None, payment_type, currency, priority)
+        results.append({
+            'stage': stage,
+            'dimension': dimension,
+            'dimension_value': row[value_index] if value_index else '',
+            'payment_count': count,
+            'mean_hours': _hours(mean),
+            'p50_hours': _hours(p50),
+            'p90_hours': _hours(p90),
+        })
+    return results
+
+
+def _format_latency(rows):
+    """Group flat latency rows into one entry per stage with its breakdowns"""
+    stages = {
+        code: {
+            'stage': code,
+            'stage_display': label,
+            'overall': None,
+            'by_payment_type': [],
+            'by_currency': [],
+            'by_priority': [],
+        }
+        for code, label in PAYMENT_STAGES
+    }
+    for row in rows:
+        entry = stages.get(row['stage'])
+        if entry is None:
+            continue
+        metrics = {
+            'count': row['payment_count'],
+            'mean_hours': float(row['mean_hours']),
+            'p50_hours': float(row['p50_hours']),
+            'p90_hours': float(row['p90_hours']),
+        }
+        if row['dimension'] == 'ALL':
+            entry['overall'] = metrics
+            continue
+        list_key, field, labels = _DIMENSION_KEYS[row['dimension']]
+        value = row['dimension_value']
+        entry[list_key].append({field: value, f'{field}_display': labels.get(value, value), **metrics})
+
+    for entry in stages.values():
+        for list_key, field, labels in _DIMENSION_KEYS.values():
+            order = list(labels)
+            entry[list_key].sort(key=lambda item: order.index(item[field]) if item[field] in order else len(order))
+    return list(stages.values())
+
+
+def build_pipeline_latency(year, month):
+    """Per-stage latency for a month; closed months are read from snapshots when available"""
+    start, end = month_bounds(year, month)
+    source = 'live'
+    rows = None
+    if is_closed_month(year, month):
+        snapshots = PaymentStageLatencySnapshot.objects.filter(month=start.date()).values(
+            'stage', 'dimension', 'dimension_value', 'payment_count', 'mean_hours', 'p50_hours', 'p90_hours'
+        )
+        rows = list(snapshots)
+        if rows:
+            source = 'snapshot'
+    if not rows:
+        rows = compute_stage_latency(start, end)
+
+    last_moment = timezone.localtime(min(end, timezone.now())) - timedelta(microseconds=1)
+    return {
+        'period': {
+            'month': start.strftime('%B %Y'),
+            'start_date': start.strftime('%Y-%m-%d'),
+            'end_date': last_moment.strftime('%Y-%m-%d'),
+        },
+        'source': source,
+        'stages': _format_latency(rows),
+    }
+
+
+def generate_latency_snapshot(year, month):
+    """Store the latency rows of a month in PaymentStageLatencySnapshot (replacing any previous run)"""
+    start, end = month_bounds(year, month)
+    rows = compute_stage_latency(start, end)
+    month_date = start.date()
+    with transaction.atomic():
+        PaymentStageLatencySnapshot.objects.filter(month=month_date).delete()
+        PaymentStageLatencySnapshot.objects.bulk_create([
+            PaymentStageLatencySnapshot(month=month_date, **row) for row in rows
+        ])
+    return {'month': start.strftime('%B %Y'), 'row_count': len(rows)}
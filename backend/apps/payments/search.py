@@ -0,0 +1,109 @@
+"""Search parser for the payment list.
+
+The ``search`` query parameter is split into typed parts so that each one can
+be answered by an index instead of a sequential scan:
+
+- Amount expressions (``1500``, ``>10000``, ``<=2500.50``, ``1000..5000``) become
+  numeric predicates on ``amount``.
+- Tokens containing a digit (``PAY/2018/001``, ``TT123456``, ``INV-2026-001``) are
+  treated as reference numbers and matched by case-insensitive prefix (which
+  covers exact matches) on ref_no, temp_ref_no, tt_number and invoice_number.
+- Remaining words form a free-text phrase matched against vendor_name and
+  description through the trigram GIN indexes on ``UPPER(...)``.
+
+All parts are ANDed, so ``ABC >10000`` finds ABC payments above 10,000.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+_NUMBER = r'\d[\d,]*(?:\.\d+)?'
+AMOUNT_RANGE_RE = re.compile(rf'^(?P<low>{_NUMBER})\.\.(?P<high>{_NUMBER})$')
+AMOUNT_COMPARE_RE = re.compile(rf'^(?P<op>>=|<=|>|<|=)(?P<value>{_NUMBER})$')
+AMOUNT_PLAIN_RE = re.compile(rf'^{_NUMBER}$')
+
+COMPARE_LOOKUPS = {
+    '>': 'amount__gt',
+    '>=': 'amount__gte',
+    '<': 'amount__lt',
+    '<=': 'amount__lte',
+    '=': 'amount',
+}
+
+REFERENCE_FIELDS = ['ref_no', 'temp_ref_no', 'tt_number', 'invoice_number']
+TEXT_FIELDS = ['vendor_name', 'description']
+
+
+def _to_decimal(value):
+    try:
+        return Decimal(value.replace(',', ''))
+    except InvalidOperation:
+        return None
+
+
+def _reference_q(token):
+    """Prefix match via the trigram indexes on UPPER(field)"""
+    q = Q()
+    for field in REFERENCE_FIELDS:
+        q |= Q(**{f'{field}__istartswith': token})
+    return q
+
+
+def _text_q(phrase):
+    q = Q()
+    for field in TEXT_FIELDS:
+        q |= Q(**{f'{field}__icontains': phrase})
+    return q
+
+
+def _amount_q(token):
+    """Return a Q for an explicit amount expression, or None if the token is not one"""
+    match = AMOUNT_RANGE_RE.match(token)
+    if match:
+        low, high = _to_decimal(match['low']), _to_decimal(match['high'])
+        if low is None or high is None:
+            return None
+        if low > high:
+            low, high = high, low
+        return Q(amount__gte=low, amount__lte=high)
+    match = AMOUNT_COMPARE_RE.match(token)
+    if match:
+        value = _to_decimal(match['value'])
+        if value is None:
+            return None
+        return Q(**{COMPARE_LOOKUPS[match['op']]: value})
+    return None
+
+
+def parse_payment_search(search):
+    """Translate a raw search string into a Q object over indexed predicates"""
+    search = (search or '').strip()
+    if not search:
+        return Q()
+
+    # Allow spaces around range/comparison operators: "1000 .. 5000", "> 10000"
+    normalized = re.sub(r'\s*\.\.\s*', '..', search)
+    normalized = re.sub(r'(>=|<=|>|<|=)\s+', r'\1', normalized)
+
+    q = Q()
+    words = []
+    for token in normalized.split():
+        amount_q = _amount_q(token)
+        if amount_q is not None:
+            q &= amount_q
+        elif AMOUNT_PLAIN_RE.match(token):
+            # A bare number may be an amount or a numeric TT/ref number
+            value = _to_decimal(token)
+            token_q = _reference_q(token)
+            if value is not None:
+                token_q |= Q(amount=value)
+            q &= token_q
+        elif any(ch.isdigit() for ch in token):
+            q &= _reference_q(token)
+        else:
+            words.append(token)
+
+    if words:
+        q &= _text_q(' '.join(words))
+    return q
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import Payment, PaymentHistory, PAYMENT_STATUSES, PAYMENT_TYPES, CURRENCIES, PAYMENT_PRIORITY
+from .models import Payment, PaymentHistory, ExchangeRate, PAYMENT_STATUSES, PAYMENT_TYPES, CURRENCIES, PAYMENT_PRIORITY
 
 User = get_user_model()
 
@@ -22,7 +22,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = [
             'id', 'temp_ref_no', 'ref_no', 'registry_date', 'tt_number', 'arrival_date', 'registration_date', 'registered_by', 'registered_by_name',
-            'amount', 'currency', 'payment_type', 'payment_type_display', 'vendor_name', 'invoice_number', 
+            'amount', 'currency', 'amount_etb', 'payment_type', 'payment_type_display', 'vendor_name', 'invoice_number', 
             'description', 'payment_date', 'due_date', 'status', 'status_display', 'priority', 'priority_display',
             'pending_payment_by', 'pending_payment_by_name', 'pending_payment_date',
             'transferred_by', 'transferred_by_name', 'transferred_date',
@@ -30,7 +30,7 @@ class PaymentSerializer(serializers.ModelSerializer):
             'status_changed_by_name', 'status_changed_date',
             'created_at', 'updated_at', 'is_registered'
         ]
-        read_only_fields = ['registration_date', 'registered_by', 'created_at', 'updated_at',
+        read_only_fields = ['registration_date', 'registered_by', 'created_at', 'updated_at', 'amount_etb',
                            'pending_payment_by', 'pending_payment_date', 'transferred_by', 'transferred_date',
                            'completed_by', 'completed_date']
         extra_kwargs = {
@@ -87,7 +87,17 @@ class PaymentSerializer(serializers.ModelSerializer):
         return str(date_value)
 
 
-class PaymentCreateSerializer(PaymentSerializer):
+class PossibleDuplicatesMixin:
+    """Add payments sharing the saved payment's fingerprint to create/update responses"""
+    
+    def to_representation(self, instance):
+        from .duplicates import find_possible_duplicates
+        data = super().to_representation(instance)
+        data['possible_duplicates'] = find_possible_duplicates(instance)
+        return data
+
+
+class PaymentCreateSerializer(PossibleDuplicatesMixin, PaymentSerializer):
     """Serializer for CEO Secretary to register new payment"""
     
     class Meta(PaymentSerializer.Meta):
@@ -124,7 +134,7 @@ class PaymentCreateSerializer(PaymentSerializer):
         return payment
 
 
-class PaymentUpdateSerializer(PaymentSerializer):
+class PaymentUpdateSerializer(PossibleDuplicatesMixin, PaymentSerializer):
     """Serializer for updating payment details (before CEO approval)"""
     
     class Meta(PaymentSerializer.Meta):
@@ -216,3 +226,22 @@ class PaymentHistorySerializer(serializers.ModelSerializer):
                 return None
             return f"{obj.performed_by.first_name} {obj.performed_by.last_name}".strip() or obj.performed_by.username
         return None
+
+
+class ExchangeRateSerializer(serializers.ModelSerializer):
+    """Exchange rate serializer"""
+    
+    class Meta:
+        model = ExchangeRate
+        fields = ['id', 'date', 'currency', 'rate', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['created_by', 'created_at', 'updated_at']
+    
+    def validate_currency(self, value):
+        if value == 'ETB':
+            raise serializers.ValidationError("ETB is the base currency and needs no exchange rate.")
+        return value
+    
+    def validate_rate(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Rate must be greater than zero.")
+        return value
@@ -0,0 +1,112 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.auth_jwt import UserIdTokenObtainPairSerializer
+from apps.core.principal import forget_profile_version
+
+from .models import Payment
+from .reconciliation import StatementReconciler
+
+
+class PaymentQueryBudgetTests(TestCase):
+    """PaymentViewSet joins the workflow users and their profiles; a serializer
+    field reading another relation shows up here as extra queries per row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.secretary = User.objects.create_user('secretary', password='x' * 10)
+        cls.secretary.profile.role = 'CEO_SECRETARY'
+        cls.secretary.profile.save()
+        workers = []
+        for name in ('registrar', 'pending', 'transfer', 'complete'):
+            worker = User.objects.create_user(name, password='x' * 10, first_name=name.title())
+            workers.append(worker)
+        registrar, pending, transfer, complete = workers
+        now = timezone.now()
+        Payment.objects.bulk_create([
+            Payment(
+                ref_no=f'PAY/{i:05d}', amount=Decimal('100.00') + i, currency='ETB', payment_type='INVOICE',
+                vendor_name=f'Vendor {i}', status='PAYMENT_COMPLETE',
+                registered_by=registrar,
+                pending_payment_by=pending, pending_payment_date=now,
+                transferred_by=transfer, transferred_date=now,
+                completed_by=complete, completed_date=now,
+            )
+            for i in range(100)
+        ])
+
+    def setUp(self):
+        token = UserIdTokenObtainPairSerializer.get_token(self.secretary).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # Warm the per-process profile version cache so it does not count
+        forget_profile_version(self.secretary.pk)
+        self.assertEqual(self.client.get('/api/payments/payments/?page_size=1').status_code, 200)
+
+    def test_list_page_of_100(self):
+        # collection version, count, page
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/payments/payments/?page_size=100')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(response.data['results'][0]['completed_by_name'], 'Complete')
+
+    def test_detail(self):
+        payment = Payment.objects.first()
+        # payment with its workflow users; the validators come from its updated_at
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/payments/payments/{payment.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['registered_by_name'], 'Registrar')
+
+
+class PaymentMonthlySummaryParamsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.secretary = User.objects.create_user('secretary', password='x' * 10)
+        cls.secretary.profile.role = 'CEO_SECRETARY'
+        cls.secretary.profile.save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.secretary)
+
+    def test_invalid_year_or_month_is_rejected(self):
+        for query in ('year=abc', 'year=2025&month=x', 'year=2025&month=13', 'year=2025&month=0', 'year=99999'):
+            for url in ('/api/payments/payments/monthly_summary/', '/api/payments/payments/monthly_summary/xlsx/'):
+                response = self.client.get(f'{url}?{query}')
+                self.assertEqual(response.status_code, 400, f'{url}?{query}')
+
+
+class StatementReconcilerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('registrar', password='x' * 10)
+        transferred = timezone.make_aware(timezone.datetime(2026, 3, 12, 10))
+        cls.payment = Payment.objects.create(
+            ref_no='PAY/1', amount=Decimal('500.00'), currency='ETB', payment_type='INVOICE', vendor_name='Alpha',
+            status='TRANSFERRED_TO_BANK', tt_number='TT-200', transferred_date=transferred, registered_by=user,
+        )
+
+    def reconcile(self, *lines):
+        csv_text = 'tt_number,amount,date\n' + ''.join(f'{line}\n' for line in lines)
+        return list(StatementReconciler().run(io.StringIO(csv_text)))
+
+    def test_line_with_another_tt_number_does_not_match_on_amount(self):
+        (result,) = self.reconcile('TT-999,500.00,2026-03-12')
+        self.assertEqual(result['match'], 'unmatched')
+        self.assertIsNone(result['payment_id'])
+
+    def test_repeated_tt_number_is_reported(self):
+        first, second = self.reconcile('TT200,500.00,2026-03-12', 'TT200,500.00,2026-03-12')
+        self.assertEqual((first['match'], first['payment_id']), ('tt_number', self.payment.pk))
+        self.assertEqual((second['match'], second['payment_id']), ('tt_number_already_matched', None))
+
+    def test_line_without_tt_number_matches_on_amount_and_date(self):
+        (result,) = self.reconcile(',500.00,2026-03-13')
+        self.assertEqual((result['match'], result['payment_id']), ('amount_date', self.payment.pk))
@@ -1,11 +1,17 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PaymentViewSet, PaymentHistoryViewSet
+from .views import PaymentViewSet, PaymentHistoryViewSet, ExchangeRateViewSet
 
 router = DefaultRouter()
 router.register(r'payments', PaymentViewSet, basename='payment')
 router.register(r'payment-history', PaymentHistoryViewSet, basename='payment-history')
+router.register(r'exchange-rates', ExchangeRateViewSet, basename='exchange-rate')
 
-urlpatterns = [
+urlpatterns = []
+if settings.ASYNC_READ_VIEWS:
+    from .views_async import urlpatterns as async_urlpatterns
+    urlpatterns += async_urlpatterns
+urlpatterns += [
     path('', include(router.urls)),
 ]
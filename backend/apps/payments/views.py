@@ -2,20 +2,44 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from .models import Payment, PaymentHistory
+from .models import Payment, PaymentHistory, ExchangeRate, PAYMENT_STATUSES, PAYMENT_TYPES, PAYMENT_PRIORITY
 from .serializers import (
     PaymentSerializer, PaymentCreateSerializer, PaymentUpdateSerializer,
-    PaymentHistorySerializer
+    PaymentHistorySerializer, ExchangeRateSerializer
 )
+from .reports import build_monthly_summary, build_year_matrix, build_pipeline_latency
+from .search import parse_payment_search
+from .workflow import PAYMENT_TRANSITIONS, MAX_BULK_TRANSITION, bulk_transition
+from .reconciliation import StatementReconciler
 from .permissions import IsCEO, IsCEOSecretary, IsCEOOrCEOSecretary, IsCxOFinance
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.pagination import KeysetPagination
+from apps.core.principal import Capability, request_principal
+from apps.core.versions import PAYMENTS
+from apps.core.xlsx import XlsxColumn, build_xlsx_response
 
+INVALID_SUMMARY_PERIOD = 'Invalid year or month. Use a 4-digit year and a month from 1 to 12'
 
-class PaymentViewSet(viewsets.ModelViewSet):
+
+class PaymentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Payment management viewset"""
-    queryset = Payment.objects.all()
+    # PaymentSerializer reads all four workflow users, and status_changed_by_name
+    # also reads the user's profile; join them up front so list/detail run a
+    # fixed number of queries regardless of page size.
+    queryset = Payment.objects.select_related(
+        'registered_by__profile',
+        'pending_payment_by__profile',
+        'transferred_by__profile',
+        'completed_by__profile',
+    )
     permission_classes = [IsAuthenticated]
+    # Conditional GET: lists change with any payment, details with their own row
+    version_keys = (PAYMENTS,)
+    object_stamp_field = 'updated_at'
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -27,16 +51,15 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filter payments based on user role and query parameters"""
         user = self.request.user
-        queryset = Payment.objects.all()
+        queryset = super().get_queryset()
         
         # Role-based filtering
-        if IsCEO().has_permission(self.request, self):
+        principal = request_principal(self.request)
+        if principal.has(Capability.CEO):
             # CEO should not see ARRIVED payments
             queryset = queryset.exclude(status='ARRIVED')
-        elif IsCEOSecretary().has_permission(self.request, self):
-            pass  # Can see all payments
-        elif IsCxOFinance().has_permission(self.request, self):
-            pass  # CxO Finance can see all payments
+        elif principal.has(Capability.VIEW_ALL_PAYMENTS):
+            pass  # CEO Secretary and CxO Finance can see all payments
         else:
             # Other users only see completed payments
             queryset = queryset.filter(status='PAYMENT_COMPLETE')
@@ -44,16 +67,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         # Manual filtering based on query parameters
         search = self.request.query_params.get('search')
         if search:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(temp_ref_no__icontains=search) |
-                Q(ref_no__icontains=search) |
-                Q(tt_number__icontains=search) |
-                Q(vendor_name__icontains=search) |
-                Q(invoice_number__icontains=search) |
-                Q(description__icontains=search) |
-                Q(amount__icontains=search)
-            )
+            queryset = queryset.filter(parse_payment_search(search))
 
         status = self.request.query_params.get('status')
         if status:
@@ -108,11 +122,17 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def history(self, request, pk=None):
-        """Get payment history"""
+        """Get payment history, newest first, keyset-paginated (?cursor=, ?page_size=).
+        ?since=<ISO datetime> returns only entries recorded after that moment."""
         payment = self.get_object()
-        history = payment.history.all()
-        serializer = PaymentHistorySerializer(history, many=True)
-        return Response(serializer.data)
+        history = filter_history_since(
+            PaymentHistory.objects.filter(payment=payment).select_related('performed_by__profile'),
+            request.query_params.get('since'),
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(history, request, view=self)
+        serializer = PaymentHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsCEOSecretary])
     def mark_pending_payment(self, request, pk=None):
@@ -201,85 +221,266 @@ class PaymentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(payment)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_transition(self, request):
+        """Move a batch of payments to a new status in one transaction.
+        Body: {"ids": [1, 2, ...], "status": "TRANSFERRED_TO_BANK", "notes": "optional"}
+        PENDING_PAYMENT is CEO Secretary only; TRANSFERRED_TO_BANK and PAYMENT_COMPLETE are CxO Finance only.
+        Returns one result per id; invalid rows do not block the valid ones."""
+        target_status = request.data.get('status')
+        if target_status not in PAYMENT_TRANSITIONS:
+            return Response(
+                {'error': f'status must be one of: {", ".join(PAYMENT_TRANSITIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        permission = IsCEOSecretary() if target_status == 'PENDING_PAYMENT' else IsCxOFinance()
+        if not permission.has_permission(request, self):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You don't have permission to move payments to this status.")
+
+        ids = request.data.get('ids')
+        try:
+            if not isinstance(ids, list):
+                raise TypeError
+            ids = [int(pk) for pk in ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be a list of payment ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'error': 'ids must not be empty'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAX_BULK_TRANSITION:
+            return Response(
+                {'error': f'At most {MAX_BULK_TRANSITION} payments can be transitioned at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = bulk_transition(
+            ids, target_status, request.user,
+            notes=request.data.get('notes') or None,
+            queryset=self.get_queryset(),
+        )
+        updated = sum(1 for r in results if r['success'])
+        return Response({
+            'status': target_status,
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsCxOFinance])
+    def reconcile_statement(self, request):
+        """Match an uploaded bank statement CSV against payments transferred to bank (CxO Finance only).
+        Form data: file (CSV), apply ("true" to mark matched payments complete), date_window (days, default 3)"""
+        import csv
+        import io
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_window = int(request.data.get('date_window', 3))
+            if not 0 <= date_window <= 31:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response({'error': 'date_window must be between 0 and 31 days'}, status=status.HTTP_400_BAD_REQUEST)
+        apply = str(request.data.get('apply', '')).lower() in ('1', 'true', 'yes')
+
+        reconciler = StatementReconciler(date_window=date_window, apply=apply, user=request.user)
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            results = list(reconciler.run(stream))
+        except (ValueError, csv.Error) as e:
+            return Response({'error': f'Could not read statement: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()
+
+        return Response({
+            'applied': apply,
+            'summary': reconciler.summary,
+            'results': results,
+        })
+
+    def _check_report_permission(self, request):
+        """Payment reports are limited to CEO, CEO Secretary, and CxO Finance"""
+        if not request_principal(request).has_any(
+                Capability.CEO | Capability.CEO_SECRETARY | Capability.PAYMENT_FINANCE):
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You don't have permission to view payment reports.")
+
+    def _summary_period(self, request):
+        """(year, month or None) from the year/month query params, or None if they are invalid"""
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+            month = request.query_params.get('month')
+            month = int(month) if month else None
+        except ValueError:
+            return None
+        if not 1900 <= year <= 9998 or (month is not None and not 1 <= month <= 12):
+            return None
+        return year, month
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def monthly_summary(self, request):
         """Return monthly payment totals and counts for a given year/month.
         Includes only the 4 valid statuses: ARRIVED, PENDING_PAYMENT, TRANSFERRED_TO_BANK, PAYMENT_COMPLETE.
+        Pass mode=year_matrix to get all 12 months of the year at once.
         Accessible by CEO, CEO Secretary, and CxO Finance."""
-        # Check if user has permission to view reports
-        if not (IsCEO().has_permission(request, self) or 
-                IsCEOSecretary().has_permission(request, self) or 
-                IsCxOFinance().has_permission(request, self)):
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("You don't have permission to view payment reports.")
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = request.query_params.get('month')
+        self._check_report_permission(request)
+        period = self._summary_period(request)
+        if period is None:
+            return Response({'error': INVALID_SUMMARY_PERIOD}, status=status.HTTP_400_BAD_REQUEST)
+        year, month = period
 
-        # Include only the 4 valid statuses (exclude any legacy statuses like REGISTERED)
-        valid_statuses = ['ARRIVED', 'PENDING_PAYMENT', 'TRANSFERRED_TO_BANK', 'PAYMENT_COMPLETE']
-        qs = Payment.objects.filter(status__in=valid_statuses)
-        
-        # Filter by year - use registration_date if available, otherwise created_at
-        from django.db.models import Q
-        if month:
-            qs = qs.filter(
-                Q(registration_date__year=year, registration_date__month=int(month)) |
-                Q(registration_date__isnull=True, created_at__year=year, created_at__month=int(month))
-            )
+        # year_matrix mode: all 12 months in one response (closed months cached)
+        if request.query_params.get('mode') == 'year_matrix':
+            return Response(build_year_matrix(year))
+
+        return Response(build_monthly_summary(year, month))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def pipeline_latency(self, request):
+        """Per-stage mean/p50/p90 durations (hours) for a month, broken down by
+        payment type, currency and priority.
+        Query params: month (YYYY-MM format, defaults to the current month)"""
+        self._check_report_permission(request)
+        month_str = request.query_params.get('month')
+        if month_str:
+            try:
+                year, month = map(int, month_str.split('-'))
+                if not 1 <= month <= 12:
+                    raise ValueError
+            except (ValueError, AttributeError):
+                return Response({'error': 'Invalid month format. Use YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
         else:
-            qs = qs.filter(
-                Q(registration_date__year=year) |
-                Q(registration_date__isnull=True, created_at__year=year)
-            )
+            today = timezone.localdate()
+            year, month = today.year, today.month
+        return Response(build_pipeline_latency(year, month))
 
-        from django.db.models import Sum, Count
+    @action(detail=False, methods=['get'], url_path='monthly_summary/xlsx', permission_classes=[IsAuthenticated])
+    def monthly_summary_xlsx(self, request):
+        """Download the monthly summary as an XLSX workbook (totals, by status, by type)"""
+        self._check_report_permission(request)
+        period = self._summary_period(request)
+        if period is None:
+            return Response({'error': INVALID_SUMMARY_PERIOD}, status=status.HTTP_400_BAD_REQUEST)
+        year, month = period
+        summary = build_monthly_summary(year, month)
 
-        total_count = qs.count()
-        total_by_currency = qs.values('currency').annotate(
-            total_amount=Sum('amount'), 
-            count=Count('id')
-        )
-        
-        # Additional details with display names
-        by_status_raw = qs.values('status').annotate(count=Count('id'))
-        by_status = []
-        for item in by_status_raw:
-            status_obj = Payment.objects.filter(status=item['status']).first()
-            by_status.append({
-                'status': item['status'],
-                'status_display': status_obj.get_status_display() if status_obj else item['status'],
-                'count': item['count']
-            })
-        
-        by_type_raw = qs.values('payment_type').annotate(count=Count('id'))
-        by_type = []
-        for item in by_type_raw:
-            type_obj = Payment.objects.filter(payment_type=item['payment_type']).first()
-            by_type.append({
-                'payment_type': item['payment_type'],
-                'payment_type_display': type_obj.get_payment_type_display() if type_obj else item['payment_type'],
-                'count': item['count']
-            })
+        period = f"{year}_{month:02d}" if month else f"{year}"
+        return build_xlsx_response(f"payment_summary_{period}.xlsx", [
+            ('Totals', [
+                XlsxColumn('Currency', width=12),
+                XlsxColumn('Total Amount', 'amount', width=20),
+                XlsxColumn('Count', 'int', width=10),
+                XlsxColumn('Total (ETB)', 'amount', width=20),
+            ], [
+                *([t['currency'], t['total_amount'], t['count'], t['total_amount_etb']] for t in summary['totals']),
+                ['All', None, summary['total_count'], summary['total_amount_etb']],
+            ]),
+            ('By Status', [
+                XlsxColumn('Status', width=22),
+                XlsxColumn('Count', 'int', width=10),
+                XlsxColumn('Total (ETB)', 'amount', width=20),
+            ], ([s['status_display'], s['count'], s['total_amount_etb']] for s in summary['by_status'])),
+            ('By Type', [
+                XlsxColumn('Payment Type', width=18),
+                XlsxColumn('Count', 'int', width=10),
+                XlsxColumn('Total (ETB)', 'amount', width=20),
+            ], ([t['payment_type_display'], t['count'], t['total_amount_etb']] for t in summary['by_type'])),
+        ])
 
-        return Response({
-            'year': year,
-            'month': int(month) if month else None,
-            'total_count': total_count,
-            'totals': list(total_by_currency),
-            'by_status': by_status,
-            'by_type': by_type,
-        })
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def export_xlsx(self, request):
+        """Download the filtered payment list as an XLSX workbook"""
+        queryset = self.filter_queryset(self.get_queryset())
+        status_labels = dict(PAYMENT_STATUSES)
+        type_labels = dict(PAYMENT_TYPES)
+        priority_labels = dict(PAYMENT_PRIORITY)
+
+        columns = [
+            XlsxColumn('Temp Ref No', width=16),
+            XlsxColumn('Ref No', width=18),
+            XlsxColumn('Registry Date', 'date', width=14),
+            XlsxColumn('TT Number', width=16),
+            XlsxColumn('Arrival Date', 'date', width=14),
+            XlsxColumn('Vendor', width=32),
+            XlsxColumn('Invoice Number', width=18),
+            XlsxColumn('Amount', 'amount', width=18),
+            XlsxColumn('Currency', width=10),
+            XlsxColumn('Amount (ETB)', 'amount', width=18),
+            XlsxColumn('Payment Type', width=14),
+            XlsxColumn('Status', width=22),
+            XlsxColumn('Priority', width=10),
+            XlsxColumn('Payment Date', 'date', width=14),
+            XlsxColumn('Due Date', 'date', width=14),
+            XlsxColumn('Registered At', 'datetime', width=18),
+            XlsxColumn('Registered By', width=20),
+            XlsxColumn('Description', width=40),
+        ]
+
+        def rows():
+            for p in queryset.iterator(chunk_size=2000):
+                registered_by = ''
+                if p.registered_by:
+                    registered_by = f"{p.registered_by.first_name} {p.registered_by.last_name}".strip() or p.registered_by.username
+                yield [
+                    p.temp_ref_no, p.ref_no, p.registry_date, p.tt_number, p.arrival_date,
+                    p.vendor_name, p.invoice_number, p.amount, p.currency, p.amount_etb,
+                    type_labels.get(p.payment_type, p.payment_type),
+                    status_labels.get(p.status, p.status),
+                    priority_labels.get(p.priority, p.priority),
+                    p.payment_date, p.due_date, p.registration_date, registered_by, p.description,
+                ]
+
+        filename = f"payments_{timezone.localdate().isoformat()}.xlsx"
+        return build_xlsx_response(filename, [('Payments', columns, rows())])
+
+
+def filter_history_since(queryset, since):
+    """Restrict a PaymentHistory queryset to entries after an ISO datetime"""
+    if not since:
+        return queryset
+    since_dt = parse_datetime(since)
+    if since_dt is None:
+        raise ValidationError({'since': 'Invalid datetime. Use ISO 8601, e.g. 2026-04-25T10:30:00Z'})
+    if timezone.is_naive(since_dt):
+        since_dt = timezone.make_aware(since_dt)
+    return queryset.filter(timestamp__gt=since_dt)
 
 
 class PaymentHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     """Payment history viewset"""
-    queryset = PaymentHistory.objects.all()
+    queryset = PaymentHistory.objects.select_related('performed_by__profile')
     serializer_class = PaymentHistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        """Filter history by payment if payment_id is provided"""
+        """Filter history by payment if payment_id is provided, and by ?since="""
+        queryset = super().get_queryset()
         payment_id = self.request.query_params.get('payment_id')
         if payment_id:
-            return PaymentHistory.objects.filter(payment_id=payment_id)
-        return PaymentHistory.objects.all()
+            queryset = queryset.filter(payment_id=payment_id)
+        return filter_history_since(queryset, self.request.query_params.get('since'))
+
+
+class ExchangeRateViewSet(viewsets.ModelViewSet):
+    """Exchange rates used to convert payments to ETB; maintained by CxO Finance"""
+    queryset = ExchangeRate.objects.all()
+    serializer_class = ExchangeRateSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        if self.action in ('create', 'update', 'partial_update', 'destroy'):
+            return [IsAuthenticated(), IsCxOFinance()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        currency = self.request.query_params.get('currency')
+        if currency:
+            queryset = queryset.filter(currency=currency.upper())
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
@@ -0,0 +1,39 @@
+"""Async GET handlers for the payment list and monthly summary routes (see apps.core.asyncviews)"""
+from asgiref.sync import sync_to_async
+from django.urls import path
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.asyncviews import async_read_view
+from apps.core.conditional import not_modified, response_validators, set_validators
+from .reports import build_monthly_summary, build_year_matrix
+from .views import INVALID_SUMMARY_PERIOD, PaymentViewSet
+
+
+async def payment_list(view, request):
+    etag, last_modified = await sync_to_async(response_validators)(request, view.version_keys)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+        data = await sync_to_async(lambda: view.get_serializer(page, many=True).data)()
+        response = view.get_paginated_response(data)
+    return set_validators(response, etag, last_modified)
+
+
+async def payment_monthly_summary(view, request):
+    view._check_report_permission(request)
+    period = view._summary_period(request)
+    if period is None:
+        return Response({'error': INVALID_SUMMARY_PERIOD}, status=status.HTTP_400_BAD_REQUEST)
+    year, month = period
+    if request.query_params.get('mode') == 'year_matrix':
+        return Response(await sync_to_async(build_year_matrix)(year))
+    return Response(await sync_to_async(build_monthly_summary)(year, month))
+
+
+# Mounted ahead of the router (urls.py), so they take over these routes
+urlpatterns = [
+    path('payments/', async_read_view(PaymentViewSet, 'list', payment_list, {'post': 'create'})),
+    path('payments/monthly_summary/', async_read_view(PaymentViewSet, 'monthly_summary', payment_monthly_summary)),
+]
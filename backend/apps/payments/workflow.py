@@ -0,0 +1,87 @@
+"""Payment status workflow shared by the single-payment actions and bulk tools.
+
+Bulk transitions are applied set-wise: one locked SELECT validates the current
+status of every requested row, one conditional UPDATE moves the valid rows,
+and their PaymentHistory entries are written with a single bulk_create, all
+inside one transaction. Rows that fail validation are reported per id and do
+not abort the others.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versions import PAYMENTS, bump_versions
+
+from .models import Payment, PaymentHistory
+
+# Target status -> (required current status, history action, "by" field, date field)
+PAYMENT_TRANSITIONS = {
+    'PENDING_PAYMENT': ('ARRIVED', 'MARKED_PENDING', 'pending_payment_by', 'pending_payment_date'),
+    'TRANSFERRED_TO_BANK': ('PENDING_PAYMENT', 'TRANSFERRED_TO_BANK', 'transferred_by', 'transferred_date'),
+    'PAYMENT_COMPLETE': ('TRANSFERRED_TO_BANK', 'PAYMENT_COMPLETED', 'completed_by', 'completed_date'),
+}
+
+# Upper bound on ids per bulk request
+MAX_BULK_TRANSITION = 1000
+
+
+def bulk_transition(payment_ids, target_status, user, notes=None, queryset=None):
+    """Move many payments to target_status in one transaction.
+
+    ``queryset`` limits which payments the caller may touch (defaults to all).
+    Returns a list of per-id results in request order:
+    ``{'id', 'success', 'status'}`` or ``{'id', 'success': False, 'error'}``.
+    """
+    required_status, history_action, by_field, date_field = PAYMENT_TRANSITIONS[target_status]
+    if queryset is None:
+        queryset = Payment.objects.all()
+
+    # Preserve request order, ignore duplicate ids
+    ordered_ids = list(dict.fromkeys(payment_ids))
+
+    with transaction.atomic():
+        locked = dict(
+            queryset.select_related(None)
+            .select_for_update(of=('self',))
+            .filter(id__in=ordered_ids)
+            .values_list('id', 'status')
+        )
+
+        results = {}
+        valid_ids = []
+        for pk in ordered_ids:
+            if pk not in locked:
+                results[pk] = {'id': pk, 'success': False, 'error': 'Payment not found'}
+            elif locked[pk] != required_status:
+                results[pk] = {
+                    'id': pk,
+                    'success': False,
+                    'error': f'Payment must be in {required_status} status (currently {locked[pk]})',
+                }
+            else:
+                valid_ids.append(pk)
+
+        if valid_ids:
+            now = timezone.now()
+            Payment.objects.filter(id__in=valid_ids, status=required_status).update(**{
+                'status': target_status,
+                by_field: user,
+                date_field: now,
+                'updated_at': now,
+            })
+            PaymentHistory.objects.bulk_create([
+                PaymentHistory(
+                    payment_id=pk,
+                    action=history_action,
+                    old_status=required_status,
+                    new_status=target_status,
+                    notes=notes,
+                    performed_by=user,
+                )
+                for pk in valid_ids
+            ])
+            for pk in valid_ids:
+                results[pk] = {'id': pk, 'success': True, 'status': target_status}
+            # update() skips post_save, so bump the version explicitly
+            bump_versions(PAYMENTS)
+
+    return [results[pk] for pk in ordered_ids]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Throughput of the read endpoints under the sync (WSGI) and async (ASGI) servers.
+
+Starts run_production.py once per server mode on a spare port, signs in,
+and for every concurrency level keeps that many keep-alive connections
+busy requesting the endpoints in turn for --duration seconds. Needs the
+configured PostgreSQL database and an account that can read the endpoints.
+
+Usage:
+    python benchmark_async.py --username admin --password admin123
+    python benchmark_async.py --username admin --password admin123 \\
+        --concurrency 50,200,500 --duration 20 --modes sync,asgi
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATHS = [
+    '/api/documents/documents/',
+    '/api/documents/documents/performance/',
+    '/api/payments/payments/',
+    '/api/payments/payments/monthly_summary/',
+]
+# SERVER_MODE for run_production.py ('' = gunicorn gthread on Linux, Waitress on Windows)
+MODES = {'sync': '', 'asgi': 'asgi'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, workers):
+    env = dict(os.environ, SERVER_MODE=MODES[mode], HOST='127.0.0.1', PORT=str(port), WEB_WORKERS=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, 'run_production.py')],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f'{mode} server did not start on port {port}')
+
+
+def obtain_token(port, username, password):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}/api/auth/token/',
+        data=json.dumps({'username': username, 'password': password}).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)['access']
+
+
+async def read_response(reader):
+    """(status, body length) of one HTTP/1.1 response"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding') == 'chunked':
+        length = 0
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            length += size
+            if not size:
+                return status, length
+    length = int(headers.get('content-length', 0))
+    await reader.readexactly(length)
+    return status, length
+
+
+async def client(port, token, paths, stop_at, stats):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    requests = [
+        (f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n\r\n').encode()
+        for path in paths
+    ]
+    i = 0
+    try:
+        while time.monotonic() < stop_at:
+            started = time.monotonic()
+            writer.write(requests[i % len(requests)])
+            await writer.drain()
+            status, _ = await read_response(reader)
+            stats['latencies'].append(time.monotonic() - started)
+            if status != 200:
+                stats['errors'] += 1
+            i += 1
+    except (OSError, asyncio.IncompleteReadError):
+        stats['errors'] += 1
+    finally:
+        writer.close()
+
+
+async def run_level(port, token, paths, concurrency, duration):
+    stats = {'latencies': [], 'errors': 0}
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*(client(port, token, paths, stop_at, stats) for _ in range(concurrency)))
+    latencies = sorted(stats['latencies'])
+    if not latencies:
+        return 0, 0, 0, stats['errors']
+
+    def percentile(p):
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+
+    return len(latencies) / duration, percentile(0.5), percentile(0.99), stats['errors']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--modes', default='sync,asgi')
+    parser.add_argument('--concurrency', default='50,200,500')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--workers', type=int, default=2, help='server worker processes (Linux)')
+    parser.add_argument('--path', action='append', dest='paths', help='endpoint to request (repeatable)')
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    levels = [int(c) for c in args.concurrency.split(',')]
+    print(f"{'mode':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode in args.modes.split(','):
+        port = free_port()
+        process = start_server(mode, port, args.workers)
+        try:
+            token = obtain_token(port, args.username, args.password)
+            for concurrency in levels:
+                rate, p50, p99, errors = asyncio.run(run_level(port, token, paths, concurrency, args.duration))
+                print(f'{mode:<6} {concurrency:>7} {rate:>9.1f} {p50:>9.1f} {p99:>9.1f} {errors:>7}')
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+JSON rendering and parsing cost of API payloads: DRF's stock JSONRenderer /
+JSONParser against the orjson-backed ones in apps.core.fastjson.
+
+Payloads are built in memory in the shape the serializers return (a
+100-row document list page, a page of 100 document details with
+attachments, activities, receipts and acknowledgments, a 100-row payment
+list page and a payment monthly summary with Decimal totals and lazy
+translated labels), so no database is needed. Each payload is first
+checked to render to the same bytes with both renderers.
+
+Usage:
+    python benchmark_json.py
+    python benchmark_json.py --rows 100 --repeat 5 --number 50
+"""
+import argparse
+import io
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eeu_tracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils.translation import gettext_lazy as _  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList  # noqa: E402
+
+from apps.core.fastjson import OrjsonParser, OrjsonRenderer, orjson  # noqa: E402
+
+NOW = datetime(2026, 3, 14, 9, 26, 53, 589000, tzinfo=dt_timezone.utc)
+
+
+def stamp(i):
+    # DateTimeField output of the serializers
+    return (NOW - timedelta(hours=i)).isoformat().replace('+00:00', 'Z')
+
+
+def document_row(i):
+    return ReturnDict({
+        'id': i, 'ref_no': f'EEU/CEO/{i:05d}/2026', 'doc_type': 'INCOMING', 'source': 'EXTERNAL',
+        'subject': f'Request for grid connection of industrial park phase {i} — የኃይል አቅርቦት ጥያቄ',
+        'status': 'REGISTERED', 'priority': 'NORMAL', 'registered_at': stamp(i),
+        'department_name': 'Chief Technical Officer', 'perspective_direction': 'INCOMING',
+        'destination_display': 'CEO Office', 'letter_category': 'GENERAL', 'letter_type': 'GENERAL',
+        'letter_category_display': 'General', 'letter_type_display': 'General',
+        'regulatory_body_name': 'Ethiopian Energy Authority',
+    }, serializer=None)
+
+
+def document_detail(i):
+    row = dict(document_row(i))
+    row.update({
+        'summary': 'Follow-up on the tariff review submitted last quarter. ' * 4,
+        'sender_name': 'Ministry of Water and Energy', 'receiver_name': 'CEO', 'confidentiality': 'REGULAR',
+        'received_date': '2026-03-10', 'written_date': '2026-03-08', 'memo_date': None,
+        'ceo_directed_date': None, 'due_date': '2026-03-31', 'ceo_note': '', 'signature_name': '',
+        'company_office_name': 'Ministry of Water and Energy', 'cc_external_names': '',
+        'regulatory_body': 3, 'co_offices': [2, 5], 'co_office_names': ['CFO', 'CTO'], 'co_office_name': 'CFO',
+        'cc_offices': [7], 'cc_office_names': ['Legal'], 'directed_offices': [4],
+        'directed_office_names': ['Distribution'], 'directed_office_name': 'Distribution',
+        'department': 2, 'department_code': 'CTO', 'assigned_to': None, 'prefix': 'EEU/CEO', 'sequence': i,
+        'requires_ceo_direction': False,
+        'attachments': [
+            {'id': i * 10 + n, 'original_name': f'scan_{n}.pdf', 'size': 482133 + n, 'uploaded_at': stamp(n),
+             'uploaded_by': 1, 'download_url': f'/api/documents/attachments/{i * 10 + n}/download/',
+             'preview_url': f'/api/documents/attachments/{i * 10 + n}/preview/', 'preview_status': 'READY',
+             'page_count': 3}
+            for n in range(3)
+        ],
+        'activities': [
+            {'id': i * 10 + n, 'actor': 1, 'actor_name': 'Selam Tesfaye', 'action': 'STATUS_CHANGED',
+             'notes': 'Forwarded to the directed office', 'created_at': stamp(n)}
+            for n in range(6)
+        ],
+        'acknowledgments': [
+            {'id': i, 'department': 7, 'department_name': 'Legal', 'department_code': 'LEGAL',
+             'acknowledged_by': 4, 'acknowledged_by_name': 'Abebe Kebede', 'acknowledged_at': stamp(2)}
+        ],
+        'pending_acknowledgments': [],
+        'receipts': [
+            {'id': i, 'department': 4, 'department_name': 'Distribution', 'department_code': 'DIST',
+             'received_by': 5, 'received_by_name': 'Hana Girma', 'received_at': stamp(1)}
+        ],
+        'pending_receipts': [], 'user_can_acknowledge': False, 'user_can_receive': False, 'scenario': 1,
+    })
+    return ReturnDict(row, serializer=None)
+
+
+def payment_row(i):
+    return ReturnDict({
+        'id': i, 'temp_ref_no': None, 'ref_no': f'PAY/{i:05d}/2026', 'registry_date': '2026-03-02',
+        'tt_number': f'TT{i:08d}', 'arrival_date': '2026-03-01', 'registration_date': stamp(i),
+        'registered_by': 2, 'registered_by_name': 'Meron Alemu', 'amount': f'{1250000 + i * 37}.50',
+        'currency': 'USD', 'amount_etb': f'{71250000 + i * 2109}.75', 'payment_type': 'INVOICE',
+        'payment_type_display': 'Invoice', 'vendor_name': 'Siemens Energy AG', 'invoice_number': f'INV-{i:06d}',
+        'description': 'Transformer spare parts, lot 4', 'payment_date': None, 'due_date': '2026-04-15',
+        'status': 'TRANSFERRED', 'status_display': 'Transferred', 'priority': 'HIGH', 'priority_display': 'High',
+        'pending_payment_by': 3, 'pending_payment_by_name': 'Dawit Bekele', 'pending_payment_date': stamp(i + 1),
+        'transferred_by': 4, 'transferred_by_name': 'Liya Mekonnen', 'transferred_date': stamp(i),
+        'completed_by': None, 'completed_by_name': None, 'completed_date': None,
+        'status_changed_by_name': 'Liya Mekonnen', 'status_changed_date': stamp(i),
+        'created_at': stamp(i + 2), 'updated_at': stamp(i), 'is_registered': True,
+    }, serializer=None)
+
+
+def page(rows):
+    return {
+        'count': 12873, 'next': 'http://testserver/api/x/?page=3', 'previous': 'http://testserver/api/x/?page=1',
+        'results': ReturnList(rows, serializer=None),
+    }
+
+
+def monthly_summary():
+    # Raw report payload: Decimal totals, lazy labels, integer keys, a datetime
+    statuses = [('ARRIVED', _('Arrived')), ('PENDING_PAYMENT', _('Pending Payment')),
+                ('TRANSFERRED', _('Transferred')), ('PAYMENT_COMPLETE', _('Payment Complete'))]
+    return {
+        'year': 2026, 'generated_at': NOW,
+        'months': {
+            month: {
+                'total_count': 410 + month, 'total_amount_etb': Decimal('982341223.45') + month,
+                'totals': [{'currency': c, 'total_amount': Decimal('1234567.89') * n, 'count': 40 * n,
+                            'total_amount_etb': Decimal('70370370.73') * n} for n, c in enumerate(['ETB', 'USD', 'EUR'], 1)],
+                'by_status': [{'status': code, 'status_display': label, 'count': 17,
+                               'total_amount_etb': Decimal('5123.10')} for code, label in statuses],
+            }
+            for month in range(1, 13)
+        },
+    }
+
+
+def payloads(rows):
+    return {
+        'document list': page([document_row(i) for i in range(rows)]),
+        'document details': page([document_detail(i) for i in range(rows)]),
+        'payment list': page([payment_row(i) for i in range(rows)]),
+        'monthly summary': monthly_summary(),
+    }
+
+
+def best(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100, help='rows per list page')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=50, help='calls per timing run')
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed; OrjsonRenderer/OrjsonParser fall back to the stock classes')
+    stock_renderer, fast_renderer = JSONRenderer(), OrjsonRenderer()
+    stock_parser, fast_parser = JSONParser(), OrjsonParser()
+    context = {'encoding': 'utf-8'}
+
+    print(f"{'payload':<18} {'KiB':>6} {'render drf':>11} {'render orjson':>14} {'x':>5} "
+          f"{'parse drf':>10} {'parse orjson':>13} {'x':>5}")
+    for name, data in payloads(args.rows).items():
+        stock = stock_renderer.render(data)
+        fast = fast_renderer.render(data)
+        if stock != fast:
+            raise SystemExit(f'{name}: renderers disagree')
+        render_stock = best(lambda: stock_renderer.render(data), args.repeat, args.number)
+        render_fast = best(lambda: fast_renderer.render(data), args.repeat, args.number)
+        parse_stock = best(lambda: stock_parser.parse(io.BytesIO(stock), parser_context=context), args.repeat, args.number)
+        parse_fast = best(lambda: fast_parser.parse(io.BytesIO(stock), parser_context=context), args.repeat, args.number)
+        print(f'{name:<18} {len(stock) / 1024:>6.0f} {render_stock * 1e6:>9.0f}us {render_fast * 1e6:>12.0f}us '
+              f'{render_stock / render_fast:>5.1f} {parse_stock * 1e6:>8.0f}us {parse_fast * 1e6:>11.0f}us '
+              f'{parse_stock / parse_fast:>5.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.AccessLogMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -61,6 +63,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'eeu_tracker.wsgi.application'
 ASGI_APPLICATION = 'eeu_tracker.asgi.application'
+# run_production.py server: '' (Gunicorn/Waitress, WSGI), 'waitress' or 'asgi'
+SERVER_MODE = os.getenv('SERVER_MODE', '').lower()
+# Async variants of the read-heavy endpoints (apps.core.asyncviews); only
+# worth it under an ASGI server (run_production.py with SERVER_MODE=asgi)
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', str(SERVER_MODE == 'asgi')
+).lower() in ('1', 'true', 'yes')
 
 DB_NAME = os.getenv('DB_NAME', 'eeu_tracker')
 DB_USER = os.getenv('DB_USER', 'postgres')
@@ -76,9 +85,72 @@ DATABASES = {
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
         'PORT': DB_PORT,
+        # Persistent connections: every server thread keeps its own connection
+        # for DB_CONN_MAX_AGE seconds instead of reconnecting per request
+        # (0 closes it after each request, which runserver needs since it
+        # starts a thread per request). A WSGI deployment holds up to
+        # WEB_WORKERS x (WEB_THREADS + ATTACHMENT_PREVIEW_WORKERS) connections;
+        # keep that below Postgres' max_connections.
+        # Always 0 under ASGI: each request's sync work runs in a fresh thread,
+        # so a persistent connection would never be reused, only leaked.
+        'CONN_MAX_AGE': 0 if SERVER_MODE == 'asgi' else int(os.getenv('DB_CONN_MAX_AGE', '0' if DEBUG else '300')),
+        # Ping a reused connection before the request that picks it up
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '10')),
+            # Lets /api/core/metrics/ count this app's connections in pg_stat_activity
+            'application_name': os.getenv('DB_APPLICATION_NAME', 'eeu-tracker'),
+        },
+    }
+}
+
+# Read replicas (apps.core.dbrouter): comma-separated host[:port] list. Each
+# becomes a 'replicaN' alias using the primary's database, user and password
+# unless DB_REPLICA_NAME/USER/PASSWORD/PORT say otherwise. GET/HEAD requests
+# read from them; writes and other requests use the primary.
+DATABASE_REPLICAS = []
+for _index, _entry in enumerate(
+    [h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()], 1
+):
+    _host, _, _port = _entry.partition(':')
+    DATABASES[f'replica{_index}'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DB_NAME),
+        'USER': os.getenv('DB_REPLICA_USER', DB_USER),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DB_PASSWORD),
+        'HOST': _host,
+        'PORT': _port or os.getenv('DB_REPLICA_PORT', DB_PORT),
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            # Fail fast on a dead replica; reads then fall back to the primary
+            'connect_timeout': int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '3')),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_index}')
+DATABASE_ROUTERS = ['apps.core.dbrouter.ReplicaRouter'] if DATABASE_REPLICAS else []
+# A client that wrote reads from the primary for this long (seconds)
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '10'))
+# Replicas further behind than this (seconds) are skipped
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+# How often each server process re-checks a replica's lag (seconds)
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '5'))
+if DATABASE_REPLICAS:
+    MIDDLEWARE.insert(MIDDLEWARE.index('corsheaders.middleware.CorsMiddleware'), 'apps.core.dbrouter.ReplicaRoutingMiddleware')
+
+# Cache (per-process memory by default; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend to share entries between server processes). Cached entries are
+# keyed by collection version, so per-process caches never serve stale data.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'eeu-tracker'),
     }
 }
 
+# Closed-month payment summaries are cached this long (seconds)
+PAYMENT_SUMMARY_CACHE_TIMEOUT = int(os.getenv('PAYMENT_SUMMARY_CACHE_TIMEOUT', str(60 * 60 * 24)))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -101,11 +173,43 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media')).resolve()
 
+# Attachment downloads: '' streams from Django, 'nginx' uses X-Accel-Redirect
+# (internal location FILE_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT),
+# 'sendfile' uses X-Sendfile (Apache mod_xsendfile / lighttpd)
+FILE_SENDFILE_BACKEND = os.getenv('FILE_SENDFILE_BACKEND', '').lower()
+FILE_ACCEL_REDIRECT_PREFIX = os.getenv('FILE_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Public /media/ serving bypasses document permissions; keep it to development
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', str(DEBUG)).lower() in ('1', 'true', 'yes')
+
 # Numbering prefix (e.g., "7.23"), used if not provided on request or department has no code
 DEFAULT_NUMBER_PREFIX = os.getenv('DEFAULT_NUMBER_PREFIX', '')
 
 # File upload behavior: stream files to disk immediately (better for large files)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 0
+# Hash uploads while they stream to disk (content-addressed attachment storage)
+FILE_UPLOAD_HANDLERS = ['apps.documents.blobs.HashingTemporaryFileUploadHandler']
+
+# Chunked, resumable attachment uploads (/api/documents/uploads/). The temp
+# directory must be on the same filesystem as MEDIA_ROOT so completed files
+# are moved, not copied
+CHUNKED_UPLOAD_ROOT = Path(os.getenv('CHUNKED_UPLOAD_ROOT', MEDIA_ROOT / 'chunked-uploads')).resolve()
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', str(2 * 1024 * 1024 * 1024)))
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.getenv('CHUNKED_UPLOAD_EXPIRY_HOURS', '24'))
+
+# Background attachment thumbnails (0 workers: only the generate_previews command renders them)
+ATTACHMENT_PREVIEW_WORKERS = int(os.getenv('ATTACHMENT_PREVIEW_WORKERS', '2'))
+ATTACHMENT_THUMBNAIL_SIZE = int(os.getenv('ATTACHMENT_THUMBNAIL_SIZE', '320'))
+
+# Attachment text extraction for search (extract_attachment_text command)
+ATTACHMENT_TEXT_WORKERS = int(os.getenv('ATTACHMENT_TEXT_WORKERS', '2'))
+ATTACHMENT_TEXT_MAX_CHARS = int(os.getenv('ATTACHMENT_TEXT_MAX_CHARS', str(2 * 1024 * 1024)))
+# Postgres tsvectors are limited to 1 MB; only this much text is indexed
+ATTACHMENT_TEXT_INDEX_CHARS = int(os.getenv('ATTACHMENT_TEXT_INDEX_CHARS', '200000'))
+# OCR of scans needs pytesseract and a local tesseract install with these languages
+ATTACHMENT_OCR_ENABLED = os.getenv('ATTACHMENT_OCR_ENABLED', 'False') == 'True'
+ATTACHMENT_OCR_LANGUAGES = os.getenv('ATTACHMENT_OCR_LANGUAGES', 'eng+amh')
+ATTACHMENT_OCR_MAX_PAGES = int(os.getenv('ATTACHMENT_OCR_MAX_PAGES', '20'))
 FILE_UPLOAD_PERMISSIONS = 0o644
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -113,6 +217,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # CORS
 CORS_ALLOWED_ORIGINS = [o.strip() for o in os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') if o.strip()]
 CORS_ALLOW_CREDENTIALS = True
+# Conditional GET (apps.core.conditional): the SPA sends If-None-Match and reads ETag;
+# chunked uploads (apps.documents.chunked) send X-Chunk-SHA256
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'x-chunk-sha256')
+CORS_EXPOSE_HEADERS = ['ETag']
 if DEBUG and not CORS_ALLOWED_ORIGINS:
     CORS_ALLOW_ALL_ORIGINS = True
 
@@ -131,9 +239,17 @@ if not DEBUG:
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
 
-# Logging
+# Logging: loggers only enqueue records; a listener thread per process
+# formats them and writes the console and the JSON log files, rotated at
+# LOG_ROTATE_WHEN or LOG_MAX_BYTES, whichever comes first (apps.core.log)
 LOG_DIR = BASE_DIR / 'logs'
 LOG_DIR.mkdir(exist_ok=True)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO' if DEBUG else 'WARNING')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', 'midnight')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '14'))
+# One line per request (AccessLogMiddleware) in logs/access.log
+ACCESS_LOG = os.getenv('ACCESS_LOG', 'True') == 'True'
 
 LOGGING = {
     'version': 1,
@@ -143,47 +259,91 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'apps.core.log.JsonFormatter',
+        },
     },
     'handlers': {
+        # Targets run on the listener thread of a queue handler (see the
+        # eeu_tracker.log_targets.* loggers below)
+        'access_file': {
+            'class': 'apps.core.log.SizedTimedRotatingFileHandler',
+            'filename': LOG_DIR / 'access.log',
+            'when': LOG_ROTATE_WHEN,
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'formatter': 'json',
+        },
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'verbose' if DEBUG else 'json',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            'class': 'apps.core.log.SizedTimedRotatingFileHandler',
             'filename': LOG_DIR / 'django.log',
-            'formatter': 'verbose',
+            'when': LOG_ROTATE_WHEN,
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'formatter': 'json',
+        },
+        'queue': {
+            'class': 'apps.core.log.QueueListenerHandler',
+            'targets': 'eeu_tracker.log_targets.app',
+        },
+        'queue_access': {
+            'class': 'apps.core.log.QueueListenerHandler',
+            'targets': 'eeu_tracker.log_targets.access',
         },
     },
     'root': {
-        'handlers': ['console'] if DEBUG else ['console', 'file'],
-        'level': 'DEBUG' if DEBUG else 'WARNING',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'eeu_tracker.access': {
+            'handlers': ['queue_access'],
+            'level': 'INFO' if ACCESS_LOG else 'WARNING',
+            'propagate': False,
+        },
+        # Hold the queue handlers' targets; nothing logs here directly
+        'eeu_tracker.log_targets.app': {
             'handlers': ['console'] if DEBUG else ['console', 'file'],
-            'level': 'INFO' if DEBUG else 'WARNING',
+            'propagate': False,
+        },
+        'eeu_tracker.log_targets.access': {
+            'handlers': ['access_file'],
             'propagate': False,
         },
     },
 }
 
+# orjson-backed JSON renderer/parser (apps.core.fastjson); same output as
+# DRF's, falls back to it when orjson is not installed
+FAST_JSON = os.getenv('FAST_JSON', str(not DEBUG)) == 'True'
+JSON_RENDERER = 'apps.core.fastjson.OrjsonRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer'
+JSON_PARSER = 'apps.core.fastjson.OrjsonParser' if FAST_JSON else 'rest_framework.parsers.JSONParser'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.core.authentication.ClaimsPrincipalJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        JSON_PARSER,
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        JSON_RENDERER,
     ) if not DEBUG else (
-        'rest_framework.renderers.JSONRenderer',
+        JSON_RENDERER,
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.CustomPageNumberPagination',
@@ -196,3 +356,11 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
 }
+
+# How long a process trusts its cached profile version before re-checking it
+# (upper bound for role changes / deactivation to reach outstanding tokens)
+PRINCIPAL_VERSION_CACHE_SECONDS = int(os.getenv('PRINCIPAL_VERSION_CACHE_SECONDS', '5'))
+
+# How long a process trusts its cached departments / regulatory bodies before
+# re-checking their version (upper bound for another process's edit to show up)
+REFERENCE_CACHE_CHECK_SECONDS = int(os.getenv('REFERENCE_CACHE_CHECK_SECONDS', '5'))
@@ -3,26 +3,23 @@ from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.static import serve as static_serve
-from rest_framework_simplejwt.views import (
-    TokenRefreshView,
-)
-
-from apps.core.auth_jwt import UserIdTokenObtainPairView
+from apps.core.auth_jwt import PrincipalTokenRefreshView, UserIdTokenObtainPairView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/token/', UserIdTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/token/refresh/', PrincipalTokenRefreshView.as_view(), name='token_refresh'),
     path('api/core/', include('apps.core.urls')),
     path('api/documents/', include('apps.documents.urls')),
     path('api/payments/', include('apps.payments.urls')),
 ]
 
-# Serve media files (attachments) in both dev and production
-# In production with a reverse proxy (nginx), configure it to serve /media/ directly
-urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', static_serve, {'document_root': settings.MEDIA_ROOT}),
-]
+# Attachments are downloaded through the permission-checked endpoints; raw
+# /media/ URLs are only served when SERVE_MEDIA is set
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(r'^media/(?P<path>.*)$', static_serve, {'document_root': settings.MEDIA_ROOT}),
+    ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,89 @@
+"""
+Gunicorn configuration for the Linux production server (see run_production.py).
+
+The master pre-forks WEB_WORKERS processes; each serves WEB_THREADS requests
+at a time and opens its own database connections. Signals to the master:
+HUP reloads code and settings gracefully (new workers start before old ones
+finish their requests), TERM shuts down gracefully.
+
+Workers are recycled after WEB_MAX_REQUESTS requests (+ random jitter so they
+do not all restart together) to contain memory growth. A request running
+longer than WEB_REQUEST_TIMEOUT seconds is logged and its worker is retired
+(Python cannot kill a single thread): it stops accepting requests and lets
+its other requests finish within WEB_GRACEFUL_TIMEOUT. The stuck request
+still holds a non-daemon pool thread, so the process cannot exit; it stops
+sending heartbeats instead, and the master kills and replaces it once
+WEB_WORKER_TIMEOUT seconds have passed without one. Worst case, a stuck
+request occupies a worker for about WEB_REQUEST_TIMEOUT + WEB_WORKER_TIMEOUT
+seconds (180 by default), the last WEB_WORKER_TIMEOUT of them without
+serving anything else.
+
+With SERVER_MODE=asgi the workers run the ASGI application on an event loop
+(uvicorn) instead, and the async read views are mounted (ASYNC_READ_VIEWS).
+The per-request timeout does not apply there, and database connections are
+opened per request (settings force CONN_MAX_AGE to 0 under ASGI).
+"""
+import multiprocessing
+import os
+import threading
+import time
+
+ASGI = os.getenv('SERVER_MODE', '').lower() == 'asgi'
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+worker_class = 'uvicorn_worker.UvicornWorker' if ASGI else 'gthread'
+workers = int(os.getenv('WEB_WORKERS', str(multiprocessing.cpu_count() + 1)))
+threads = int(os.getenv('WEB_THREADS', '4'))
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', str(max_requests // 10)))
+request_timeout = int(os.getenv('WEB_REQUEST_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+# Heartbeat timeout of a whole worker. A retiring worker stops sending
+# heartbeats during its grace period, so keep this above WEB_GRACEFUL_TIMEOUT
+timeout = int(os.getenv('WEB_WORKER_TIMEOUT', str(graceful_timeout + 30)))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+# Large uploads are spooled by Django, not buffered here
+limit_request_line = 8190
+# Import the app in each worker, so HUP picks up new code and no database
+# connection is ever shared across a fork
+preload_app = False
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+proc_name = 'eeu-tracker'
+
+
+def post_worker_init(worker):
+    """Start the per-worker request timeout watchdog"""
+    if ASGI:
+        return
+    worker.active_requests = {}
+    worker.active_requests_lock = threading.Lock()
+
+    def watchdog():
+        while worker.alive:
+            time.sleep(1)
+            now = time.monotonic()
+            with worker.active_requests_lock:
+                overdue = [(path, now - started) for started, path in worker.active_requests.values()
+                           if now - started > request_timeout]
+            if overdue:
+                for path, elapsed in overdue:
+                    worker.log.error('Request %s exceeded %ss (%.0fs); retiring worker %s',
+                                     path, request_timeout, elapsed, worker.pid)
+                worker.alive = False
+
+    threading.Thread(target=watchdog, name='request-timeout-watchdog', daemon=True).start()
+
+
+def pre_request(worker, req):
+    if ASGI:
+        return
+    with worker.active_requests_lock:
+        worker.active_requests[threading.get_ident()] = (time.monotonic(), req.path)
+
+
+def post_request(worker, req, environ, resp):
+    if ASGI:
+        return
+    with worker.active_requests_lock:
+        worker.active_requests.pop(threading.get_ident(), None)
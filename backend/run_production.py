@@ -1,5 +1,16 @@
 """
-Production server using Waitress (Windows-compatible WSGI server).
+Production server.
+
+Linux: pre-forked Gunicorn workers with thread pools, configured by
+gunicorn.conf.py (WEB_WORKERS, WEB_THREADS, WEB_MAX_REQUESTS,
+WEB_REQUEST_TIMEOUT, ...). Send SIGHUP to the process to reload gracefully.
+
+Windows (or SERVER_MODE=waitress): single-process Waitress.
+
+SERVER_MODE=asgi serves the ASGI application with the async read views
+instead: Gunicorn with uvicorn workers on Linux, a single uvicorn process on
+Windows.
+
 Usage: python run_production.py
 """
 import os
@@ -11,13 +22,60 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eeu_tracker.settings')
 # Force production mode
 os.environ.setdefault('DEBUG', 'False')
 
-from waitress import serve
-from eeu_tracker.wsgi import application
-
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', '8000'))
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-if __name__ == '__main__':
+
+SERVER_MODE = os.getenv('SERVER_MODE', '').lower()
+
+
+def use_gunicorn():
+    if sys.platform == 'win32' or SERVER_MODE == 'waitress':
+        return False
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print('gunicorn is not installed; falling back to Waitress')
+        return False
+    return True
+
+
+def run_gunicorn():
+    application = 'eeu_tracker.asgi:application' if SERVER_MODE == 'asgi' else 'eeu_tracker.wsgi:application'
+    print(f'Starting EEU Document Tracker (production, gunicorn, {application}) on {HOST}:{PORT}')
+    os.chdir(BASE_DIR)
+    # Replace this process with the gunicorn master so signals reach it directly
+    os.execvp(sys.executable, [
+        sys.executable, '-m', 'gunicorn',
+        '--config', os.path.join(BASE_DIR, 'gunicorn.conf.py'),
+        application,
+    ])
+
+
+def run_uvicorn():
+    import uvicorn
+
+    print(f'Starting EEU Document Tracker (production, ASGI) on {HOST}:{PORT}')
+    print('Press Ctrl+C to stop')
+    os.chdir(BASE_DIR)
+    uvicorn.run('eeu_tracker.asgi:application', host=HOST, port=PORT, lifespan='off')
+
+
+def run_waitress():
+    from waitress import serve
+    from eeu_tracker.wsgi import application
+
+    threads = int(os.getenv('WEB_THREADS', '4'))
     print(f'Starting EEU Document Tracker (production) on {HOST}:{PORT}')
     print('Press Ctrl+C to stop')
-    serve(application, host=HOST, port=PORT, threads=4)
+    serve(application, host=HOST, port=PORT, threads=threads)
+
+
+if __name__ == '__main__':
+    if use_gunicorn():
+        run_gunicorn()
+    elif SERVER_MODE == 'asgi':
+        run_uvicorn()
+    else:
+        run_waitress()
@@ -3,6 +3,8 @@ import { getAccessToken, getRefreshToken, setTokens, clearTokens } from './store
 
 const api = axios.create({
   baseURL: import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000',
+  // Sends the backend's read-replica pin cookie, so reads right after a save see it
+  withCredentials: true,
 })
 
 api.interceptors.request.use((config) => {
@@ -11,6 +13,49 @@ api.interceptors.request.use((config) => {
   return config
 })
 
+// Conditional GET: remember the ETag and body of JSON GET responses and send
+// If-None-Match next time; on 304 the server skipped building the response
+// and the remembered body is returned in its place.
+const CONDITIONAL_CACHE_SIZE = 100
+const conditionalCache = new Map()
+
+const conditionalKey = (config) =>
+  (config.method || 'get').toLowerCase() === 'get' && (!config.responseType || config.responseType === 'json')
+    ? api.getUri(config)
+    : null
+
+api.interceptors.request.use((config) => {
+  const key = conditionalKey(config)
+  const cached = key && conditionalCache.get(key)
+  if (cached) {
+    config.headers['If-None-Match'] = cached.etag
+    config.validateStatus = (status) => (status >= 200 && status < 300) || status === 304
+  }
+  return config
+})
+
+api.interceptors.response.use((res) => {
+  const key = conditionalKey(res.config)
+  if (!key) return res
+  if (res.status === 304) {
+    const cached = conditionalCache.get(key)
+    if (cached) {
+      // Most recently used last, so the oldest entry is evicted first
+      conditionalCache.delete(key)
+      conditionalCache.set(key, cached)
+      return { ...res, status: 200, data: cached.data }
+    }
+    return res
+  }
+  const etag = res.headers.etag
+  conditionalCache.delete(key)
+  if (etag) {
+    conditionalCache.set(key, { etag, data: res.data })
+    if (conditionalCache.size > CONDITIONAL_CACHE_SIZE) conditionalCache.delete(conditionalCache.keys().next().value)
+  }
+  return res
+})
+
 let isRefreshing = false
 let queue = []
 
@@ -52,4 +97,46 @@ api.interceptors.response.use(
   }
 )
 
+// Files above this size are sent through the resumable chunked upload API
+export const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024
+const CHUNK_RETRIES = 3
+
+const sha256Hex = async (blob) => {
+  // crypto.subtle only exists in secure contexts (HTTPS/localhost); checksums are optional
+  if (!window.crypto?.subtle) return null
+  const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer())
+  return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('')
+}
+
+export async function uploadAttachmentChunked(documentId, file, { concurrency = 3, onProgress } = {}) {
+  const { data: upload } = await api.post('/api/documents/uploads/', { filename: file.name, size: file.size })
+  const pending = [...upload.missing_offsets]
+  let sent = 0
+
+  const sendChunk = async (offset) => {
+    const chunk = file.slice(offset, offset + upload.chunk_size)
+    const checksum = await sha256Hex(chunk)
+    for (let attempt = 1; ; attempt++) {
+      try {
+        await api.put(`/api/documents/uploads/${upload.id}/chunk/?offset=${offset}`, chunk, {
+          headers: { 'Content-Type': 'application/octet-stream', ...(checksum ? { 'X-Chunk-SHA256': checksum } : {}) },
+        })
+        break
+      } catch (e) {
+        if (attempt >= CHUNK_RETRIES) throw e
+      }
+    }
+    sent += chunk.size
+    if (onProgress) onProgress(sent / file.size)
+  }
+
+  const worker = async () => {
+    while (pending.length) await sendChunk(pending.shift())
+  }
+  await Promise.all(Array.from({ length: Math.min(concurrency, pending.length) }, worker))
+
+  const { data: attachment } = await api.post(`/api/documents/uploads/${upload.id}/complete/`, { document: documentId })
+  return attachment
+}
+
 export default api
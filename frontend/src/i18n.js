@@ -165,6 +165,7 @@ const resources = {
       all_received: 'All offices have received this document',
       all_seen: 'All CC offices have seen this document',
       no_attachments: 'No attachments',
+      page_count: '{{count}} pages',
       no_activity: 'No activity recorded',
       // Dashboard stat cards
       total: 'Total',
@@ -292,6 +293,7 @@ const resources = {
       update_payment: 'Update Payment',
       payment_registered: 'Payment registered successfully',
       payment_updated: 'Payment updated successfully',
+      possible_duplicate_payment: 'Possible duplicate: same vendor, invoice number and amount as {{refs}}',
       temp_ref: 'Temporary Ref',
       temp_ref_optional: 'Temporary Ref (Optional)',
       official_ref: 'Registry Number',
@@ -589,6 +591,7 @@ const resources = {
       all_received: 'ሁሉም ቢሮዎች ይህንን ሰነድ ተቀብለዋል',
       all_seen: 'ሁሉም ግልባጭ ቢሮዎች ይህንን ሰነድ አይተዋል',
       no_attachments: 'አባሪ ፋይሎች የሉም',
+      page_count: '{{count}} ገጾች',
       no_activity: 'ምንም እንቅስቃሴ አልተመዘገበም',
       // Dashboard stat cards
       total: 'ጠቅላላ',
@@ -716,6 +719,7 @@ const resources = {
       update_payment: 'ክፍያ አዘምን',
       payment_registered: 'ክፍያ በተሳካ ሁኔታ ተመዝግቧል',
       payment_updated: 'ክፍያ በተሳካ ሁኔታ ተዘምኗል',
+      possible_duplicate_payment: 'ሊደገም የሚችል ክፍያ፡ ከ{{refs}} ጋር ተመሳሳይ አቅራቢ፣ የደረሰኝ ቁጥር እና መጠን',
       temp_ref: 'ጊዜያዊ ማጣቀሻ',
       temp_ref_optional: 'ጊዜያዊ ማጣቀሻ (አማራጭ)',
       official_ref: 'የመዝገብ ቤት ቁጥር',
@@ -20,6 +20,7 @@ export default function DocumentDetail() {
   const [receiving, setReceiving] = useState(false)
   const [timelineFilter, setTimelineFilter] = useState('ALL')
   const [timelineQuery, setTimelineQuery] = useState('')
+  const [previews, setPreviews] = useState({})
   const toast = useToast()
 
   const fetchDoc = (showLoading = false) => {
@@ -52,6 +53,44 @@ export default function DocumentDetail() {
     }
   }
 
+  // Thumbnails are small JPEGs fetched through the API (bearer token), shown as object URLs
+  useEffect(() => {
+    const withPreview = (doc?.attachments || []).filter(a => a.preview_url)
+    if (!withPreview.length) return undefined
+    let cancelled = false
+    const urls = {}
+    Promise.all(withPreview.map(a =>
+      api.get(a.preview_url, { responseType: 'blob' })
+        .then(res => { urls[a.id] = window.URL.createObjectURL(res.data) })
+        .catch(() => {})
+    )).then(() => {
+      if (!cancelled) setPreviews(urls)
+    })
+    return () => {
+      cancelled = true
+      Object.values(urls).forEach(u => window.URL.revokeObjectURL(u))
+    }
+  }, [doc?.attachments])
+
+  const openAttachment = async (attachment) => {
+    // Downloads go through the API so the bearer token and document permissions apply
+    const tab = window.open('', '_blank')
+    try {
+      const res = await api.get(attachment.download_url, { responseType: 'blob' })
+      const url = window.URL.createObjectURL(res.data)
+      if (tab) {
+        tab.location.href = url
+      } else {
+        window.location.href = url
+      }
+      setTimeout(() => window.URL.revokeObjectURL(url), 60000)
+    } catch (e) {
+      if (tab) tab.close()
+      console.error('Failed to open attachment:', e)
+      toast.error(toast.parseApiError(e))
+    }
+  }
+
   useEffect(() => {
     fetchDoc(true)
   }, [id])
@@ -640,10 +679,19 @@ export default function DocumentDetail() {
         {doc.attachments?.length ? (
           <div className="space-y-2">
             {doc.attachments.map(a => (
-              <a key={a.id} className="flex items-center gap-2 text-blue-700 dark:text-blue-400 hover:underline text-sm" href={a.file?.startsWith('http') ? a.file : `${import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'}${a.file}`} target="_blank" rel="noreferrer">
-                <Paperclip className="w-3.5 h-3.5" />
-                {a.original_name}
-              </a>
+              <button key={a.id} type="button" className="flex items-center gap-2 text-blue-700 dark:text-blue-400 hover:underline text-sm text-left" onClick={() => openAttachment(a)}>
+                {previews[a.id] ? (
+                  <img src={previews[a.id]} alt="" className="w-16 h-16 object-contain rounded border border-slate-200 dark:border-slate-700 bg-white" />
+                ) : (
+                  <Paperclip className="w-3.5 h-3.5" />
+                )}
+                <span>
+                  {a.original_name}
+                  {a.page_count > 1 && (
+                    <span className="block text-xs text-slate-500 dark:text-slate-400">{t('page_count', { count: a.page_count })}</span>
+                  )}
+                </span>
+              </button>
             ))}
           </div>
         ) : (
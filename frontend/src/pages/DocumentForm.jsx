@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import api from '../api'
+import api, { CHUNKED_UPLOAD_THRESHOLD, uploadAttachmentChunked } from '../api'
 import { useTranslation } from 'react-i18next'
 import MultiSelect from '../components/MultiSelect'
 import departmentsEn from '../../Data/Department-en.json'
@@ -274,8 +274,15 @@ export default function DocumentForm() {
         if (isCxoSecretary && userDeptId) {
           fd.append('department', userDeptId)
         }
-        for (const f of files) fd.append('attachments', f)
+        // Large scans are uploaded in resumable chunks once the document exists
+        const largeFiles = files.filter(f => f.size > CHUNKED_UPLOAD_THRESHOLD)
+        for (const f of files) {
+          if (f.size <= CHUNKED_UPLOAD_THRESHOLD) fd.append('attachments', f)
+        }
         const res = await api.post('/api/documents/documents/', fd)
+        for (const f of largeFiles) {
+          await uploadAttachmentChunked(res.data.id, f)
+        }
         toast.success(`Document saved: ${res.data.ref_no}`)
         if (res.data.id) {
           setTimeout(() => navigate(`/documents/${res.data.id}`), 1000)
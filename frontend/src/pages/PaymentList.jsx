@@ -193,13 +193,19 @@ const PaymentList = () => {
         }
       });
 
+      let response
       if (editingPayment) {
-        await api.patch(`/api/payments/payments/${editingPayment.id}/`, payload)
+        response = await api.patch(`/api/payments/payments/${editingPayment.id}/`, payload)
         toast.success(t('payment_updated'))
       } else {
-        await api.post('/api/payments/payments/', payload)
+        response = await api.post('/api/payments/payments/', payload)
         toast.success(t('payment_registered'))
       }
+      const duplicates = response.data?.possible_duplicates || []
+      if (duplicates.length > 0) {
+        const refs = duplicates.map(d => d.ref_no || d.temp_ref_no || `#${d.id}`).join(', ')
+        toast.warning(t('possible_duplicate_payment', { refs }), 8000)
+      }
       
       setShowRegistration(false)
       resetRegistrationForm()
@@ -429,8 +435,16 @@ const PaymentList = () => {
   const fetchPaymentHistory = async (paymentId) => {
     setLoadingHistory(true)
     try {
-      const response = await api.get(`/api/payments/payments/${paymentId}/history/`)
-      return response.data
+      // History is keyset-paginated; follow the cursor until the last page
+      const history = []
+      let cursor = null
+      do {
+        const params = { page_size: 200, ...(cursor ? { cursor } : {}) }
+        const response = await api.get(`/api/payments/payments/${paymentId}/history/`, { params })
+        history.push(...response.data.results)
+        cursor = response.data.next ? new URL(response.data.next).searchParams.get('cursor') : null
+      } while (cursor)
+      return history
     } catch (error) {
       console.error('Error fetching payment history:', error)
       toast.error('Failed to load payment history')
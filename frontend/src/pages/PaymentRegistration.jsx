@@ -66,6 +66,11 @@ const PaymentRegistration = ({ onPaymentCreated }) => {
       
       const response = await api.post('/api/payments/payments/', payload)
       toast.success('Payment registered successfully!')
+      const duplicates = response.data?.possible_duplicates || []
+      if (duplicates.length > 0) {
+        const refs = duplicates.map(d => d.ref_no || d.temp_ref_no || `#${d.id}`).join(', ')
+        toast(`Possible duplicate: same vendor, invoice number and amount as ${refs}`, { icon: '⚠️', duration: 8000 })
+      }
       
       // Reset form
       setForm({
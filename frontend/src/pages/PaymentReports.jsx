@@ -6,7 +6,6 @@ import { useToast } from '../contexts/ToastContext'
 import { Calendar, Download, TrendingUp, FileSpreadsheet } from 'lucide-react'
 import EtDatePicker from 'mui-ethiopian-datepicker'
 import { EtLocalizationProvider } from 'mui-ethiopian-datepicker'
-import * as XLSX from 'xlsx'
 
 const PaymentReports = () => {
   const { t } = useTranslation()
@@ -106,40 +105,32 @@ const PaymentReports = () => {
     window.URL.revokeObjectURL(url)
   }
 
-  const exportToXLSX = () => {
+  const exportToXLSX = async () => {
     if (!summary) return
     
     const monthName = filters.month ? months.find(m => m.value === parseInt(filters.month))?.label : t('all_months')
     const filename = `payment_summary_${filters.year}_${monthName.replace(/\s+/g, '_')}.xlsx`
     
-    // Create workbook and worksheet
-    const wb = XLSX.utils.book_new()
-    
-    // Prepare data for Excel
-    const data = [
-      [`${t('payment_summary')} - ${filters.year} ${monthName}`],
-      [],
-      [t('total_payments'), summary.total_count],
-      [],
-      [t('currency'), t('total_amount'), t('count')],
-      ...summary.totals.map(t => [t.currency, t.total_amount, t.count])
-    ]
-    
-    // Create worksheet from data
-    const ws = XLSX.utils.aoa_to_sheet(data)
-    
-    // Set column widths
-    ws['!cols'] = [
-      { wch: 20 },
-      { wch: 20 },
-      { wch: 10 }
-    ]
-    
-    // Add worksheet to workbook
-    XLSX.utils.book_append_sheet(wb, ws, t('payment_summary'))
-    
-    // Write file
-    XLSX.writeFile(wb, filename)
+    try {
+      const params = new URLSearchParams()
+      params.append('year', filters.year)
+      if (filters.month) {
+        params.append('month', filters.month)
+      }
+      // Workbook is built server-side (typed dates/amounts, Amharic-safe font)
+      const res = await api.get(`/api/payments/payments/monthly_summary/xlsx/?${params.toString()}`, { responseType: 'blob' })
+      const url = window.URL.createObjectURL(res.data)
+      const a = document.createElement('a')
+      a.href = url
+      a.download = filename
+      document.body.appendChild(a)
+      a.click()
+      a.remove()
+      window.URL.revokeObjectURL(url)
+    } catch (error) {
+      console.error('Error exporting summary:', error)
+      toast.error('Failed to export payment summary')
+    }
   }
 
   if (!isCeo && !isCeoSecretary && !isCxoFinance) {